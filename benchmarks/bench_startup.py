@@ -0,0 +1,110 @@
+"""Benchmark the dashboard's cold start: time to first paint in a fresh process.
+
+Each sample starts a new Python process that runs dashboard.py once on one
+tab through Streamlit's test harness and reports the run's 'first_paint'
+stage: seconds into the script run, and seconds since the process started,
+which includes every import of a cold start. The artifact store is warmed
+first, as the Procfile does, so samples measure startup rather than
+scoring. Medians are written as JSON and compared like bench_pipeline's::
+
+    python benchmarks/bench_startup.py --output before.json
+    python benchmarks/bench_startup.py --compare before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench_pipeline import DEFAULT_THRESHOLD, environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TABS = ['overview', 'pain_points', 'actionable_insights']
+METRICS = ['process_seconds', 'first_paint_seconds', 'rerun_seconds']
+# Differences below this many seconds are noise, however large the ratio
+DEFAULT_MIN_DELTA = 0.05
+
+_SAMPLE = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('dashboard.py', default_timeout=600)
+at.session_state['current_tab'] = sys.argv[1]
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+records = at.session_state['diagnostics_runs'][-1]
+paint = next(record for record in records if record['stage'] == 'first_paint')
+print(json.dumps({'process_seconds': paint['process_seconds'], 'first_paint_seconds': paint['seconds'], 'rerun_seconds': records[-1]['seconds']}))
+"""
+
+
+def sample(tab, env):
+    """First paint timings of one cold start on ``tab``"""
+    completed = subprocess.run([sys.executable, '-c', _SAMPLE, tab], cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(f"dashboard failed on {tab}: {completed.stderr.strip()[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(tabs, repeats, cache_dir):
+    env = {**os.environ, 'TP_REVIEWS_CACHE_DIR': cache_dir, 'PYTHONPATH': ROOT}
+    subprocess.run([sys.executable, '-m', 'tp_reviews.warmup', '--cache-dir', cache_dir], cwd=ROOT, env=env, check=True, capture_output=True)
+    results = []
+    for tab in tabs:
+        samples = [sample(tab, env) for _ in range(repeats)]
+        row = {'tab': tab, 'repeats': repeats}
+        for metric in METRICS:
+            values = [values[metric] for values in samples if values[metric] is not None]
+            row[metric] = round(statistics.median(values), 4) if values else None
+        results.append(row)
+        print(f"{tab:<20}" + ''.join(f" {metric} {row[metric]:7.3f}s" for metric in METRICS if row[metric] is not None), flush=True)
+    return results
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD, min_delta=DEFAULT_MIN_DELTA):
+    """Print per-tab ratios against a baseline run; return the regressed (tab, metric) pairs"""
+    previous = {row['tab']: row for row in baseline['results']}
+    regressions = []
+    print(f"\n{'tab':<20} {'metric':<20} {'before':>9} {'after':>9} {'ratio':>6}")
+    for row in results:
+        before = previous.get(row['tab'])
+        for metric in METRICS:
+            if before is None or not before.get(metric) or row[metric] is None:
+                continue
+            ratio = row[metric] / before[metric]
+            flag = '  REGRESSION' if ratio > threshold and row[metric] - before[metric] > min_delta else ''
+            print(f"{row['tab']:<20} {metric:<20} {before[metric]:9.3f} {row[metric]:9.3f} {ratio:6.2f}{flag}")
+            if flag:
+                regressions.append((row['tab'], metric))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's time to first paint from a cold process.")
+    parser.add_argument('--tabs', nargs='+', default=DEFAULT_TABS, help="tabs to open (default: %(default)s)")
+    parser.add_argument('--repeats', type=int, default=5, help="cold starts per tab; the median is reported (default: %(default)s)")
+    parser.add_argument('--cache-dir', help="artifact store to warm and use (default: a temporary directory)")
+    parser.add_argument('--output', help="write results JSON to this file")
+    parser.add_argument('--compare', help="baseline results JSON; exit 1 if any tab regressed")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="slowdown ratio counted as a regression (default: %(default)s)")
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA, help="smallest slowdown in seconds counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run(args.tabs, args.repeats, args.cache_dir or workdir)
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if compare(baseline, report['results'], args.threshold, args.min_delta):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,517 +1,100 @@
-import streamlit as st
 import pandas as pd
-import plotly.express as px
-import re
+import streamlit as st
+from tp_reviews import (
+    BROWSE_COLUMNS, DEFAULT_BROWSE_COLUMNS, PAGE_SIZES, REVIEW_BACKEND, RULES, TRANSLATOR, DatasetCache, DatasetRefresher, ReviewIndex, RunRecorder,
+    count_reviews, dataset_version, english_text, get_theme_summary, json_lines, layout_report, load_cube, load_database, load_discoveries, load_enriched, load_pain_points,
+    load_registry, load_theme_matrix, page_count, parse_query, restrict_positions, review_page, scoring_version, sort_positions
+)
 # from googletrans import Translator  # Temporarily disabled for deployment
 # Removed sklearn imports - no longer using clustering
 # import numpy as np  # Not currently used
 
-def simple_sentiment_analysis(text):
-    """Simple sentiment analysis using keyword matching"""
-    text = str(text).lower()
-    
-    # Positive keywords
-    positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'like', 'happy', 'satisfied', 'recommend', 'best', 'awesome', 'perfect', 'outstanding', 'brilliant', 'superb', 'terrific', 'fabulous', 'marvelous']
-    
-    # Negative keywords
-    negative_words = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'dislike', 'disappointed', 'frustrated', 'angry', 'scam', 'fraud', 'fake', 'useless', 'waste', 'poor', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'dislike', 'disappointed', 'frustrated', 'angry', 'scam', 'fraud', 'fake', 'useless', 'waste', 'poor', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'dislike', 'disappointed', 'frustrated', 'angry', 'scam', 'fraud', 'fake', 'useless', 'waste', 'poor']
-    
-    # Count positive and negative words
-    positive_count = sum(1 for word in positive_words if word in text)
-    negative_count = sum(1 for word in negative_words if word in text)
-    
-    # Calculate sentiment score (-1 to 1)
-    total_words = len(text.split())
-    if total_words == 0:
-        return 0
-    
-    sentiment_score = (positive_count - negative_count) / max(total_words, 1)
-    
-    # Normalize to -1 to 1 range
-    sentiment_score = max(-1, min(1, sentiment_score * 10))
-    
-    return sentiment_score
-
-
+# One recorder per script run, started before anything is sent so first paint covers the whole run
+recorder = RunRecorder()
 
 st.set_page_config(layout="wide", page_title="Trustpilot Review Dashboard")
 
-# Global CSS for increased font size
+# Global CSS for increased font size, sent with every run before anything else
 st.markdown("""
 <style>
-    .stMarkdown, .stText, .stDataFrame, .stMetric, .stButton, .stSelectbox, .stSlider {
-        font-size: 20px !important;
-    }
-    .stMarkdown p, .stMarkdown li {
-        font-size: 20px !important;
-    }
-    .stDataFrame {
-        font-size: 20px !important;
-    }
-    .stMetric {
-        font-size: 20px !important;
-    }
-    .stButton > button {
-        font-size: 20px !important;
-    }
-    /* Additional selectors for better coverage */
-    .stMarkdown div, .stMarkdown span {
-        font-size: 20px !important;
-    }
-    .stTextInput, .stTextArea {
-        font-size: 20px !important;
-    }
-    .stExpander {
+    .stMarkdown, .stMarkdown p, .stMarkdown li, .stMarkdown div, .stMarkdown span, .stText, .stDataFrame, .stMetric,
+    .stButton, .stButton > button, .stSelectbox, .stSlider, .stTextInput, .stTextArea, .stExpander {
         font-size: 20px !important;
     }
-    /* Increase heading sizes */
-    h1, h2, h3, h4, h5, h6 {
-        font-size: 24px !important;
-    }
-    h1 {
-        font-size: 32px !important;
-    }
-    h2 {
-        font-size: 28px !important;
-    }
-    h3 {
-        font-size: 24px !important;
-    }
+    h1, h2, h3, h4, h5, h6 { font-size: 24px !important; }
+    h1 { font-size: 32px !important; }
+    h2 { font-size: 28px !important; }
 </style>
 """, unsafe_allow_html=True)
 
 st.title("Trustpilot Review Analysis Dashboard")
-st.markdown("**📊 Analyzing English Reviews Only** - This dashboard focuses on English-language reviews for accurate sentiment analysis and theme classification.")
+if TRANSLATOR is None:
+    st.markdown("**📊 Analyzing English Reviews Only** - This dashboard focuses on English-language reviews for accurate sentiment analysis and theme classification.")
+else:
+    st.markdown(f"**🌍 Analyzing Reviews in All Languages** - Non-English reviews are translated to English ({TRANSLATOR.name}) before sentiment analysis and theme classification.")
 
-@st.cache_data
-def load_and_translate(filepath):
-    df = pd.read_csv(filepath)
-    # Filter to only English reviews
-    df = df[df['reviewLanguage'] == 'en'].copy()
-    df['reviewText_en'] = df['reviewText']  # Use original text for now
-    df['sentiment'] = df['reviewText_en'].apply(lambda text: simple_sentiment_analysis(text))
-    df['sentiment_label'] = df['sentiment'].apply(
-        lambda score: "positive" if score > 0.1 else ("negative" if score < -0.1 else "neutral")
-    )
-    return df
+# Diagnostics: the last few runs kept per session
+DIAGNOSTICS_HISTORY = 20
+frame_memory = None
 
-# Removed old clustering-based theme detection - replaced with expert system
+@st.cache_resource
+def dataset_cache():
+    """Loaded datasets and everything derived from them, shared by all sessions under one memory budget"""
+    return DatasetCache()
 
-def get_actionable_insights(theme_name, keywords, cluster_reviews):
-    """Generate detailed, specific actionable insights with problem-solution pairs"""
-    
-    insights = {
-        "Users Accusing Platform of Being a Scam/Fraud": {
-            "marketing": [
-                {
-                    "problem": "Users don't trust the platform due to lack of transparency",
-                    "solution": "Launch 'Trust Verification Program' - Create a public dashboard showing real-time payment data, user testimonials, and third-party verification badges. Partner with Trustpilot, BBB, and other trust organizations to display verified status.",
-                    "implementation": "Week 1: Design trust dashboard. Week 2: Integrate payment verification APIs. Week 3: Partner with trust organizations. Week 4: Launch campaign with case studies.",
-                    "expected_impact": "Reduce scam accusations by 60% within 3 months"
-                },
-                {
-                    "problem": "No proof of legitimate payments to users",
-                    "solution": "Create 'Payment Proof Gallery' - Develop a public showcase of real payment screenshots, video testimonials from long-term contributors, and payment verification certificates.",
-                    "implementation": "Week 1: Collect payment proofs from top contributors. Week 2: Create video testimonials. Week 3: Design gallery interface. Week 4: Launch with social media campaign.",
-                    "expected_impact": "Increase user confidence by 75%"
-                },
-                {
-                    "problem": "Lack of clear communication about platform legitimacy",
-                    "solution": "Implement 'Legitimacy Assurance' email sequence - Send new users a 5-email series explaining platform history, security measures, and success stories.",
-                    "implementation": "Week 1: Write email content. Week 2: Set up automation. Week 3: A/B test messaging. Week 4: Launch to all new users.",
-                    "expected_impact": "Reduce new user churn by 40%"
-                }
-            ],
-            "product": [
-                {
-                    "problem": "No real-time verification system for payments",
-                    "solution": "Build 'Payment Verification Engine' - Create automated system that verifies and displays payment confirmations in real-time with blockchain-like transparency.",
-                    "implementation": "Sprint 1: Design verification architecture. Sprint 2: Build payment tracking system. Sprint 3: Add real-time notifications. Sprint 4: Launch with dashboard.",
-                    "expected_impact": "Eliminate payment disputes by 90%"
-                },
-                {
-                    "problem": "Users can't verify platform authenticity",
-                    "solution": "Develop 'Trust Score System' - Implement a reputation scoring mechanism that shows user trust levels, verification status, and platform reliability metrics.",
-                    "implementation": "Sprint 1: Design scoring algorithm. Sprint 2: Build verification system. Sprint 3: Create user dashboard. Sprint 4: Launch with gamification.",
-                    "expected_impact": "Increase user retention by 50%"
-                }
-            ]
-        },
-        "Account Suspended Before Payment - Users Not Getting Paid": {
-            "marketing": [
-                {
-                    "problem": "Users feel cheated when suspended before payment",
-                    "solution": "Launch 'Payment Protection Guarantee' - Create a program that guarantees payment for completed work even if account is suspended, with clear appeal process.",
-                    "implementation": "Week 1: Design guarantee program. Week 2: Create appeal process. Week 3: Build payment protection system. Week 4: Launch with insurance partnership.",
-                    "expected_impact": "Reduce payment complaints by 80%"
-                },
-                {
-                    "problem": "No transparency in suspension reasons",
-                    "solution": "Implement 'Suspension Transparency' - Create detailed explanations for account suspensions with specific steps to resolve issues and appeal process.",
-                    "implementation": "Week 1: Design transparency system. Week 2: Create appeal workflow. Week 3: Build notification system. Week 4: Launch with support training.",
-                    "expected_impact": "Improve user satisfaction by 65%"
-                }
-            ],
-            "product": [
-                {
-                    "problem": "Automated suspensions without human review",
-                    "solution": "Build 'Human Review System' - Implement mandatory human review for all account suspensions with 24-hour response time and clear escalation process.",
-                    "implementation": "Sprint 1: Design review workflow. Sprint 2: Build review dashboard. Sprint 3: Add escalation system. Sprint 4: Launch with quality metrics.",
-                    "expected_impact": "Reduce wrongful suspensions by 95%"
-                },
-                {
-                    "problem": "No payment protection for suspended accounts",
-                    "solution": "Create 'Payment Escrow System' - Hold payments in escrow for 7 days after work completion, ensuring users get paid even if suspended.",
-                    "implementation": "Sprint 1: Design escrow system. Sprint 2: Build payment protection. Sprint 3: Add dispute resolution. Sprint 4: Launch with insurance.",
-                    "expected_impact": "Eliminate unpaid work issues by 100%"
-                }
-            ]
-        },
-        "Payment Delays or Missing Payments After Work Completed": {
-            "marketing": [
-                {
-                    "problem": "Users don't know when payments will arrive",
-                    "solution": "Launch 'Payment Timeline Promise' - Create guaranteed payment schedules with real-time tracking and milestone notifications.",
-                    "implementation": "Week 1: Design timeline system. Week 2: Build tracking interface. Week 3: Create notification system. Week 4: Launch with guarantees.",
-                    "expected_impact": "Reduce payment anxiety by 70%"
-                },
-                {
-                    "problem": "No communication about payment delays",
-                    "solution": "Implement 'Payment Status Updates' - Send proactive notifications about payment status, delays, and resolution steps.",
-                    "implementation": "Week 1: Design notification system. Week 2: Build status tracking. Week 3: Create communication templates. Week 4: Launch with automation.",
-                    "expected_impact": "Improve payment satisfaction by 85%"
-                }
-            ],
-            "product": [
-                {
-                    "problem": "Manual payment processing causing delays",
-                    "solution": "Build 'Automated Payment Engine' - Create system that processes payments automatically within 24 hours of work completion.",
-                    "implementation": "Sprint 1: Design automation system. Sprint 2: Build payment processing. Sprint 3: Add verification checks. Sprint 4: Launch with monitoring.",
-                    "expected_impact": "Reduce payment delays by 90%"
-                },
-                {
-                    "problem": "No payment tracking for users",
-                    "solution": "Develop 'Payment Dashboard' - Create real-time payment tracking with status updates, milestone notifications, and dispute resolution.",
-                    "implementation": "Sprint 1: Design dashboard. Sprint 2: Build tracking system. Sprint 3: Add notifications. Sprint 4: Launch with mobile app.",
-                    "expected_impact": "Increase payment transparency by 100%"
-                }
-            ]
-        },
-        "Poor Customer Support - Slow Response or No Help": {
-            "marketing": [
-                {
-                    "problem": "Users can't get help when needed",
-                    "solution": "Launch '24/7 Support Guarantee' - Implement live chat support with 2-hour response time guarantee and dedicated support team.",
-                    "implementation": "Week 1: Hire support team. Week 2: Set up live chat. Week 3: Create response time monitoring. Week 4: Launch with guarantees.",
-                    "expected_impact": "Improve support satisfaction by 80%"
-                },
-                {
-                    "problem": "No self-help resources available",
-                    "solution": "Create 'Support Knowledge Base' - Build comprehensive FAQ, video tutorials, and troubleshooting guides for common issues.",
-                    "implementation": "Week 1: Research common issues. Week 2: Create content. Week 3: Build knowledge base. Week 4: Launch with search optimization.",
-                    "expected_impact": "Reduce support tickets by 60%"
-                }
-            ],
-            "product": [
-                {
-                    "problem": "Manual ticket routing causing delays",
-                    "solution": "Build 'Smart Support System' - Implement AI-powered ticket routing with automatic categorization and priority assignment.",
-                    "implementation": "Sprint 1: Design AI system. Sprint 2: Build routing logic. Sprint 3: Add categorization. Sprint 4: Launch with monitoring.",
-                    "expected_impact": "Reduce response time by 75%"
-                },
-                {
-                    "problem": "No support tracking for users",
-                    "solution": "Develop 'Support Dashboard' - Create real-time ticket tracking with status updates, estimated resolution times, and escalation options.",
-                    "implementation": "Sprint 1: Design dashboard. Sprint 2: Build tracking system. Sprint 3: Add notifications. Sprint 4: Launch with mobile access.",
-                    "expected_impact": "Improve support transparency by 90%"
-                }
-            ]
-        },
-        "No Work Available - Empty Queues and Project Instability": {
-            "marketing": [
-                {
-                    "problem": "Users can't find consistent work",
-                    "solution": "Launch 'Work Availability Program' - Create guaranteed minimum work hours and project availability notifications with priority access.",
-                    "implementation": "Week 1: Design availability program. Week 2: Build notification system. Week 3: Create priority access. Week 4: Launch with guarantees.",
-                    "expected_impact": "Increase user retention by 70%"
-                },
-                {
-                    "problem": "No transparency about work availability",
-                    "solution": "Implement 'Work Queue Transparency' - Show real-time work availability, upcoming projects, and waitlist management.",
-                    "implementation": "Week 1: Design transparency system. Week 2: Build queue dashboard. Week 3: Add notifications. Week 4: Launch with predictions.",
-                    "expected_impact": "Improve user satisfaction by 65%"
-                }
-            ],
-            "product": [
-                {
-                    "problem": "Manual work assignment causing delays",
-                    "solution": "Build 'Smart Work Assignment' - Create AI-powered system that matches users to available work based on skills and availability.",
-                    "implementation": "Sprint 1: Design matching algorithm. Sprint 2: Build assignment system. Sprint 3: Add skill matching. Sprint 4: Launch with optimization.",
-                    "expected_impact": "Increase work efficiency by 80%"
-                },
-                {
-                    "problem": "No work forecasting for users",
-                    "solution": "Develop 'Work Forecasting Dashboard' - Create predictive analytics showing upcoming work availability and skill demand.",
-                    "implementation": "Sprint 1: Design forecasting model. Sprint 2: Build prediction system. Sprint 3: Add dashboard. Sprint 4: Launch with alerts.",
-                    "expected_impact": "Improve user planning by 90%"
-                }
-            ]
-        }
-    }
-    
-    return insights.get(theme_name, {
-        "marketing": [
-            {
-                "problem": "Generic issue without specific solution",
-                "solution": "Create targeted campaign addressing specific user concerns with clear value proposition and measurable outcomes.",
-                "implementation": "Week 1: Research issue. Week 2: Design solution. Week 3: Build campaign. Week 4: Launch and monitor.",
-                "expected_impact": "Improve user satisfaction by 50%"
-            }
-        ],
-        "product": [
-            {
-                "problem": "Generic technical issue",
-                "solution": "Implement specific technical solution with clear requirements, timeline, and success metrics.",
-                "implementation": "Sprint 1: Design solution. Sprint 2: Build feature. Sprint 3: Test and refine. Sprint 4: Launch with monitoring.",
-                "expected_impact": "Resolve technical issues by 80%"
-            }
-        ]
-    })
+def dataset_artifact(key, name, build, rows=len):
+    """Artifact ``name`` of a dataset from the shared LRU, recorded as a cached stage"""
+    def miss():
+        recorder.cache_miss(name)
+        return build()
+    with recorder.stage(name, cached=True) as stage:
+        value = dataset_cache().get(key, name, miss)
+        stage['rows'] = rows(value)
+    return value
 
-def analyze_review_content(text):
-    """Expert system to analyze review content and extract specific issues"""
-    text_lower = text.lower()
-    
-    # Define expert rules for different issue categories
-    rules = {
-        'payment_issues': {
-            'keywords': ['payment', 'pay', 'money', 'earnings', 'salary', 'wage', 'compensation', 'paid', 'unpaid', 'dollars', 'cash'],
-            'patterns': [
-                r'not.*paid',
-                r'payment.*delayed',
-                r'money.*owed',
-                r'earnings.*missing',
-                r'compensation.*issue'
-            ],
-            'weight': 0
-        },
-        'account_suspension': {
-            'keywords': ['ban', 'block', 'suspended', 'deactivated', 'terminated', 'removed', 'account closed', 'banned', 'blocked'],
-            'patterns': [
-                r'account.*suspended',
-                r'got.*banned',
-                r'blocked.*account',
-                r'suspended.*without',
-                r'terminated.*account'
-            ],
-            'weight': 0
-        },
-        'support_issues': {
-            'keywords': ['support', 'help', 'customer service', 'response', 'contact', 'assistance', 'ticket', 'email', 'reply'],
-            'patterns': [
-                r'no.*response',
-                r'support.*ignored',
-                r'contact.*difficult',
-                r'help.*unavailable',
-                r'customer.*service.*poor'
-            ],
-            'weight': 0
-        },
-        'work_availability': {
-            'keywords': ['work', 'task', 'project', 'job', 'assignment', 'queue', 'available', 'empty', 'no work', 'projects'],
-            'patterns': [
-                r'no.*work.*available',
-                r'empty.*queue',
-                r'no.*projects',
-                r'work.*dried',
-                r'no.*tasks'
-            ],
-            'weight': 0
-        },
-        'training_issues': {
-            'keywords': ['training', 'onboarding', 'assessment', 'test', 'course', 'learning', 'unpaid training', 'exam'],
-            'patterns': [
-                r'unpaid.*training',
-                r'excessive.*training',
-                r'training.*required',
-                r'assessment.*difficult',
-                r'too.*much.*training'
-            ],
-            'weight': 0
-        },
-        'technical_issues': {
-            'keywords': ['platform', 'system', 'bug', 'error', 'technical', 'website', 'app', 'glitch', 'crash', 'broken'],
-            'patterns': [
-                r'platform.*broken',
-                r'system.*error',
-                r'technical.*issue',
-                r'bug.*platform',
-                r'website.*down'
-            ],
-            'weight': 0
-        },
-        'scam_accusations': {
-            'keywords': ['scam', 'fraud', 'fake', 'deceive', 'steal', 'trick', 'scammer', 'cheat', 'dishonest'],
-            'patterns': [
-                r'this.*scam',
-                r'fraudulent.*company',
-                r'fake.*platform',
-                r'deceiving.*users',
-                r'stealing.*money'
-            ],
-            'weight': 0
-        },
-        'privacy_concerns': {
-            'keywords': ['data', 'personal', 'information', 'privacy', 'id', 'document', 'identity', 'private'],
-            'patterns': [
-                r'personal.*data',
-                r'privacy.*concern',
-                r'private.*information',
-                r'data.*collection',
-                r'identity.*theft'
-            ],
-            'weight': 0
-        }
-    }
-    
-    import re
-    
-    # Calculate weights for each category
-    for category, config in rules.items():
-        weight = 0
-        
-        # Keyword matching
-        for keyword in config['keywords']:
-            if keyword in text_lower:
-                weight += 1
-        
-        # Pattern matching (more weight for complex patterns)
-        for pattern in config['patterns']:
-            if re.search(pattern, text_lower):
-                weight += 2
-        
-        # Special rules for high-impact issues
-        if category == 'scam_accusations' and weight > 0:
-            weight *= 2  # Give higher priority to scam accusations
-        
-        if category == 'payment_issues' and 'suspended' in text_lower:
-            weight += 3  # Payment + suspension is a critical issue
-        
-        rules[category]['weight'] = weight
-    
-    return rules
+def load_dataset(key, path, artifact, progress=None):
+    """(reviews, cube) of a dataset through ``artifact(key, name, build, rows)``; reviews are a frame or a SQL view"""
+    if REVIEW_BACKEND == 'sqlite':
+        # Reviews stay in the database: the cube, searches and pages are SQL queries
+        reviews = artifact(key, 'load_database', lambda: load_database(path, progress=progress), rows=lambda reviews: reviews.rows)
+        return reviews, artifact(key, 'review_cube', reviews.cube, rows=lambda cube: len(cube.cells))
+    df = artifact(key, 'load_and_translate', lambda: load_enriched(path, progress=progress))
+    # Metrics and charts read the aggregate cube instead of scanning the frame
+    return df, artifact(key, 'review_cube', lambda: load_cube(df), rows=lambda cube: len(cube.cells))
 
-def classify_review_theme(text):
-    """Classify a single review into the most appropriate theme"""
-    if not text or pd.isna(text):
-        return "General Issues"
-    
-    analysis = analyze_review_content(text)
-    
-    # Find the category with highest weight
-    max_weight = 0
-    best_category = None
-    
-    for category, config in analysis.items():
-        if config['weight'] > max_weight:
-            max_weight = config['weight']
-            best_category = category
-    
-    # Only classify if we have a significant match (weight >= 2)
-    if max_weight < 2:
-        return "General Issues"
-    
-    # Map categories to human-readable themes
-    theme_mapping = {
-        'payment_issues': "Payment Delays or Missing Payments After Work Completed",
-        'account_suspension': "Accounts Suspended/Blocked Without Clear Explanation",
-        'support_issues': "Poor Customer Support - Slow Response or No Help",
-        'work_availability': "No Work Available - Empty Queues and Project Instability",
-        'training_issues': "Excessive Unpaid Training and Assessment Requirements",
-        'technical_issues': "Platform Technical Problems and System Bugs",
-        'scam_accusations': "Users Accusing Platform of Being a Scam/Fraud",
-        'privacy_concerns': "Concerns About Personal Data Collection and Privacy"
-    }
-    
-    return theme_mapping.get(best_category, "General Issues")
+@st.cache_resource
+def dataset_refresher():
+    """Background preparation of new dataset versions, shared by all sessions"""
+    cache = dataset_cache()
+    def prepare(path, key):
+        reviews, _ = load_dataset(key, path, lambda key, name, build, rows=len: cache.get(key, name, build))
+        cache.get(key, 'aggregate_pain_points', lambda: load_pain_points(reviews))
+    # The rule versions are part of the key: editing the rule file reloads with the affected columns rescored
+    return DatasetRefresher(cache, prepare, lambda path: dataset_version(path) + (scoring_version(),))
 
-def extract_pain_points(df, n_clusters=5):
-    """Extract pain points using expert system classification instead of clustering"""
-    pain_df = df[df['sentiment_label'] != 'positive'].copy()
-    
-    if pain_df.empty:
-        return []
-    
-    # Classify each review into themes
-    pain_df['theme'] = pain_df['reviewText_en'].apply(classify_review_theme)
-    
-    # Group by themes and create summaries
-    theme_groups = pain_df.groupby('theme')
-    
-    top_themes = []
-    for theme_name, group in theme_groups:
-        if len(group) < 2:  # Skip themes with only 1 review
-            continue
-            
-        # Get sample quotes
-        quotes = group['reviewText_en'].sample(min(3, len(group)), random_state=42).tolist()
-        
-        # Create impact assessment
-        impact = ("This pain point may discourage high quality contributors, "
-                   "leading to lower retention and engagement, which could impact our next quarter goal of focusing on high quality contributors.")
-        
-        # Get actionable insights
-        actionable_insights = get_actionable_insights(theme_name, [], group)
-        
-        top_themes.append({
-            'theme': theme_name,
-            'summary': f"{len(group)} users affected",
-            'count': len(group),
-            'quotes': quotes,
-            'impact': impact,
-            'keywords': [],
-            'actionable_insights': actionable_insights
-        })
-    
-    # Sort by count and return top themes
-    return sorted(top_themes, key=lambda x: x['count'], reverse=True)[:n_clusters]
+@st.cache_resource
+def warm_datasets():
+    """Start preparing every registered dataset, once per process, after the first run has painted"""
+    dataset_refresher().warm(load_registry().values())
 
-def get_theme_summary(theme_name):
-    """Generate a concise summary paragraph for each pain point theme"""
-    
-    summaries = {
-        "Users Accusing Platform of Being a Scam/Fraud": 
-            "Users are expressing deep distrust in the platform's legitimacy, often citing lack of transparency in payments, unclear verification processes, and feeling deceived by the platform's operations. This creates a critical trust crisis that directly impacts user retention and platform credibility.",
-        
-        "Account Suspended Before Payment - Users Not Getting Paid": 
-            "Users are experiencing account suspensions immediately after completing work but before receiving payment, leaving them feeling cheated and frustrated. This creates a significant barrier to user trust and platform reliability.",
-        
-        "Payment Delays or Missing Payments After Work Completed": 
-            "Users are facing inconsistent and delayed payment processing after completing their work, with unclear timelines and poor communication about payment status. This undermines user confidence in the platform's payment reliability.",
-        
-        "Accounts Suspended/Blocked Without Clear Explanation": 
-            "Users are being suspended or blocked from the platform without receiving clear explanations or having access to a proper appeal process. This creates frustration and a sense of unfair treatment.",
-        
-        "Poor Customer Support - Slow Response or No Help": 
-            "Users are struggling to get timely and effective support when facing issues, with long response times, unhelpful responses, or complete lack of assistance. This leaves users feeling abandoned and frustrated.",
-        
-        "No Work Available - Empty Queues and Project Instability": 
-            "Users are experiencing inconsistent work availability with empty project queues and unstable project assignments, making it difficult to maintain consistent income and engagement with the platform.",
-        
-        "Excessive Unpaid Training and Assessment Requirements": 
-            "Users are required to complete extensive unpaid training and assessments before accessing work opportunities, creating a barrier to entry and frustration about time investment without immediate returns.",
-        
-        "Platform Technical Problems and System Bugs": 
-            "Users are encountering frequent technical issues, system bugs, and platform instability that hinder their ability to complete work efficiently and reliably.",
-        
-        "Concerns About Personal Data Collection and Privacy": 
-            "Users are worried about how their personal data is being collected, stored, and used by the platform, with concerns about privacy protection and data security.",
-        
-        "General Issues": 
-            "Users are experiencing various platform-related issues that impact their overall experience and satisfaction with the service."
-    }
-    
-    return summaries.get(theme_name, "Users are experiencing issues that impact their platform experience and satisfaction.")
+@st.cache_data
+def frame_layout(fingerprint, _df):
+    """Bytes per row of a dataset in the compact layout and in the original one"""
+    return layout_report(_df)
+
+def cached_pain_points(key, enriched):
+    unique_voices = st.session_state.get('unique_voices', False)
+    return dataset_artifact(key, 'aggregate_unique_voices' if unique_voices else 'aggregate_pain_points',
+                            lambda: load_pain_points(enriched, unique_voices=unique_voices))
+
+def switch_dataset():
+    """Filters, search, paging and the open theme all refer to the previous dataset"""
+    for key in [key for key in st.session_state if key.startswith('filter_')]:
+        del st.session_state[key]
+    for key in ('browse_query', 'browse_page', 'browse_full_review'):
+        st.session_state.pop(key, None)
+    st.session_state.current_page = 'main'
+    st.session_state.selected_theme = None
 
 try:
     # Initialize session state at the very beginning
@@ -521,18 +104,47 @@ try:
         st.session_state.selected_theme = None
     if 'current_tab' not in st.session_state:
         st.session_state.current_tab = "overview"
+    # Keep the counting mode while the sidebar (and its checkbox) is not shown
+    if 'unique_voices' in st.session_state:
+        st.session_state.unique_voices = st.session_state.unique_voices
+    
+    registry = load_registry()
+    if len(registry) > 1:
+        with st.sidebar:
+            dataset_name = st.selectbox("🏢 Dataset", list(registry), key="dataset", on_change=switch_dataset)
+    else:
+        dataset_name = next(iter(registry))
+    # After the CSV or the rules change, the last prepared version is shown until the new one is ready
+    dataset_key, refreshing = dataset_refresher().serve(registry[dataset_name])
+    if refreshing:
+        st.info("🔄 Fresher data is being prepared in the background. Showing the previous version until it is ready.")
+        st.button("Check again", key="check_refresh")
     
-    df = load_and_translate("Trustpilot reviews extraction - Data.csv")
+    with st.spinner("Loading and scoring reviews..."):
+        enriched, cube = load_dataset(dataset_key, registry[dataset_name], dataset_artifact, recorder.progress)
+    if REVIEW_BACKEND == 'sqlite':
+        reviews = enriched
+    else:
+        reviews, df = None, enriched
+        if st.session_state.get('show_diagnostics'):
+            frame_memory = frame_layout(df.attrs['fingerprint'], df)
     
     # Data summary section
     with st.expander("📊 Dataset Information", expanded=False):
+        if TRANSLATOR is None:
+            source_rows = dataset_artifact(dataset_key, 'count_reviews', lambda: count_reviews(registry[dataset_name]), rows=lambda rows: rows)
+            language_filter = f"English only (removed {source_rows - cube.count:,} non-English reviews)"
+            total_label = "Total English Reviews"
+        else:
+            language_filter = f"all languages, translated with {TRANSLATOR.name}"
+            total_label = "Total Reviews (all languages)"
         st.markdown(f"""
-        **Dataset Overview:**
-        - **Total English Reviews:** {len(df):,}
-        - **Date Range:** {df['reviewScore'].count()} reviews analyzed
-        - **Language Filter:** English only (removed {124} non-English reviews)
-        - **Average Rating:** {df['reviewScore'].mean():.2f}/5
-        - **Sentiment Distribution:** {df['sentiment_label'].value_counts().to_dict()}
+        **Dataset Overview:** {dataset_name}
+        - **{total_label}:** {cube.count:,}
+        - **Date Range:** {cube.count} reviews analyzed
+        - **Language Filter:** {language_filter}
+        - **Average Rating:** {cube.mean_score():.2f}/5
+        - **Sentiment Distribution:** {cube.value_counts('sentiment_label').to_dict()}
         """)
     
     if st.session_state.current_page == 'main':
@@ -562,11 +174,24 @@ try:
                 st.session_state.current_tab = "actionable_insights"
                 st.rerun()
             
+            # Cross-filters for the metrics, charts and review browser
+            st.markdown("---")
+            st.markdown("**🔍 Filters:**")
+            filters = {
+                'reviewScore': st.multiselect("Rating", cube.labels('reviewScore'), key="filter_scores"),
+                'sentiment_label': st.multiselect("Sentiment", cube.labels('sentiment_label'), key="filter_labels"),
+                'theme': st.multiselect("Theme", cube.labels('theme'), key="filter_themes"),
+                'reviewLanguage': st.multiselect("Language", cube.labels('reviewLanguage'), key="filter_languages"),
+            }
+            view = cube.filter(**filters)
+            st.checkbox("👥 Count unique voices", key="unique_voices",
+                        help="Count near-duplicate (copy-pasted or templated) reviews once when sizing pain points")
+            
             st.markdown("---")
             st.markdown("**📊 Quick Stats:**")
-            st.metric("Total Reviews", len(df))
-            st.metric("Avg Rating", f"{df['reviewScore'].mean():.1f}")
-            st.metric("Avg Sentiment", f"{df['sentiment'].mean():.2f}")
+            st.metric("Total Reviews", view.count)
+            st.metric("Avg Rating", f"{view.mean_score():.1f}")
+            st.metric("Avg Sentiment", f"{view.mean_sentiment():.2f}")
             
             # Add current tab indicator
             st.markdown("---")
@@ -575,14 +200,83 @@ try:
         # Main content area
         if st.session_state.current_tab == "overview":
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Reviews", len(df))
-            col2.metric("Average Rating", f"{df['reviewScore'].mean():.2f}")
-            col3.metric("Average Sentiment", f"{df['sentiment'].mean():.2f}")
+            col1.metric("Total Reviews", view.count)
+            col2.metric("Average Rating", f"{view.mean_score():.2f}")
+            col3.metric("Average Sentiment", f"{view.mean_sentiment():.2f}")
+            recorder.first_paint()
             st.divider()
+            # The charts are drawn into these slots last, so the review table paints before them
             fig_col1, fig_col2 = st.columns(2)
-            with fig_col1:
+            sentiment_slot, rating_slot = fig_col1.empty(), fig_col2.empty()
+
+            st.subheader("Browse Reviews (Original and Translated)")
+            # Only the current page is sliced and sent to the browser; long
+            # text is cut to a preview and the full review loaded on request
+            query = st.text_input("🔎 Search reviews", key="browse_query", placeholder='refund "not paid" -survey OR scam*',
+                                  help='All words must match. Use "quotes" for phrases, -word to exclude, OR for alternatives and word* for prefixes.')
+            # Browsing everything in file or sort order needs no search index
+            searching = bool(parse_query(query)) or any(filters.values())
+            if reviews is None and searching:
+                with st.spinner("Indexing reviews..."):
+                    index = dataset_artifact(dataset_key, 'review_index', lambda: ReviewIndex.from_frame(df), rows=lambda index: index.rows)
+            with recorder.stage('search') as stage:
+                if reviews is not None:
+                    matched, total = reviews.count(query, **filters), reviews.rows
+                elif searching:
+                    matches = index.search(query, **filters)
+                    matched, total = len(matches), len(df)
+                else:
+                    matches, matched, total = None, len(df), len(df)
+                stage['rows'] = matched
+
+            browse_col1, browse_col2, browse_col3, browse_col4 = st.columns(4)
+            page_size = browse_col1.selectbox("Rows per page", PAGE_SIZES, index=1, key="browse_page_size")
+            sort_by = browse_col2.selectbox("Sort by", [None, 'reviewScore', 'sentiment', 'sentiment_label', 'theme', 'reviewTitle'],
+                                            format_func=lambda column: "File order" if column is None else column, key="browse_sort_by")
+            ascending = browse_col3.selectbox("Order", ["Ascending", "Descending"], key="browse_order") == "Ascending"
+            pages = page_count(matched, page_size)
+            # The page lives only in session state, so the widget takes no default value
+            if st.session_state.setdefault('browse_page', 1) > pages:
+                st.session_state.browse_page = pages
+            page = browse_col4.number_input("Page", min_value=1, max_value=pages, step=1, key="browse_page")
+            columns = st.multiselect("Columns", BROWSE_COLUMNS, default=DEFAULT_BROWSE_COLUMNS, key="browse_columns")
+
+            with recorder.stage('render_reviews_table') as stage:
+                if reviews is None:
+                    # Display orders are cached with the dataset, once per sort key
+                    order = dataset_cache().get(dataset_key, ('sorted_positions', sort_by, ascending), lambda: sort_positions(df, sort_by, ascending))
+                    positions = order if matches is None else restrict_positions(order, matches, len(df))
+                    review_rows = review_page(df, page, page_size, positions=positions, columns=columns)
+                else:
+                    review_rows = reviews.page(page, page_size, query=query, sort_by=sort_by, ascending=ascending, columns=columns, **filters)
+                stage['rows'] = len(review_rows)
+                st.dataframe(review_rows, use_container_width=True)
+                st.caption(f"Rows {(page - 1) * page_size + min(1, len(review_rows)):,}–{(page - 1) * page_size + len(review_rows):,} of {matched:,}"
+                           f"{' matching' if matched < total else ''} (page {page} of {pages})")
+
+            # Full rows of this page only, for the titles and the review opened below
+            if reviews is None:
+                page_reviews = df.loc[review_rows.index].assign(reviewText_en=english_text(df.loc[review_rows.index]))
+            else:
+                page_reviews = reviews.reviews(list(review_rows.index))
+            full_review = st.selectbox("📖 Read full review", [None, *review_rows.index], key="browse_full_review",
+                                       format_func=lambda label: "Select a review on this page..." if label is None else f"#{label}: {page_reviews.at[label, 'reviewTitle']}")
+            if full_review is not None:
+                review = page_reviews.loc[full_review]
+                st.markdown(f"**{review['reviewTitle']}** ({review['reviewScore']}★, {review['sentiment_label']})")
+                original, translated = review['reviewText'], review['reviewText_en']
+                st.write("*(no review text)*" if pd.isna(original) else original)
+                # Either text may be missing, and comparing with NA is neither true nor false
+                if not pd.isna(translated) and (pd.isna(original) or str(translated) != str(original)):
+                    st.markdown("**Translated:**")
+                    st.write(translated)
+                st.markdown(f"[View on Trustpilot]({review['reviewUrl']})")
+
+            # Plotly is only imported once a session shows the charts
+            import plotly.express as px
+            with sentiment_slot.container(), recorder.stage('render_sentiment_chart', rows=view.count):
                 st.subheader("Sentiment Distribution")
-                sentiment_counts = df['sentiment_label'].value_counts()
+                sentiment_counts = view.value_counts('sentiment_label')
                 fig_sentiment = px.pie(
                     sentiment_counts,
                     values=sentiment_counts.values,
@@ -591,9 +285,18 @@ try:
                     color_discrete_map={"positive": "green", "negative": "red", "neutral": "blue"}
                 )
                 st.plotly_chart(fig_sentiment, use_container_width=True)
-            with fig_col2:
+                sentiment_histogram = view.sentiment_histogram()
+                fig_scores = px.bar(
+                    sentiment_histogram,
+                    x=sentiment_histogram.index,
+                    y=sentiment_histogram.values,
+                    title="Sentiment Scores",
+                    labels={'x': 'Sentiment score (bin start)', 'y': 'Count'}
+                )
+                st.plotly_chart(fig_scores, use_container_width=True)
+            with rating_slot.container(), recorder.stage('render_rating_chart', rows=view.count):
                 st.subheader("Rating Distribution")
-                rating_counts = df['reviewScore'].value_counts().sort_index()
+                rating_counts = view.value_counts('reviewScore', sort_index=True)
                 fig_rating = px.bar(
                     rating_counts,
                     x=rating_counts.index,
@@ -603,14 +306,10 @@ try:
                 )
                 st.plotly_chart(fig_rating, use_container_width=True)
 
-            st.subheader("Browse Reviews (Original and Translated)")
-            st.dataframe(df[[
-                'reviewScore', 'reviewLanguage', 'reviewTitle', 'reviewText', 'reviewText_en', 'sentiment_label', 'sentiment', 'reviewUrl'
-            ]])
-
         elif st.session_state.current_tab == "pain_points":
             st.header("Top Pain Points")
-            pain_points = extract_pain_points(df, n_clusters=5)
+            pain_points = cached_pain_points(dataset_key, enriched)[:5]
+            recorder.first_paint()
             if not pain_points:
                 st.info("No significant pain points found.")
             else:
@@ -659,6 +358,46 @@ try:
                     
                     st.markdown("<br>", unsafe_allow_html=True)  # Add spacing between cards
 
+            # Reviews often raise several themes: the classifier's score for every theme shows how they overlap
+            st.subheader("🧩 Theme Overlap")
+            theme_matrix = dataset_artifact(dataset_key, 'theme_matrix', lambda: load_theme_matrix(enriched), rows=lambda matrix: matrix.rows)
+            if any(filters.values()):
+                if reviews is None:
+                    index = dataset_artifact(dataset_key, 'review_index', lambda: ReviewIndex.from_frame(df), rows=lambda index: index.rows)
+                    theme_matrix = theme_matrix.select(index.search(**filters))
+                else:
+                    theme_matrix = theme_matrix.select(reviews.positions(**filters))
+            labels_per_review = theme_matrix.labels_per_review()
+            st.caption(f"{labels_per_review.iloc[2:].sum():,} of {theme_matrix.rows:,} reviews raise more than one theme; "
+                       f"{labels_per_review.iloc[0]:,} raise none strongly enough to be classified.")
+            theme_counts, primary_counts = theme_matrix.counts(), theme_matrix.primary_counts()
+            st.dataframe([{'theme': theme, 'main theme of': int(primary_counts[theme]), 'raised in': int(theme_counts[theme])}
+                          for theme in theme_counts.sort_values(ascending=False).index], hide_index=True, use_container_width=True)
+            import plotly.express as px
+            fig_overlap = px.imshow(theme_matrix.cooccurrence(), text_auto=True, color_continuous_scale="Reds",
+                                    title="Reviews raising both themes", labels={'color': 'Reviews'})
+            st.plotly_chart(fig_overlap, use_container_width=True)
+
+            # What the rules miss: n-grams and clusters mined from the reviews themselves
+            st.subheader("🔬 Discovered Themes")
+            discoveries = dataset_artifact(dataset_key, 'discover_themes', lambda: load_discoveries(enriched),
+                                           rows=lambda buckets: sum(bucket['reviews'] for bucket in buckets))
+            buckets = {bucket['bucket']: bucket for bucket in discoveries}
+            bucket = buckets[st.radio("Reviews to mine", list(buckets), horizontal=True, key="discovery_bucket")]
+            st.caption(f"{bucket['reviews']:,} reviews mined for phrases the theme rules do not cover")
+            if not bucket['ngrams']:
+                st.info("Not enough reviews in this group to find distinctive phrases.")
+            else:
+                st.markdown("**Distinctive phrases** (how much more often they appear here than in other reviews):")
+                st.dataframe([{**ngram, 'share': ngram['share'] * 100} for ngram in bucket['ngrams']], hide_index=True, use_container_width=True,
+                             column_config={'share': st.column_config.NumberColumn(format="%.1f%%"), 'lift': st.column_config.NumberColumn(format="%.1f×")})
+                st.markdown(f"**Candidate clusters** ({bucket['unclustered']:,} reviews share no distinctive phrase):")
+                for cluster in bucket['clusters']:
+                    with st.expander(f"{cluster['label']} · {cluster['count']} reviews"):
+                        st.markdown(f"**Top phrases:** {', '.join(cluster['terms'])}")
+                        for quote in cluster['quotes']:
+                            st.markdown(f"> {quote}")
+
         elif st.session_state.current_tab == "actionable_insights":
             st.header("🎯 Actionable Insights & Growth Strategy")
             
@@ -673,9 +412,11 @@ try:
             - **Increase LTV by 50%** through better contributor experience
             """)
             
+            recorder.first_paint()
+            
             # Pain Points Analysis for Growth
             st.subheader("🔍 Pain Points Impact on Growth")
-            pain_points = extract_pain_points(df, n_clusters=10)
+            pain_points = cached_pain_points(dataset_key, enriched)[:10]
             
             if pain_points:
                 for theme in pain_points:
@@ -946,6 +687,7 @@ try:
             st.rerun()
         
         st.header(f"📋 {theme['theme']}")
+        recorder.first_paint()
         
         # Theme summary
         theme_summary = get_theme_summary(theme['theme'])
@@ -957,8 +699,10 @@ try:
             st.metric("🎯 Priority Level", "High" if theme['count'] > 50 else "Medium" if theme['count'] > 20 else "Low")
         
         with col2:
-            st.metric("📊 Impact Score", f"{theme['count'] / len(df) * 100:.1f}%")
+            st.metric("📊 Impact Score", f"{theme['count'] / cube.count * 100:.1f}%")
             st.metric("🔍 Sentiment", "Negative" if theme['count'] > 30 else "Mixed")
+        if theme.get('duplicates'):
+            st.caption(f"{theme['duplicates']} of this theme's reviews are near-duplicates of another one; {theme['unique_count']} unique voices.")
         
         st.divider()
         
@@ -1009,5 +753,47 @@ try:
         - Establish clear communication channels
         """)
 
-except FileNotFoundError:
-    st.error("Error: 'Trustpilot reviews extraction - Data.csv' not found. Please add the file to the project directory.") 
\ No newline at end of file
+except FileNotFoundError as exc:
+    st.error(f"Error: '{exc.filename}' not found. Please add the file to the project directory.") 
+finally:
+    # Runs ending in st.rerun() (tab switches, theme cards) leave through here too, so they are recorded and start the warm-up
+    warm_datasets()
+    recorder.finish()
+    runs = st.session_state.setdefault('diagnostics_runs', [])
+    runs.append(recorder.records)
+    del runs[:-DIAGNOSTICS_HISTORY]
+
+# Opt-in diagnostics panel: stage timings of this run and the run history
+with st.sidebar:
+    st.markdown("---")
+    if st.checkbox("🩺 Diagnostics", key="show_diagnostics"):
+        first_paint = next((record for record in recorder.records if record['stage'] == 'first_paint'), None)
+        st.caption(f"Run {recorder.run_id}: {recorder.records[-1]['seconds']:.3f}s"
+                   + (f", first paint after {first_paint['seconds']:.3f}s" if first_paint else "")
+                   + (f" ({first_paint['process_seconds']:.1f}s after process start)" if first_paint and first_paint['process_seconds'] is not None else ""))
+        if frame_memory is not None:
+            st.caption(f"Reviews frame: {frame_memory['bytes_per_row_after']:,.0f} bytes/row, "
+                       f"{frame_memory['bytes_after'] / 2**20:.1f} MiB ({frame_memory['bytes_per_row_before']:,.0f} bytes/row before compaction)")
+        st.caption(f"Rules: version {RULES.version} from {RULES.path}")
+        refresh_stats = dataset_refresher().stats()
+        st.caption(f"Background refresh: {refresh_stats['pending']} pending, {refresh_stats['prepared']} versions prepared, "
+                   f"{refresh_stats['failures']} failed")
+        cache_stats = dataset_cache().stats()
+        st.caption(f"Dataset cache: {cache_stats['datasets']} loaded, {cache_stats['bytes'] / 2**20:.1f} of {cache_stats['max_bytes'] / 2**20:.0f} MiB; "
+                   f"{cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses, {cache_stats['evictions']:,} evictions "
+                   f"({cache_stats['evicted_bytes'] / 2**20:.1f} MiB freed)")
+        st.dataframe(
+            [{key: record.get(key) for key in ('stage', 'chunk', 'seconds', 'rows', 'memory_delta_mb', 'cache', 'error')} for record in recorder.records],
+            hide_index=True, use_container_width=True
+        )
+        st.markdown("**Recent runs:**")
+        st.dataframe(
+            [{'run_id': run[-1]['run_id'], 'timestamp': run[-1]['timestamp'], 'seconds': run[-1]['seconds'], 'rss_mb': run[-1]['rss_mb']} for run in reversed(runs)],
+            hide_index=True, use_container_width=True
+        )
+        st.download_button(
+            "Export JSON lines",
+            data=''.join(json_lines(run) for run in runs),
+            file_name="tp_reviews_diagnostics.jsonl",
+            mime="application/x-ndjson"
+        )
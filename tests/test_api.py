@@ -0,0 +1,125 @@
+"""The HTTP API, served on a free port: status codes, ETags and 304s, gzip negotiation and the decoded bodies"""
+import gzip
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from tp_reviews.api import GZIP_MIN_BYTES, ReviewApi, make_server
+from tp_reviews.cube import ReviewCube
+from tp_reviews.pipeline import load_enriched
+from tp_reviews.store import ArtifactStore
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Trustpilot reviews extraction - Data.csv')
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    return ArtifactStore(str(tmp_path_factory.mktemp('cache')))
+
+
+@pytest.fixture(scope='module')
+def server(store):
+    api = ReviewApi({'trustpilot': CSV_PATH, 'missing': 'no-such-export.csv'}, store, translator=None)
+    server = make_server(api, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, target, method='GET', **headers):
+    """(status, headers, body) of one request; one connection per request, like a polling client"""
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=60)
+    try:
+        connection.request(method, target, headers=headers)
+        response = connection.getresponse()
+        return response.status, {name.lower(): value for name, value in response.getheaders()}, response.read()
+    finally:
+        connection.close()
+
+
+def test_registry(server):
+    status, headers, body = get(server, '/datasets')
+    assert status == 200
+    assert headers['content-type'] == 'application/json; charset=utf-8'
+    assert int(headers['content-length']) == len(body)
+    assert json.loads(body) == {'datasets': ['missing', 'trustpilot']}
+
+
+def test_distributions_match_the_cube(server, store):
+    status, headers, body = get(server, '/datasets/trustpilot/distributions?reviewScore=1&reviewScore=2')
+    assert status == 200
+    assert 'content-encoding' not in headers
+    payload = json.loads(body)
+
+    df = load_enriched(CSV_PATH, store, translator=None)
+    cube = ReviewCube.from_frame(df).filter(reviewScore=[1, 2])
+    assert payload['count'] == cube.count == int(df['reviewScore'].isin([1, 2]).sum())
+    assert [rating['value'] for rating in payload['ratings']] == [1, 2]
+    assert {theme['value']: theme['count'] for theme in payload['themes']} == cube.value_counts('theme').to_dict()
+    assert payload['mean_score'] == pytest.approx(cube.mean_score())
+
+
+def test_etag_and_not_modified(server):
+    target = '/datasets/trustpilot/distributions?theme=General+Feedback&reviewScore=5'
+    status, headers, body = get(server, target)
+    assert status == 200
+    etag = headers['etag']
+    assert headers['cache-control'] == 'no-cache' and headers['vary'] == 'Accept-Encoding'
+
+    # Same resource, parameters in another order: same ETag
+    assert get(server, '/datasets/trustpilot/distributions?reviewScore=5&theme=General+Feedback')[1]['etag'] == etag
+    status, headers, body = get(server, target, **{'If-None-Match': etag})
+    assert (status, body, headers['etag']) == (304, b'', etag)
+    assert get(server, target, **{'If-None-Match': f'"other", W/{etag}'})[0] == 304
+    assert get(server, target, **{'If-None-Match': '"other"'})[0] == 200
+    # Another filter is another resource
+    assert get(server, '/datasets/trustpilot/distributions?reviewScore=4')[1]['etag'] != etag
+
+
+def test_gzip_negotiation(server):
+    target = '/datasets/trustpilot/pain-points'
+    status, headers, plain = get(server, target)
+    assert status == 200 and 'content-encoding' not in headers
+    assert len(plain) >= GZIP_MIN_BYTES
+    pain_points = json.loads(plain)
+    assert pain_points and {'theme', 'theme_summary'} <= set(pain_points[0])
+
+    status, zipped_headers, zipped = get(server, target, **{'Accept-Encoding': 'br, gzip;q=0.8'})
+    assert status == 200 and zipped_headers['content-encoding'] == 'gzip'
+    assert int(zipped_headers['content-length']) == len(zipped) < len(plain)
+    assert json.loads(gzip.decompress(zipped)) == pain_points
+    # Each encoding has its own ETag, and either revalidates
+    assert zipped_headers['etag'] == headers['etag'][:-1] + '-gzip"'
+    status, revalidated, _ = get(server, target, **{'Accept-Encoding': 'gzip', 'If-None-Match': zipped_headers['etag']})
+    assert status == 304 and revalidated['etag'] == zipped_headers['etag']
+    assert get(server, target, **{'If-None-Match': zipped_headers['etag']})[0] == 304
+
+    assert 'content-encoding' not in get(server, target, **{'Accept-Encoding': 'gzip;q=0'})[1]
+    # Short bodies are never gzipped
+    assert 'content-encoding' not in get(server, '/datasets', **{'Accept-Encoding': 'gzip'})[1]
+
+
+def test_head_sends_headers_only(server):
+    status, headers, body = get(server, '/datasets', method='HEAD')
+    assert status == 200 and body == b''
+    assert int(headers['content-length']) == len(get(server, '/datasets')[2])
+
+
+@pytest.mark.parametrize('target, status, message', [
+    ('/datasets/unknown/distributions', 404, "Unknown dataset: unknown"),
+    ('/datasets/trustpilot/nothing', 404, "No such resource: /datasets/trustpilot/nothing"),
+    ('/', 404, "No such resource: /"),
+    ('/datasets/trustpilot/distributions?stars=5', 400, "Unknown filter: stars; filter by reviewLanguage, reviewScore, sentiment_label, theme"),
+    ('/datasets/missing/distributions', 500, "Internal error"),
+])
+def test_errors(server, target, status, message):
+    answer, headers, body = get(server, target)
+    assert answer == status
+    assert headers['content-type'] == 'application/json; charset=utf-8'
+    assert 'etag' not in headers
+    assert json.loads(body) == {'error': message}
@@ -0,0 +1,249 @@
+"""ThemeClassifier against the per-rule expert system it replaced, which is kept here as the oracle"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tp_reviews.classifier import GENERAL_THEME, ThemeClassifier
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Trustpilot reviews extraction - Data.csv')
+
+
+def analyze_review_content(text):
+    """Expert system to analyze review content and extract specific issues"""
+    text_lower = text.lower()
+    
+    # Define expert rules for different issue categories
+    rules = {
+        'payment_issues': {
+            'keywords': ['payment', 'pay', 'money', 'earnings', 'salary', 'wage', 'compensation', 'paid', 'unpaid', 'dollars', 'cash'],
+            'patterns': [
+                r'not.*paid',
+                r'payment.*delayed',
+                r'money.*owed',
+                r'earnings.*missing',
+                r'compensation.*issue'
+            ],
+            'weight': 0
+        },
+        'account_suspension': {
+            'keywords': ['ban', 'block', 'suspended', 'deactivated', 'terminated', 'removed', 'account closed', 'banned', 'blocked'],
+            'patterns': [
+                r'account.*suspended',
+                r'got.*banned',
+                r'blocked.*account',
+                r'suspended.*without',
+                r'terminated.*account'
+            ],
+            'weight': 0
+        },
+        'support_issues': {
+            'keywords': ['support', 'help', 'customer service', 'response', 'contact', 'assistance', 'ticket', 'email', 'reply'],
+            'patterns': [
+                r'no.*response',
+                r'support.*ignored',
+                r'contact.*difficult',
+                r'help.*unavailable',
+                r'customer.*service.*poor'
+            ],
+            'weight': 0
+        },
+        'work_availability': {
+            'keywords': ['work', 'task', 'project', 'job', 'assignment', 'queue', 'available', 'empty', 'no work', 'projects'],
+            'patterns': [
+                r'no.*work.*available',
+                r'empty.*queue',
+                r'no.*projects',
+                r'work.*dried',
+                r'no.*tasks'
+            ],
+            'weight': 0
+        },
+        'training_issues': {
+            'keywords': ['training', 'onboarding', 'assessment', 'test', 'course', 'learning', 'unpaid training', 'exam'],
+            'patterns': [
+                r'unpaid.*training',
+                r'excessive.*training',
+                r'training.*required',
+                r'assessment.*difficult',
+                r'too.*much.*training'
+            ],
+            'weight': 0
+        },
+        'technical_issues': {
+            'keywords': ['platform', 'system', 'bug', 'error', 'technical', 'website', 'app', 'glitch', 'crash', 'broken'],
+            'patterns': [
+                r'platform.*broken',
+                r'system.*error',
+                r'technical.*issue',
+                r'bug.*platform',
+                r'website.*down'
+            ],
+            'weight': 0
+        },
+        'scam_accusations': {
+            'keywords': ['scam', 'fraud', 'fake', 'deceive', 'steal', 'trick', 'scammer', 'cheat', 'dishonest'],
+            'patterns': [
+                r'this.*scam',
+                r'fraudulent.*company',
+                r'fake.*platform',
+                r'deceiving.*users',
+                r'stealing.*money'
+            ],
+            'weight': 0
+        },
+        'privacy_concerns': {
+            'keywords': ['data', 'personal', 'information', 'privacy', 'id', 'document', 'identity', 'private'],
+            'patterns': [
+                r'personal.*data',
+                r'privacy.*concern',
+                r'private.*information',
+                r'data.*collection',
+                r'identity.*theft'
+            ],
+            'weight': 0
+        }
+    }
+    
+    import re
+    
+    # Calculate weights for each category
+    for category, config in rules.items():
+        weight = 0
+        
+        # Keyword matching
+        for keyword in config['keywords']:
+            if keyword in text_lower:
+                weight += 1
+        
+        # Pattern matching (more weight for complex patterns)
+        for pattern in config['patterns']:
+            if re.search(pattern, text_lower):
+                weight += 2
+        
+        # Special rules for high-impact issues
+        if category == 'scam_accusations' and weight > 0:
+            weight *= 2  # Give higher priority to scam accusations
+        
+        if category == 'payment_issues' and 'suspended' in text_lower:
+            weight += 3  # Payment + suspension is a critical issue
+        
+        rules[category]['weight'] = weight
+    
+    return rules
+
+def classify_review_theme(text):
+    """Classify a single review into the most appropriate theme"""
+    if not text or pd.isna(text):
+        return "General Issues"
+    
+    analysis = analyze_review_content(text)
+    
+    # Find the category with highest weight
+    max_weight = 0
+    best_category = None
+    
+    for category, config in analysis.items():
+        if config['weight'] > max_weight:
+            max_weight = config['weight']
+            best_category = category
+    
+    # Only classify if we have a significant match (weight >= 2)
+    if max_weight < 2:
+        return "General Issues"
+    
+    # Map categories to human-readable themes
+    theme_mapping = {
+        'payment_issues': "Payment Delays or Missing Payments After Work Completed",
+        'account_suspension': "Accounts Suspended/Blocked Without Clear Explanation",
+        'support_issues': "Poor Customer Support - Slow Response or No Help",
+        'work_availability': "No Work Available - Empty Queues and Project Instability",
+        'training_issues': "Excessive Unpaid Training and Assessment Requirements",
+        'technical_issues': "Platform Technical Problems and System Bugs",
+        'scam_accusations': "Users Accusing Platform of Being a Scam/Fraud",
+        'privacy_concerns': "Concerns About Personal Data Collection and Privacy"
+    }
+    
+    return theme_mapping.get(best_category, "General Issues")
+
+
+THEME_NAMES = {
+    'payment_issues': "Payment Delays or Missing Payments After Work Completed",
+    'account_suspension': "Accounts Suspended/Blocked Without Clear Explanation",
+    'support_issues': "Poor Customer Support - Slow Response or No Help",
+    'work_availability': "No Work Available - Empty Queues and Project Instability",
+    'training_issues': "Excessive Unpaid Training and Assessment Requirements",
+    'technical_issues': "Platform Technical Problems and System Bugs",
+    'scam_accusations': "Users Accusing Platform of Being a Scam/Fraud",
+    'privacy_concerns': "Concerns About Personal Data Collection and Privacy",
+}
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "OK",
+    "SCAM",
+    # Multiplier: scam weights are doubled, but only when non-zero
+    "This is a scam and a fraud, fake platform stealing money",
+    # Bonus term: 'suspended' adds to payment even with no payment keyword
+    "suspended",
+    "My account was suspended without notice and I was not paid",
+    # Overlapping literals: 'unpaid training' contains 'unpaid', 'paid' and 'training'
+    "unpaid training, then an assessment that was too difficult",
+    "no work available, empty queue, no projects, no tasks",
+    "customer service was poor and support ignored my ticket",
+    "Privacy: they want my ID, identity documents and personal data",
+    "a" * 5000 + " payment delayed",
+    "Ünïcödé réview about payment",
+]
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    """The previous rules as a rule-file configuration: patterns, the scam multiplier and the suspended bonus"""
+    rules = {category: {'keywords': config['keywords'], 'patterns': config['patterns']} for category, config in analyze_review_content('').items()}
+    rules['scam_accusations']['multiplier'] = 2
+    rules['payment_issues']['bonus_terms'] = {'suspended': 3}
+    return ThemeClassifier(rules, THEME_NAMES)
+
+
+@pytest.fixture(scope='module')
+def texts():
+    reviews = pd.read_csv(CSV_PATH, usecols=['reviewText', 'reviewTitle'])
+    return reviews['reviewText'].tolist() + reviews['reviewTitle'].tolist() + EDGE_CASES
+
+
+def test_analyze_matches_the_previous_expert_system(classifier, texts):
+    for text in texts:
+        if isinstance(text, str):
+            assert classifier.analyze(text) == analyze_review_content(text), text
+
+
+def test_classify_matches_the_previous_expert_system(classifier, texts):
+    for text in texts:
+        assert classifier.classify(text) == classify_review_theme(text), text
+
+
+def test_classify_many_and_score_matrix_match_per_review_scoring(classifier, texts):
+    expected = [classify_review_theme(text) for text in texts]
+    assert classifier.classify_many(texts) == expected
+
+    matrix = classifier.score_matrix(texts)
+    for row, text in zip(matrix, texts):
+        weights = analyze_review_content(text) if isinstance(text, str) else {}
+        assert row.tolist() == [weights.get(category, {}).get('weight', 0) for category in classifier.categories], text
+
+
+@pytest.mark.parametrize('text', [None, np.nan, ""])
+def test_missing_text_is_general(classifier, text):
+    assert classifier.classify(text) == GENERAL_THEME
+    assert classifier.classify_many([text]) == [GENERAL_THEME]
+    assert not classifier.score_matrix([text]).any()
+
+
+def test_patterns_that_are_not_literal_chains_still_match(classifier):
+    rules = {'payment_issues': {'keywords': [], 'patterns': [r'pa(y|id)\s+late']}}
+    custom = ThemeClassifier(rules, {'payment_issues': THEME_NAMES['payment_issues']})
+    assert custom.score("They paid   late") == {'payment_issues': 2}
+    assert custom.classify("They paid late") == THEME_NAMES['payment_issues']
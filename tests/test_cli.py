@@ -0,0 +1,37 @@
+"""The batch job precomputes the same artifacts as the warm-up, so the dashboard only loads them"""
+import json
+
+import pandas as pd
+import pytest
+
+from tp_reviews import cli
+from tp_reviews.store import ArtifactStore, enrichment_key
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / 'reviews.csv'
+    pd.DataFrame({
+        'reviewText': ["They never paid me for my tasks", "Great pay and support", "Account suspended without any reason",
+                       "No work available for weeks", "Support never answers my emails"],
+        'reviewTitle': ["Not paid", "Great", "Suspended", "No work", "No answer"],
+        'reviewScore': [1, 5, 1, 2, 1],
+        'reviewLanguage': ['en'] * 5,
+        'reviewUrl': [f"https://example.com/review/{number}" for number in range(5)],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_batch_job_stores_every_dashboard_artifact(tmp_path, csv, monkeypatch):
+    monkeypatch.delenv('TP_REVIEWS_TRANSLATOR', raising=False)
+    store = ArtifactStore(str(tmp_path / 'cache'))
+    summary = tmp_path / 'summary.json'
+    assert cli.main([csv, '--cache-dir', store.directory, '--summary', str(summary)]) == 0
+
+    key = enrichment_key(csv, translator=None)
+    assert store.load(key) is not None
+    for kind in ('cube', 'theme_scores', 'duplicates'):
+        assert store.load(key, kind) is not None, kind
+    for kind in ('pain_points', 'discoveries'):
+        assert store.load_json(key, kind) is not None, kind
+    assert json.loads(summary.read_text()) == store.load_json(key, 'pain_points')
@@ -0,0 +1,86 @@
+"""SqlReviews must answer like the in-memory path: ReviewCube, ReviewIndex.search and review_page over sort_positions"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tp_reviews.browse import BROWSE_COLUMNS, restrict_positions, review_page, sort_positions
+from tp_reviews.cube import CUBE_DIMENSIONS, ReviewCube
+from tp_reviews.database import ReviewDatabase
+from tp_reviews.layout import compact_reviews
+from tp_reviews.search import ReviewIndex
+
+# Enriched frame with a non-default index, a translation, a blank rating,
+# a missing title, tied sort keys and one text longer than a preview
+REVIEWS = compact_reviews(pd.DataFrame({
+    'reviewText': ["They have not paid me for weeks", "Great pay and support", "Paiement en retard, pas encore payé",
+                   "A scam: I was not paid at all", "Tasks dried up, no work available", "Great tasks " * 20,
+                   "Account suspended, support never answered", "Fine"],
+    'reviewTitle': ["Not paid", "Great", None, "Scam", "No work", "Great", "Suspended", ""],
+    'reviewScore': pd.array([1, 5, 2, 1, 2, 5, None, 3], dtype='Int64'),
+    'reviewLanguage': ['en', 'en', 'fr', 'en', 'en', 'en', 'en', 'en'],
+    'reviewUrl': [f"https://example.com/review/{number}" for number in range(8)],
+    'reviewText_en': ["They have not paid me for weeks", "Great pay and support", "Payment late, not paid yet",
+                      "A scam: I was not paid at all", "Tasks dried up, no work available", "Great tasks " * 20,
+                      "Account suspended, support never answered", "Fine"],
+    'sentiment': [-0.5, 0.75, -0.5, -1.0, -0.25, 0.75, -0.5, 0.0],
+    'sentiment_label': ['negative', 'positive', 'negative', 'negative', 'negative', 'positive', 'negative', 'neutral'],
+    'theme': ['payment', 'general', 'payment', 'scam', 'work', 'work', 'account', 'general'],
+}, index=[10, 11, 12, 14, 15, 17, 18, 19]))
+REVIEWS.attrs['fingerprint'] = 'test'
+
+FILTERS = [{}, {'reviewScore': [1, 2]}, {'theme': ['payment', 'scam']}, {'reviewLanguage': ['fr'], 'sentiment_label': ['negative']},
+           {'theme': ['missing']}, {'reviewScore': []}]
+QUERIES = ["", "paid", '"not paid"', "pay*", "paid -scam", "scam OR great", "support", "refund", "-refund"]
+
+
+@pytest.fixture(scope='module')
+def reviews(tmp_path_factory):
+    database = ReviewDatabase(str(tmp_path_factory.mktemp('database') / 'reviews.sqlite'))
+    return database.write(REVIEWS, source='reviews.csv')
+
+
+@pytest.fixture(scope='module')
+def index():
+    return ReviewIndex.from_frame(REVIEWS)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_cube(reviews, filters):
+    expected, cube = ReviewCube.from_frame(REVIEWS).filter(**filters), reviews.cube().filter(**filters)
+    assert cube.count == expected.count
+    for dimension in CUBE_DIMENSIONS:
+        pd.testing.assert_index_equal(pd.Index(cube.labels(dimension)), pd.Index(ReviewCube.from_frame(REVIEWS).labels(dimension)))
+        pd.testing.assert_series_equal(cube.value_counts(dimension, sort_index=True), expected.value_counts(dimension, sort_index=True),
+                                       check_index_type=False)
+    np.testing.assert_allclose(cube.mean_score(), expected.mean_score())
+    np.testing.assert_allclose(cube.mean_sentiment(), expected.mean_sentiment())
+    pd.testing.assert_series_equal(cube.sentiment_histogram(), expected.sentiment_histogram())
+
+
+@pytest.mark.parametrize('query', QUERIES)
+@pytest.mark.parametrize('filters', FILTERS)
+def test_search(reviews, index, query, filters):
+    expected = index.search(query, **filters)
+    assert reviews.positions(query, **filters).tolist() == expected.tolist()
+    assert reviews.count(query, **filters) == len(expected)
+
+
+@pytest.mark.parametrize('sort_by, ascending', [(None, True), ('reviewScore', True), ('reviewScore', False), ('sentiment', True),
+                                                ('reviewTitle', False), ('theme', True)])
+@pytest.mark.parametrize('query, filters', [("", {}), ("paid", {}), ("", {'sentiment_label': ['negative']})])
+def test_pages(reviews, index, sort_by, ascending, query, filters):
+    positions = restrict_positions(sort_positions(REVIEWS, sort_by, ascending), index.search(query, **filters), len(REVIEWS))
+    for page in (1, 2, 3):
+        expected = review_page(REVIEWS, page, 3, positions=positions, columns=BROWSE_COLUMNS)
+        rows = reviews.page(page, 3, query, sort_by, ascending, columns=BROWSE_COLUMNS, **filters)
+        pd.testing.assert_frame_equal(rows, expected, check_dtype=False, check_categorical=False, check_index_type=False)
+
+
+def test_full_rows_and_frame(reviews):
+    rows = reviews.reviews([17, 18, 12])
+    assert rows['reviewText_en'].tolist() == ["Great tasks " * 20, "Account suspended, support never answered", "Payment late, not paid yet"]
+    pd.testing.assert_frame_equal(rows.drop(columns='reviewText_en'), REVIEWS.loc[[17, 18, 12], rows.columns.drop('reviewText_en')],
+                                  check_dtype=False, check_categorical=False)
+    frame = reviews.frame()
+    pd.testing.assert_frame_equal(frame[REVIEWS.columns], REVIEWS, check_categorical=False)
+    assert frame.attrs['fingerprint'] == 'test'
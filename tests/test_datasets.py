@@ -0,0 +1,104 @@
+"""DatasetRefresher serves the last prepared version while a newer one is prepared in the background"""
+import threading
+import time
+
+import pytest
+
+from tp_reviews.datasets import DatasetCache, DatasetRefresher
+
+PATH = 'reviews.csv'
+
+
+class Dataset:
+    """A dataset whose version the test bumps, and whose preparation it can hold or break"""
+
+    def __init__(self):
+        self.version = 1
+        self.release = {}
+        self.broken = set()
+
+    def key_for(self, path):
+        return (path, self.version)
+
+    def prepare(self, cache):
+        def prepare(path, key):
+            if key in self.release:
+                assert self.release[key].wait(5), "preparation was never released"
+            if key in self.broken:
+                raise RuntimeError("broken export")
+            cache.get(key, 'frame', lambda: f"frame {key[1]}")
+        return prepare
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def dataset():
+    return Dataset()
+
+
+@pytest.fixture
+def cache():
+    return DatasetCache()
+
+
+@pytest.fixture
+def refresher(dataset, cache):
+    return DatasetRefresher(cache, dataset.prepare(cache), dataset.key_for)
+
+
+def test_first_version_is_served_as_soon_as_requested(refresher):
+    assert refresher.serve(PATH) == ((PATH, 1), False)
+    wait_for(lambda: refresher.stats()['prepared'] == 1)
+    assert refresher.serve(PATH) == ((PATH, 1), False)
+
+
+def test_stale_version_is_served_while_the_new_one_is_prepared(dataset, cache, refresher):
+    refresher.serve(PATH)
+    wait_for(lambda: refresher.stats()['prepared'] == 1)
+
+    dataset.version = 2
+    dataset.release[(PATH, 2)] = threading.Event()
+    assert refresher.serve(PATH) == ((PATH, 1), True)
+    # Asking again neither queues a second build nor drops the stale version
+    assert refresher.serve(PATH) == ((PATH, 1), True)
+    assert refresher.stats()['pending'] == 1
+    assert cache.get((PATH, 1), 'frame', lambda: None) == "frame 1"
+
+    dataset.release[(PATH, 2)].set()
+    wait_for(lambda: refresher.stats()['prepared'] == 2)
+    assert refresher.serve(PATH) == ((PATH, 2), False)
+    assert refresher.stats()['pending'] == 0
+
+
+def test_evicted_stale_version_is_not_served(dataset, cache, refresher):
+    refresher.serve(PATH)
+    wait_for(lambda: refresher.stats()['prepared'] == 1)
+    dataset.version = 2
+    dataset.release[(PATH, 2)] = threading.Event()
+    cache.max_entries = 1
+    cache.get(('other.csv', 1), 'frame', lambda: "other")
+
+    assert refresher.serve(PATH) == ((PATH, 2), False)
+    dataset.release[(PATH, 2)].set()
+
+
+def test_failed_refresh_keeps_serving_the_stale_version_and_retries(dataset, refresher):
+    refresher.serve(PATH)
+    wait_for(lambda: refresher.stats()['prepared'] == 1)
+
+    dataset.version = 2
+    dataset.broken.add((PATH, 2))
+    assert refresher.serve(PATH) == ((PATH, 1), True)
+    wait_for(lambda: refresher.stats()['failures'] == 1)
+    assert refresher.stats()['pending'] == 0
+
+    dataset.broken.clear()
+    assert refresher.serve(PATH) == ((PATH, 1), True)
+    wait_for(lambda: refresher.stats()['prepared'] == 2)
+    assert refresher.serve(PATH) == ((PATH, 2), False)
@@ -0,0 +1,76 @@
+"""Near-duplicate grouping: copies and close variants share a group, distinct and short reviews do not"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tp_reviews.dedup import BANDS, EMPTY, NUM_PERM, find_duplicates, minhash_signatures, near_duplicate_groups
+from tp_reviews.pain_points import extract_pain_points
+
+NOT_PAID = "The platform never paid me for the tasks I completed last month"
+SUPPORT = "Support closed my ticket without reading it and my account is still locked"
+
+REVIEWS = pd.DataFrame({
+    'reviewText': [
+        NOT_PAID,
+        # Exact copy
+        NOT_PAID,
+        # One word changed: most shingles still shared
+        "The platform never paid me for the tasks I completed last week",
+        SUPPORT,
+        # Too short to judge, even when identical
+        "Great!",
+        "Great!",
+        # Case and punctuation do not matter
+        SUPPORT.upper() + "!!!",
+        # Same opening words, different review
+        "The platform never paid attention to feedback, so I left and found better projects elsewhere",
+        None,
+    ],
+    'sentiment_label': ['negative'] * 9,
+    'theme': ['payment', 'payment', 'payment', 'support', 'general', 'general', 'support', 'payment', 'general'],
+}, index=range(100, 109))
+
+
+def test_find_duplicates():
+    duplicate_of = find_duplicates(REVIEWS)
+    assert duplicate_of.dtype == np.int32
+    assert duplicate_of.tolist() == [0, 0, 0, 3, 4, 5, 3, 7, 8]
+
+
+def test_short_and_missing_texts_have_empty_signatures():
+    signatures = minhash_signatures(REVIEWS['reviewText'].fillna(''))
+    assert signatures.shape == (9, NUM_PERM)
+    assert (signatures[[4, 5, 8]] == EMPTY).all()
+    assert not (signatures[[0, 3, 7]] == EMPTY).any()
+    np.testing.assert_array_equal(signatures[0], signatures[1])
+
+
+def test_groups_close_transitively():
+    # Band b holds columns b, b + BANDS, ...: rewrite whole bands so some band keys still collide
+    rng = np.random.default_rng(0)
+    first = rng.integers(0, EMPTY, size=NUM_PERM, dtype=np.uint32)
+    band_columns = np.arange(NUM_PERM).reshape(-1, BANDS)
+    second, third = first.copy(), first.copy()
+    second[band_columns[:, 0:4].ravel()] = rng.integers(0, EMPTY, size=16, dtype=np.uint32)
+    third[:] = second
+    third[band_columns[:, 4:8].ravel()] = rng.integers(0, EMPTY, size=16, dtype=np.uint32)
+    unrelated = rng.integers(0, EMPTY, size=NUM_PERM, dtype=np.uint32)
+    signatures = np.stack([unrelated, third, second, first, np.full(NUM_PERM, EMPTY, dtype=np.uint32)])
+
+    # 75% of values shared with the next row, 50% with the one after: one group through the middle row
+    assert (signatures[1] == signatures[3]).mean() == 0.5
+    assert near_duplicate_groups(signatures).tolist() == [0, 1, 1, 1, 4]
+    assert near_duplicate_groups(signatures, similarity=0.8).tolist() == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('unique_voices', [False, True])
+def test_pain_points_count_unique_voices(unique_voices):
+    pain_points = extract_pain_points(REVIEWS, n_clusters=None, duplicate_of=find_duplicates(REVIEWS), unique_voices=unique_voices)
+    counts = {theme['theme']: (theme['count'], theme['unique_count'], theme['duplicates']) for theme in pain_points}
+    if unique_voices:
+        # The support theme is one voice posting twice, too few to report
+        assert counts == {'payment': (2, 2, 2), 'general': (3, 3, 0)}
+        assert next(theme for theme in pain_points if theme['theme'] == 'payment')['summary'] == "2 unique users affected (4 reviews)"
+    else:
+        assert counts == {'payment': (4, 2, 2), 'general': (3, 3, 0), 'support': (2, 1, 1)}
+        assert next(theme for theme in pain_points if theme['theme'] == 'support')['summary'] == "2 users affected (1 near-duplicate review)"
@@ -0,0 +1,30 @@
+"""RunRecorder: one record per stage, including stages that fail"""
+import json
+
+import pytest
+
+from tp_reviews.diagnostics import RunRecorder, json_lines
+
+
+def test_stage_records_rows_and_cache_status():
+    recorder = RunRecorder(run_id='run')
+    with recorder.stage('load', cached=True) as info:
+        recorder.cache_miss('load')
+        info['rows'] = 3
+    with recorder.stage('load', rows=3, cached=True):
+        pass
+    assert [(record['stage'], record['rows'], record['cache']) for record in recorder.records] == [('load', 3, 'miss'), ('load', 3, 'hit')]
+    assert all('error' not in record for record in recorder.records)
+    assert [json.loads(line)['run_id'] for line in json_lines(recorder.records).splitlines()] == ['run', 'run']
+
+
+def test_failed_stage_is_recorded():
+    recorder = RunRecorder()
+    with pytest.raises(ValueError, match="broken export"):
+        with recorder.stage('parse', rows=10) as info:
+            info['rows'] = 4
+            raise ValueError("broken export")
+    with recorder.stage('render'):
+        pass
+    assert [(record['stage'], record['rows'], record.get('error')) for record in recorder.records] == [('parse', 4, 'ValueError'),
+                                                                                                      ('render', None, None)]
@@ -0,0 +1,82 @@
+"""load_reviews: chunked loads, blank ratings and the compact layout of the result"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tp_reviews.cube import ReviewCube
+from tp_reviews.ingest import load_reviews
+
+
+def write_reviews(path, reviews):
+    pd.DataFrame(reviews, columns=['reviewText', 'reviewTitle', 'reviewScore', 'reviewLanguage', 'reviewUrl']).to_csv(path, index=False)
+
+
+REVIEWS = [
+    ("Great support, fast payout", "Good", 5, 'en', "https://example.com/review/0"),
+    ("Never paid, total scam", "Scam", 1, 'en', "https://example.com/review/1"),
+    ("Paiement jamais reçu", "Nul", 1, 'fr', "https://example.com/review/2"),
+    ("No rating given here", "Blank", None, 'en', "https://example.com/review/3"),
+    ("Account suspended without reason", "Bad", 2, 'en', "https://example.com/review/4"),
+    ("Works fine", "Fine", 4, 'de', "https://example.com/review/5"),
+    ("Nice tasks", "Nice", 4, 'en', "https://example.com/review/6"),
+]
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 100])
+def test_chunked_load_equals_one_chunk(tmp_path, chunksize):
+    csv = tmp_path / 'reviews.csv'
+    write_reviews(csv, REVIEWS)
+    expected = load_reviews(str(csv), chunksize=100, translator=None)
+    df = load_reviews(str(csv), chunksize=chunksize, translator=None)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.index.tolist() == [0, 1, 3, 4, 6]
+    assert isinstance(df['theme'].dtype, pd.CategoricalDtype)
+
+
+def test_blank_rating_is_kept_as_missing(tmp_path):
+    csv = tmp_path / 'reviews.csv'
+    write_reviews(csv, REVIEWS)
+    df = load_reviews(str(csv), chunksize=2, translator=None)
+    assert df['reviewScore'].dtype == 'Int8'
+    assert df['reviewScore'].isna().tolist() == [False, False, True, False, False]
+
+    cube = ReviewCube.from_frame(df)
+    assert cube.count == 5
+    assert cube.labels('reviewScore') == [1, 2, 4, 5]
+    assert cube.mean_score() == np.mean([5, 1, 2, 4])
+
+
+class Progress:
+    """Counts the rows each stage reports"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def __call__(self, stage, chunk_index, rows):
+        self.rows[stage] = self.rows.get(stage, 0) + rows
+
+
+@pytest.mark.parametrize('chunksize', [2, 100])
+def test_incremental_refresh_equals_full_rebuild(tmp_path, chunksize):
+    csv = tmp_path / 'reviews.csv'
+    write_reviews(csv, REVIEWS)
+    previous = load_reviews(str(csv), chunksize=chunksize, translator=None)
+
+    edited = [list(review) for review in REVIEWS]
+    # Changed text and changed rating under the same reviewUrl
+    edited[1][0] = "Paid after all, great support"
+    edited[4][2] = 3
+    # Removed review, and new ones, one at the front
+    del edited[6]
+    edited.insert(0, ["Fake reviews everywhere, scam", "Scam", 1, 'en', "https://example.com/review/7"])
+    edited.append(["Love the flexible hours", "Love", 5, 'en', "https://example.com/review/8"])
+    write_reviews(csv, edited)
+
+    progress = Progress()
+    refreshed = load_reviews(str(csv), chunksize=chunksize, translator=None, previous=previous, progress=progress)
+    rebuilt = load_reviews(str(csv), chunksize=chunksize, translator=None)
+    pd.testing.assert_frame_equal(refreshed, rebuilt)
+    assert refreshed['reviewUrl'].str.rsplit('/', n=1).str[-1].tolist() == ['7', '0', '1', '3', '4', '8']
+    # Only the two new and the two edited reviews were scored again
+    assert progress.rows['reused'] == 2
+    assert progress.rows['scored'] == 4
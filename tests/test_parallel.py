@@ -0,0 +1,48 @@
+"""ParallelScorer must give exactly the serial results, and refuse to score outside its pool"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tp_reviews.classifier import current_classifier
+from tp_reviews.parallel import ParallelScorer
+from tp_reviews.sentiment import Lexicon, current_lexicon, score_sentiment
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Trustpilot reviews extraction - Data.csv')
+
+
+@pytest.fixture(scope='module')
+def texts():
+    reviews = pd.read_csv(CSV_PATH, usecols=['reviewText'])
+    # A non-default index, to check rows come back aligned
+    return pd.Series(reviews['reviewText'].tolist() + [None, "", "great"], dtype=object).iloc[::-1]
+
+
+def test_parallel_scores_equal_serial_scores(texts):
+    classifier, lexicon = current_classifier(), current_lexicon()
+    with ParallelScorer(workers=2, classifier=classifier, lexicon=lexicon) as scorer:
+        sentiment, themes = scorer.score(texts, classifier, lexicon)
+        empty_sentiment, empty_themes = scorer.score(texts.iloc[:0])
+
+    expected = score_sentiment(texts, lexicon=lexicon)
+    np.testing.assert_array_equal(sentiment.to_numpy(), expected.to_numpy())
+    assert sentiment.index.equals(texts.index)
+    assert themes == classifier.classify_many(texts)
+    assert empty_sentiment.empty and empty_themes == []
+
+
+def test_score_outside_the_context_manager_fails():
+    scorer = ParallelScorer(workers=2)
+    with pytest.raises(RuntimeError, match="context manager"):
+        scorer.score(pd.Series(["great"]))
+    with scorer:
+        pass
+    with pytest.raises(RuntimeError, match="context manager"):
+        scorer.score(pd.Series(["great"]))
+
+
+def test_rules_other_than_the_pools_are_refused():
+    with ParallelScorer(workers=1) as scorer:
+        with pytest.raises(ValueError, match="other rules"):
+            scorer.score(pd.Series(["great"]), lexicon=Lexicon(['great'], ['bad']))
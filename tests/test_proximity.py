@@ -0,0 +1,132 @@
+"""Proximity rules: WordPositions / match_within, and the theme changes the v2 rule file makes on purpose"""
+import itertools
+import random
+import time
+from collections import Counter
+
+import pandas as pd
+import pytest
+from test_classifier_parity import CSV_PATH, THEME_NAMES, classify_review_theme
+
+from tp_reviews.classifier import GENERAL_THEME, PROXIMITY_WINDOW, ThemeClassifier, WordPositions, match_within, proximity_terms
+from tp_reviews.rules import DEFAULT_RULES_PATH, read_rules
+from tp_reviews.search import tokenize
+
+
+def within(text, words, window=PROXIMITY_WINDOW):
+    return match_within(WordPositions(text.lower()), proximity_terms(words), window)
+
+
+def brute_force(text, words, window):
+    """Any in-order choice of positions, one per word, spanning fewer than ``window`` words"""
+    tokens = tokenize(text)
+    terms = proximity_terms(words)
+    candidates = [[position for position, token in enumerate(tokens) if (token.startswith(word) if prefix else token == word)]
+                  for word, prefix in terms]
+    return any(all(a < b for a, b in zip(chosen, chosen[1:])) and chosen[-1] - chosen[0] < window
+               for chosen in itertools.product(*candidates))
+
+
+@pytest.mark.parametrize('text, words, expected', [
+    ("I was not paid", ['not', 'paid'], True),
+    # In order only
+    ("paid, not", ['not', 'paid'], False),
+    ("No more work available today", ['no', 'work*', 'available*'], True),
+    ("Work is available, no", ['no', 'work*', 'available*'], False),
+    # Prefixes match any word starting with them, exact words only themselves
+    ("no payments at all", ['no', 'pay*'], True),
+    ("no repay", ['no', 'pay*'], False),
+    ("not paidout", ['not', 'paid'], False),
+    # Punctuation and case do not matter
+    ("EMPTY... Queues!", ['empty*', 'queue*'], True),
+])
+def test_in_order_matching(text, words, expected):
+    assert within(text, words) is expected
+
+
+def test_window_bound():
+    gap = ' '.join(['x'] * (PROXIMITY_WINDOW - 2))
+    # First and last word PROXIMITY_WINDOW - 1 apart: inside the window; one more word and it is not
+    assert within(f"not {gap} paid", ['not', 'paid'])
+    assert not within(f"not {gap} x paid", ['not', 'paid'])
+    assert within("a b c d", ['a', 'd'], window=4)
+    assert not within("a b c d", ['a', 'd'], window=3)
+
+
+def test_repeated_words():
+    # One occurrence cannot stand for two steps of the rule
+    assert not within("not", ['not', 'not'])
+    assert within("not not", ['not', 'not'])
+    assert not within("no work", ['no', 'work', 'no'])
+    assert within("no work no", ['no', 'work', 'no'])
+    # The latest start of a partial match is kept: an early, too distant 'not' does not hide a later one
+    far = ' '.join(['x'] * PROXIMITY_WINDOW)
+    assert within(f"not {far} not paid", ['not', 'paid'])
+    assert within(f"not {far} not x paid", ['not', 'not', 'paid'], window=PROXIMITY_WINDOW * 2)
+
+
+def test_matches_brute_force_on_random_texts():
+    rng = random.Random(0)
+    vocabulary = ['no', 'not', 'work', 'working', 'pay', 'paid', 'x']
+    rules = [['no', 'work*'], ['not', 'paid'], ['no', 'no'], ['pay*', 'no', 'pay*'], ['work*', 'x', 'work*', 'no']]
+    for _ in range(3000):
+        text = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 14)))
+        words, window = rng.choice(rules), rng.randint(1, 8)
+        assert within(text, words, window) == brute_force(text, words, window), (text, words, window)
+
+
+def test_no_backtracking_on_adversarial_input():
+    # Every 'a' starts a partial match that never completes; a backtracking
+    # matcher (like the regex a.*a.*a.*b) tries each combination of them
+    text = ' '.join(['a'] * 20_000) + ' ' + ' '.join(['x'] * PROXIMITY_WINDOW) + ' b'
+    start = time.perf_counter()
+    assert not within(text, ['a', 'a', 'a', 'b'])
+    assert time.perf_counter() - start < 1
+
+
+# Theme changes of the bundled rule file (version 2, which adds proximity
+# rules) against the expert system it replaced, over the English reviews of
+# the bundled CSV: (before, after) -> number of reviews. Any other change is
+# unintended.
+SHORT_NAMES = {name: category for category, name in THEME_NAMES.items()} | {GENERAL_THEME: 'general'}
+INTENDED_THEME_CHANGES = {
+    ('account_suspension', 'payment_issues'): 1,
+    ('privacy_concerns', 'scam_accusations'): 1,
+    ('training_issues', 'work_availability'): 1,
+    ('work_availability', 'account_suspension'): 1,
+    ('work_availability', 'privacy_concerns'): 4,
+    ('work_availability', 'training_issues'): 5,
+    ('work_availability', 'general'): 4,
+    ('work_availability', 'payment_issues'): 33,
+    ('work_availability', 'technical_issues'): 4,
+    ('work_availability', 'support_issues'): 3,
+    ('work_availability', 'scam_accusations'): 9,
+    ('payment_issues', 'privacy_concerns'): 1,
+    ('payment_issues', 'training_issues'): 1,
+    ('payment_issues', 'general'): 3,
+    ('payment_issues', 'work_availability'): 10,
+    ('payment_issues', 'support_issues'): 2,
+    ('payment_issues', 'scam_accusations'): 10,
+    ('support_issues', 'privacy_concerns'): 2,
+    ('support_issues', 'work_availability'): 2,
+    ('support_issues', 'payment_issues'): 1,
+    ('support_issues', 'scam_accusations'): 1,
+    ('scam_accusations', 'privacy_concerns'): 3,
+    ('scam_accusations', 'work_availability'): 5,
+    ('scam_accusations', 'payment_issues'): 6,
+    ('scam_accusations', 'support_issues'): 1,
+}
+
+
+def test_rule_file_changes_only_the_intended_themes():
+    config = read_rules(DEFAULT_RULES_PATH)
+    assert config['version'] == 2
+    classifier = ThemeClassifier.from_config(config['themes'])
+    reviews = pd.read_csv(CSV_PATH, usecols=['reviewText', 'reviewLanguage'])
+    texts = reviews.loc[reviews['reviewLanguage'] == 'en', 'reviewText'].tolist()
+
+    after = classifier.classify_many(texts)
+    before = [classify_review_theme(text) for text in texts]
+    changes = Counter((SHORT_NAMES[old], SHORT_NAMES[new]) for old, new in zip(before, after) if old != new)
+    assert dict(changes) == INTENDED_THEME_CHANGES
+    assert sum(changes.values()) == 114
@@ -0,0 +1,91 @@
+"""Query parsing and ReviewIndex lookups"""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tp_reviews import search
+from tp_reviews.search import ReviewIndex, parse_query
+
+REVIEWS = pd.DataFrame({
+    'reviewTitle': ["Not paid", "Great", None, "Scam", ""],
+    'reviewText': ["They have not paid me for weeks", "Great pay and support", "Payment was late, not paid yet",
+                   "A scam: I was not paid at all", ""],
+    'reviewScore': [1, 5, 2, 1, 3],
+    'theme': ['payment', 'general', 'payment', 'scam', 'general'],
+})
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("", []),
+    ("   ", []),
+    ("refund", [[(False, 'term', 'refund')]]),
+    ("Refund pay*", [[(False, 'term', 'refund'), (False, 'prefix', 'pay')]]),
+    ('"not paid"', [[(False, 'phrase', ['not', 'paid'])]]),
+    ('"Paid"', [[(False, 'term', 'paid')]]),
+    ('refund -survey', [[(False, 'term', 'refund'), (True, 'term', 'survey')]]),
+    ('NOT survey -"not paid"', [[(True, 'term', 'survey'), (True, 'phrase', ['not', 'paid'])]]),
+    ('refund OR scam', [[(False, 'term', 'refund')], [(False, 'term', 'scam')]]),
+    # Punctuation splits a bare word into terms that must all match; lone symbols are dropped
+    ('e-mail - ""', [[(False, 'term', 'e'), (False, 'term', 'mail')]]),
+    ('OR refund OR', [[(False, 'term', 'refund')]]),
+])
+def test_parse_query(query, expected):
+    assert parse_query(query) == expected
+
+
+@pytest.fixture(scope='module')
+def index():
+    return ReviewIndex.from_frame(REVIEWS, ['reviewScore', 'theme'])
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("", [0, 1, 2, 3, 4]),
+    ("paid", [0, 2, 3]),
+    ("PAID weeks", [0]),
+    ("pay*", [1, 2]),
+    ("pa*", [0, 1, 2, 3]),
+    ('"not paid"', [0, 2, 3]),
+    ('"was not paid"', [3]),
+    # Phrases match across punctuation, not across missing words
+    ('"late not paid"', [2]),
+    ('"paid not"', []),
+    ("paid -scam", [0, 2]),
+    ('paid -"not paid"', []),
+    ("scam OR great", [1, 3]),
+    ("refund", []),
+    ("refund OR scam", [3]),
+    ("-refund", [0, 1, 2, 3, 4]),
+])
+def test_search(index, query, expected):
+    assert index.search(query).tolist() == expected
+
+
+def test_search_with_facet_filters(index):
+    assert index.search('paid', reviewScore=[1]).tolist() == [0, 3]
+    assert index.search(theme=['general']).tolist() == [1, 4]
+    assert index.search('paid', theme=['missing']).tolist() == []
+    assert index.search('paid', theme=[]).tolist() == [0, 2, 3]
+
+
+def test_term_not_in_index_and_wordless_segments(monkeypatch):
+    # One review per segment: the empty ones hold no terms at all
+    monkeypatch.setattr(search, 'INDEX_CHUNK_ROWS', 1)
+    index = ReviewIndex(["", "good pay", "  ", "!!", "good"])
+    assert [len(keys) for keys, _, _ in index.segments] == [0, 3, 0, 0, 1]
+    assert index.search("good").tolist() == [1, 4]
+    assert index.search("missing").tolist() == []
+    assert index.search("missing*").tolist() == []
+    assert index.search('"good pay"').tolist() == [1]
+    assert index.postings(["good", "missing", "good pay"]).tolist() == [1, 4]
+
+
+def test_index_reads_phrases_from_the_frame_instead_of_copying_texts(index):
+    assert not isinstance(index.texts, np.ndarray)
+    assert index.texts[[2]].tolist() == ["\nPayment was late, not paid yet"]
+
+
+def test_index_cannot_be_pickled(index):
+    with pytest.raises(TypeError, match="per-process hash"):
+        pickle.dumps(index)
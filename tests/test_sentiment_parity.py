@@ -0,0 +1,105 @@
+"""score_sentiment against simple_sentiment_analysis applied row by row, which it must reproduce exactly"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from tp_reviews import sentiment
+from tp_reviews.sentiment import Lexicon, current_lexicon, score_sentiment, simple_sentiment_analysis
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Trustpilot reviews extraction - Data.csv')
+
+EDGE_CASES = [
+    None,
+    np.nan,
+    "",
+    "   ",
+    "good",
+    "GOOD Great gReAt",
+    # Substrings count outside word_boundary mode: 'dislike' also contains 'like'
+    "I dislike it, goodgood, badly",
+    # A word split across a row boundary must not match
+    "goo",
+    "d service",
+    # Words longer than eight bytes, at the very start and end of a text
+    "disappointed",
+    "recommend outstanding disappointed",
+    # Control characters: \x1c-\x1f split words in str.split(), \x00-\x08 and \x0e-\x1b do not.
+    # Thirty filler tokens keep the scores off the clipping bounds, so word counts show
+    "good " + " ".join(["a\x1cb\x1dc\x1ed\x1fe"] * 30),
+    "good " + " ".join(["a\x00b\x08c\x0ed\x1be"] * 30),
+    "awful\t\n\x0b\x0c\r" + "\r\n".join(["word"] * 30),
+    # Non-ASCII whitespace (NBSP, NEL, ideographic space, line separator) splits words too
+    "great " + " ".join(["a\xa0b\x85c\u3000d\u2028e"] * 30),
+    "good\xa0bad\x85great\u3000worst\u2028love hate fake",
+    # Non-ASCII letters next to words, for word_boundary
+    "égood goodé naïve très bien, «terrible» 👍great👎",
+    "Ünïcödé réview: amazing™ support, awful…",
+    # Characters whose lowercase is ASCII: U+0130 (capital I with dot) and the Kelvin sign
+    "L\u0130KE the scam, TAX\u0130 ride " + " ".join(["word"] * 30),
+    "\u212aind of fa\u212ae " + " ".join(["word"] * 30),
+    "I li\u212ae it " + " ".join(["word"] * 30),
+    "a" * 5000 + " useless",
+]
+
+
+@pytest.fixture(scope='module')
+def texts():
+    reviews = pd.read_csv(CSV_PATH, usecols=['reviewText', 'reviewTitle'])
+    return pd.Series(reviews['reviewText'].tolist() + reviews['reviewTitle'].tolist() + EDGE_CASES, dtype=object)
+
+
+def expected_scores(texts, word_boundary, lexicon=None):
+    # A missing review scores like an empty one ('nan' is not a lexicon word either)
+    return np.array([simple_sentiment_analysis(text, word_boundary, lexicon) for text in texts], dtype=np.float64)
+
+
+def as_dtype(texts, dtype):
+    if dtype == 'object':
+        return texts
+    if dtype == 'large_string':
+        return texts.astype(pd.ArrowDtype(pa.large_string()))
+    return texts.astype(dtype)
+
+
+@pytest.mark.parametrize('dtype', ['object', 'string[pyarrow]', 'large_string'])
+@pytest.mark.parametrize('word_boundary', [False, True])
+def test_score_sentiment_matches_row_by_row_scoring(texts, word_boundary, dtype):
+    scores = score_sentiment(as_dtype(texts, dtype), word_boundary=word_boundary)
+    np.testing.assert_array_equal(scores.to_numpy(), expected_scores(texts, word_boundary))
+    assert scores.index.equals(texts.index)
+
+
+@pytest.mark.parametrize('word_boundary', [False, True])
+def test_block_boundaries_and_sliced_input(texts, word_boundary, monkeypatch):
+    # Tiny blocks put rows of every kind at the start and end of a scanned block
+    monkeypatch.setattr(sentiment, 'SCAN_ROWS', 7)
+    expected = expected_scores(texts, word_boundary)
+    np.testing.assert_array_equal(score_sentiment(texts, word_boundary).to_numpy(), expected)
+    sliced = as_dtype(texts, 'string[pyarrow]').iloc[3:]
+    np.testing.assert_array_equal(score_sentiment(sliced, word_boundary).to_numpy(), expected[3:])
+
+
+@pytest.mark.parametrize('word_boundary', [False, True])
+def test_lexicons_the_scanner_does_not_accept_are_scored_in_python(texts, word_boundary):
+    lexicon = Lexicon(['génial', 'ok', 'great'], ['nul', 'bad'])
+    assert lexicon.scanner is None
+    np.testing.assert_array_equal(score_sentiment(texts, word_boundary, lexicon).to_numpy(), expected_scores(texts, word_boundary, lexicon))
+
+
+@pytest.mark.parametrize('word_boundary', [False, True])
+def test_words_sharing_table_entries(texts, word_boundary):
+    # Prefixes of each other share the windows they are looked up by
+    lexicon = Lexicon(['taxi', 'hat', 'hate', 'hated', 'the', 'then', 'there', 'goo', 'good', 'goods'], ['app', 'apps', 'apple', 'bad', 'badly'])
+    assert lexicon.scanner is not None
+    np.testing.assert_array_equal(score_sentiment(texts, word_boundary, lexicon).to_numpy(), expected_scores(texts, word_boundary, lexicon))
+
+
+def test_lexicon_pickles_without_its_table():
+    lexicon = current_lexicon()
+    copy = pickle.loads(pickle.dumps(lexicon))
+    assert len(pickle.dumps(lexicon)) < 100_000
+    np.testing.assert_array_equal(copy.scanner.slot_starts, lexicon.scanner.slot_starts)
@@ -0,0 +1,69 @@
+"""ArtifactStore manifest: concurrent recording and the cleanup of superseded artifacts"""
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from tp_reviews.store import ArtifactStore, scoring_versions
+
+FRAME = pd.DataFrame({'value': [1, 2, 3]})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'cache'))
+
+
+def stored_keys(store):
+    names = [name for name in os.listdir(store.directory) if name.endswith(('.feather', '.json')) and name != 'manifest.json']
+    return sorted({name.rsplit('-', 1)[1].split('.')[0] for name in names})
+
+
+def test_concurrent_records_are_all_kept(store):
+    versions = scoring_versions()
+    barrier = threading.Barrier(8)
+
+    def record(number):
+        barrier.wait()
+        for round_number in range(10):
+            store.save(f"key{number}r{round_number}", FRAME, source=f"source{number}.csv", versions=versions)
+
+    threads = [threading.Thread(target=record, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    manifest = store._read_manifest()
+    assert sorted(entry['key'] for entry in manifest.values()) == sorted(f"key{number}r9" for number in range(8))
+    assert stored_keys(store) == sorted(f"key{number}r9" for number in range(8))
+
+
+def test_artifacts_of_superseded_keys_are_swept(store):
+    store.save('old', FRAME, source='reviews.csv')
+    store.save('old', FRAME, 'cube')
+    store.save_json('old', {'themes': []}, 'discoveries')
+    store.save('new', FRAME, source='reviews.csv')
+    assert stored_keys(store) == ['new']
+
+    # A session still showing the old version derives its summaries again; they are not stored
+    assert store.save('old', FRAME, 'cube') is None
+    assert store.save_json('old', {'themes': []}, 'pain_points') is None
+    assert stored_keys(store) == ['new']
+
+    # Written anyway, e.g. by a build that started before the key was replaced: swept on the next record
+    store._write_atomic(store.path_for('old', 'theme_scores'), lambda tmp_path: FRAME.to_feather(tmp_path))
+    store.save('newer', FRAME, source='reviews.csv')
+    assert stored_keys(store) == ['newer']
+    assert store._read_manifest()[f"enriched:{os.path.abspath('reviews.csv')}"]['superseded'] == ['new', 'old']
+
+
+def test_key_shared_with_another_source_is_kept(store):
+    store.save('shared', FRAME, source='a.csv')
+    store.save('shared', FRAME, source='b.csv')
+    store.save('shared', FRAME, 'cube')
+    store.save('fresh', FRAME, source='a.csv')
+
+    assert stored_keys(store) == ['fresh', 'shared']
+    assert store.save('shared', FRAME, 'cube') is not None
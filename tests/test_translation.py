@@ -0,0 +1,56 @@
+"""Translation failures must not be persisted as if the reviews had been translated"""
+import pandas as pd
+
+from tp_reviews.layout import english_text
+from tp_reviews.pipeline import load_enriched
+from tp_reviews.store import ArtifactStore, enrichment_key
+
+
+class FlakyTranslator:
+    """Fails every batch while ``failing`` is set, otherwise prefixes the text"""
+
+    name = 'flaky'
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    async def translate_batch(self, texts, source, target):
+        if self.failing:
+            raise RuntimeError("translation backend unavailable")
+        return [f"EN {text}" for text in texts]
+
+
+def write_reviews(path):
+    pd.DataFrame({
+        'reviewText': ["Great support", "Paiement jamais reçu", "Cuenta suspendida sin motivo", "Fast payout"],
+        'reviewTitle': ["Good", "Nul", "Malo", "Nice"],
+        'reviewScore': [5, 1, 1, 4],
+        'reviewLanguage': ['en', 'fr', 'es', 'en'],
+        'reviewUrl': [f"https://example.com/review/{number}" for number in range(4)],
+    }).to_csv(path, index=False)
+
+
+def test_failed_translations_are_retried_on_the_next_load(tmp_path):
+    csv = tmp_path / 'reviews.csv'
+    write_reviews(csv)
+    store = ArtifactStore(str(tmp_path / 'cache'))
+
+    failed = load_enriched(str(csv), store, translator=FlakyTranslator(failing=True))
+    assert english_text(failed).tolist() == pd.read_csv(csv)['reviewText'].tolist()
+
+    working = FlakyTranslator(failing=False)
+    df = load_enriched(str(csv), store, translator=working)
+    assert english_text(df).tolist() == ["Great support", "EN Paiement jamais reçu", "EN Cuenta suspendida sin motivo", "Fast payout"]
+    assert df.attrs['fingerprint'] == enrichment_key(str(csv), translator=working)
+    assert store.load(df.attrs['fingerprint']) is not None
+
+
+def test_failed_translations_are_not_stored_under_the_full_key(tmp_path):
+    csv = tmp_path / 'reviews.csv'
+    write_reviews(csv)
+    store = ArtifactStore(str(tmp_path / 'cache'))
+    translator = FlakyTranslator(failing=True)
+
+    df = load_enriched(str(csv), store, translator=translator)
+    assert df.attrs['fingerprint'] != enrichment_key(str(csv), translator=translator)
+    assert store.load(enrichment_key(str(csv), translator=translator)) is None
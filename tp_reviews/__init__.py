@@ -0,0 +1,21 @@
+"""Review analysis core shared by the dashboard and offline jobs"""
+from .browse import BROWSE_COLUMNS, DEFAULT_BROWSE_COLUMNS, PAGE_SIZES, TEXT_COLUMNS, page_count, restrict_positions, review_page, sort_positions, truncate_text
+from .classifier import GENERAL_THEME, PROXIMITY_WINDOW, ThemeClassifier, WordPositions, analyze_review_content, classify_review_theme, current_classifier, match_within, proximity_terms
+from .cube import CUBE_DIMENSIONS, SENTIMENT_BINS, SENTIMENT_HISTOGRAM, ReviewCube, sentiment_bins
+from .database import BACKENDS, DATABASE_PATH, REVIEW_BACKEND, REVIEW_DATABASE, ReviewDatabase, SqlReviews
+from .datasets import DATASET_CACHE_BYTES, DatasetCache, DatasetRefresher, artifact_bytes, dataset_version, load_registry
+from .dedup import SIMILARITY, find_duplicates, minhash_signatures, near_duplicate_groups
+from .diagnostics import RunRecorder, current_rss_mb, json_lines, process_seconds
+from .discovery import N_FEATURES, STOP_WORDS, discover_themes, discovery_buckets, hashed_term_matrix, minibatch_kmeans, ngrams
+from .ingest import DERIVED_COLUMNS, REVIEW_DTYPES, RULE_COLUMNS, count_reviews, enrich_reviews, iter_enriched_chunks, load_reviews, row_hashes
+from .insights import get_actionable_insights, get_theme_summary
+from .layout import CATEGORICAL_COLUMNS, NARROW_DTYPES, compact_reviews, concat_compact, english_text, frame_bytes, layout_report, legacy_layout
+from .pain_points import extract_pain_points
+from .parallel import ParallelScorer
+from .pipeline import load_cube, load_database, load_discoveries, load_duplicates, load_enriched, load_pain_points, load_theme_matrix
+from .rules import DEFAULT_RULES_PATH, RULES, RULES_PATH, RuleWatcher, read_rules, section_hash
+from .search import FACET_COLUMNS, ReviewIndex, parse_query, tokenize
+from .sentiment import Lexicon, current_lexicon, label_sentiment, score_sentiment, simple_sentiment_analysis
+from .store import ARTIFACT_FORMATS, ARTIFACT_STORE, TRANSLATION_STORE, ArtifactStore, TranslationStore, combined_version, enrichment_key, file_digest, scoring_version, scoring_versions
+from .theme_matrix import ThemeMatrix
+from .translation import TRANSLATOR, TRANSLATORS, GoogleTranslator, PassthroughTranslator, get_translator, translate_reviews, translation_key
@@ -0,0 +1,256 @@
+"""Read-only HTTP JSON API over the precomputed pain points and aggregate cube.
+
+Usage::
+
+    python -m tp_reviews.api --port 8502
+
+Routes::
+
+    GET /datasets                             registered dataset names
+    GET /datasets/<name>/distributions        rating, sentiment, theme and language counts
+                                              (filter with ?reviewScore=1&theme=...)
+    GET /datasets/<name>/pain-points          pain point themes with their summary and
+                                              actionable insights (?unique_voices=1)
+
+Answers come from the artifact store the dashboard and the batch job
+write, computing and storing them only when missing. Each response
+carries an ETag derived from the dataset's fingerprint (its CSV contents
+and rule versions) and the request, so polling clients sending
+``If-None-Match`` get an empty 304 until the data or the rules change.
+Encoded bodies are cached per dataset version and gzipped for clients
+that accept it.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+from .cube import CUBE_DIMENSIONS, ReviewCube
+from .datasets import DATASETS_PATH, DatasetCache, dataset_version, load_registry
+from .insights import get_theme_summary
+from .pipeline import load_cube, load_enriched, load_pain_points
+from .store import ARTIFACT_STORE, DEFAULT_CACHE_DIR, ArtifactStore, enrichment_key, scoring_version
+from .translation import TRANSLATOR
+
+logger = logging.getLogger(__name__)
+
+# Smaller bodies are sent as they are: gzip would barely shrink them
+GZIP_MIN_BYTES = 512
+
+
+class ApiError(Exception):
+    """A request the API answers with an error status and a JSON message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_safe(value):
+    """NaN means (of an empty selection) as null, which JSON can represent"""
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _counts(cube, dimension):
+    return [{'value': _json_safe(value.item() if hasattr(value, 'item') else value), 'count': int(count)}
+            for value, count in cube.value_counts(dimension, sort_index=dimension == 'reviewScore').items()]
+
+
+def _accepts_gzip(accept_encoding):
+    for coding in (accept_encoding or '').split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _etag_matches(if_none_match, etag):
+    """Weak comparison of ``If-None-Match`` against a resource's ETag, in any of its encodings"""
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        tag = tag[2:] if tag.startswith('W/') else tag
+        if tag.removesuffix('-gzip"').rstrip('"') == etag.rstrip('"'):
+            return True
+    return False
+
+
+class ReviewApi:
+    """Answers API requests for the registered datasets.
+
+    Datasets, their fingerprints and encoded responses live in a
+    ``DatasetCache`` keyed like the dashboard's, by the CSV's mtime and
+    size and the current rule versions, so a replaced file or an edited
+    rule file is picked up by the next request.
+    """
+
+    def __init__(self, registry=None, store=ARTIFACT_STORE, cache=None, translator=TRANSLATOR):
+        self.registry = load_registry() if registry is None else registry
+        self.store = store
+        self.cache = cache or DatasetCache()
+        self.translator = translator
+
+    def _dataset(self, name):
+        """(cache key, fingerprint) of a registered dataset"""
+        if name not in self.registry:
+            raise ApiError(404, f"Unknown dataset: {name}")
+        path = self.registry[name]
+        key = dataset_version(path) + (scoring_version(translator=self.translator),)
+        return key, self.cache.get(key, 'fingerprint', lambda: enrichment_key(path, translator=self.translator))
+
+    def _enriched(self, name, key):
+        """The enriched frame, only needed when a summary is not in the store yet"""
+        return self.cache.get(key, 'load_and_translate', lambda: load_enriched(self.registry[name], self.store, translator=self.translator))
+
+    def distributions(self, name, key, fingerprint, filters):
+        cells = self.store.load(fingerprint, 'cube')
+        cube = ReviewCube(cells) if cells is not None else load_cube(self._enriched(name, key), self.store)
+        criteria = {}
+        for dimension, values in filters.items():
+            # Query strings carry text; match the values against the cube's own labels
+            labels = {str(label): label for label in cube.labels(dimension)}
+            criteria[dimension] = [labels.get(value, value) for value in values]
+        view = cube.filter(**criteria)
+        return {
+            'count': view.count,
+            'mean_score': _json_safe(view.mean_score()),
+            'mean_sentiment': _json_safe(view.mean_sentiment()),
+            'ratings': _counts(view, 'reviewScore'),
+            'sentiment': _counts(view, 'sentiment_label'),
+            'themes': _counts(view, 'theme'),
+            'languages': _counts(view, 'reviewLanguage'),
+        }
+
+    def pain_points(self, name, key, fingerprint, unique_voices):
+        kind = 'pain_points_unique' if unique_voices else 'pain_points'
+        pain_points = self.store.load_json(fingerprint, kind)
+        if pain_points is None:
+            pain_points = load_pain_points(self._enriched(name, key), self.store, unique_voices=unique_voices)
+        return [{**theme, 'theme_summary': get_theme_summary(theme['theme'])} for theme in pain_points]
+
+    def _route(self, path, params):
+        """(dataset name or None, canonical query, payload builder) for a request"""
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['datasets']:
+            return None, '', lambda key, fingerprint: {'datasets': sorted(self.registry)}
+        if len(parts) == 3 and parts[0] == 'datasets':
+            name, resource = parts[1], parts[2]
+            if resource == 'distributions':
+                unknown = sorted(set(params) - set(CUBE_DIMENSIONS))
+                if unknown:
+                    raise ApiError(400, f"Unknown filter: {', '.join(unknown)}; filter by {', '.join(CUBE_DIMENSIONS)}")
+                filters = {dimension: sorted(params[dimension]) for dimension in CUBE_DIMENSIONS if dimension in params}
+                return name, urlencode(filters, doseq=True), lambda key, fingerprint: self.distributions(name, key, fingerprint, filters)
+            if resource == 'pain-points':
+                unique_voices = params.get('unique_voices', ['0'])[-1].lower() in ('1', 'true', 'yes')
+                return (name, f'unique_voices={int(unique_voices)}',
+                        lambda key, fingerprint: self.pain_points(name, key, fingerprint, unique_voices))
+        raise ApiError(404, f"No such resource: {path}")
+
+    def respond(self, target, headers):
+        """``(status, headers, body)`` answering a GET of ``target`` (path and query string)"""
+        url = urlsplit(target)
+        try:
+            name, query, build = self._route(url.path, parse_qs(url.query))
+            if name is None:
+                key, fingerprint = ('registry',), hashlib.sha1(json.dumps(sorted(self.registry.items())).encode()).hexdigest()
+            else:
+                key, fingerprint = self._dataset(name)
+        except ApiError as error:
+            body = json.dumps({'error': str(error)}).encode()
+            return error.status, {'Content-Type': 'application/json; charset=utf-8', 'Content-Length': str(len(body))}, body
+
+        resource = f"{url.path}?{query}"
+        etag = '"' + hashlib.sha1(f"{fingerprint}:{resource}".encode()).hexdigest()[:32] + '"'
+        gzipped = _accepts_gzip(headers.get('Accept-Encoding'))
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if _etag_matches(headers.get('If-None-Match'), etag):
+            if gzipped:
+                response_headers['ETag'] = etag[:-1] + '-gzip"'
+            return 304, response_headers, b''
+
+        def encode():
+            body = json.dumps(build(key, fingerprint), default=str).encode()
+            return body, gzip.compress(body, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        body, compressed = self.cache.get(key, ('response', resource), encode)
+        if gzipped and compressed is not None:
+            body = compressed
+            response_headers.update({'Content-Encoding': 'gzip', 'ETag': etag[:-1] + '-gzip"'})
+        response_headers.update({'Content-Type': 'application/json; charset=utf-8', 'Content-Length': str(len(body))})
+        return 200, response_headers, body
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Serves GET and HEAD through the server's ``ReviewApi``"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._answer(send_body=True)
+
+    def do_HEAD(self):
+        self._answer(send_body=False)
+
+    def _answer(self, send_body):
+        try:
+            status, headers, body = self.server.api.respond(self.path, self.headers)
+        except Exception:
+            logger.exception("failed to answer %s", self.path)
+            status, body = 500, json.dumps({'error': "Internal error"}).encode()
+            headers = {'Content-Type': 'application/json; charset=utf-8', 'Content-Length': str(len(body))}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def make_server(api, host='127.0.0.1', port=8502):
+    """HTTP server answering through ``api``, bound but not serving yet; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.api = api
+    return server
+
+
+def serve(api, host='127.0.0.1', port=8502):
+    """Run the API until interrupted"""
+    server = make_server(api, host, port)
+    logger.info("serving %d datasets on http://%s:%d", len(api.registry), *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m tp_reviews.api', description="Serve pain points and review distributions as read-only JSON.")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8502, help="port to listen on (default: %(default)s)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="artifact store directory (default: %(default)s)")
+    parser.add_argument('--datasets', default=DATASETS_PATH, help="dataset registry file or directory of CSVs (default: $TP_REVIEWS_DATASETS)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    serve(ReviewApi(load_registry(args.datasets), ArtifactStore(args.cache_dir)), args.host, args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+"""Server-side paging of enriched reviews for the dashboard's review browser"""
+import numpy as np
+
+from .layout import english_text
+
+# Columns the browser can show, in display order
+BROWSE_COLUMNS = [
+    'reviewScore', 'reviewLanguage', 'reviewTitle', 'reviewText', 'reviewText_en', 'sentiment_label', 'sentiment', 'theme', 'reviewUrl'
+]
+# reviewText_en repeats reviewText for English reviews, so it is opt-in
+DEFAULT_BROWSE_COLUMNS = ['reviewScore', 'reviewLanguage', 'reviewTitle', 'reviewText', 'sentiment_label', 'sentiment', 'reviewUrl']
+TEXT_COLUMNS = ['reviewTitle', 'reviewText', 'reviewText_en']
+
+PAGE_SIZES = [10, 25, 50, 100]
+PREVIEW_CHARS = 160
+
+
+def page_count(rows, page_size):
+    """Number of pages needed for ``rows`` rows; an empty frame still has one page"""
+    return max(1, -(-rows // page_size))
+
+
+def sort_positions(df, sort_by=None, ascending=True):
+    """Row positions of ``df`` in display order; ``sort_by=None`` keeps the file order"""
+    if sort_by is None:
+        return np.arange(len(df))
+    values = df[sort_by].reset_index(drop=True)
+    return values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+
+def restrict_positions(positions, matches, rows):
+    """Keep the display order of ``positions`` but only for rows listed in ``matches``"""
+    if len(matches) == rows:
+        return positions
+    keep = np.zeros(rows, dtype=bool)
+    keep[matches] = True
+    return positions[keep[positions]]
+
+
+def truncate_text(values, limit=PREVIEW_CHARS):
+    """Cut text longer than ``limit`` characters down to a preview ending in an ellipsis"""
+    text = values.fillna('')
+    if text.empty:
+        return text
+    long = text.str.len() > limit
+    return text.where(~long, text.str.slice(0, limit).str.rstrip() + '…')
+
+
+def review_page(df, page, page_size, positions=None, columns=None, preview_chars=PREVIEW_CHARS):
+    """Rows of one 1-based ``page``, projected to ``columns`` with text cut to previews.
+
+    Only the page's rows are copied, so the cost and payload size do not
+    grow with the frame. The original index is kept so a row's full text
+    can be looked up with ``df.loc``. reviewText_en is filled from the
+    original text where the compact layout leaves it out.
+    """
+    start = (page - 1) * page_size
+    rows = positions[start:start + page_size] if positions is not None else np.arange(start, min(start + page_size, len(df)))
+    columns = [column for column in (columns or DEFAULT_BROWSE_COLUMNS) if column in df.columns or column == 'reviewText_en']
+    page_df = df.iloc[rows, [df.columns.get_loc(column) for column in columns if column != 'reviewText_en']]
+    if 'reviewText_en' in columns:
+        text_columns = [df.columns.get_loc(column) for column in ('reviewText', 'reviewText_en') if column in df.columns]
+        page_df.insert(columns.index('reviewText_en'), 'reviewText_en', english_text(df.iloc[rows, text_columns]))
+    previews = {column: truncate_text(page_df[column], preview_chars) for column in TEXT_COLUMNS if column in page_df.columns}
+    return page_df.assign(**previews)
@@ -0,0 +1,326 @@
+"""Expert-system theme classifier compiled once and reused for every review.
+
+The expert rules and theme names live in the ``themes`` section of the
+rule file (see ``rules``). Keywords are plain substring checks, patterns
+are regular expressions searched in the lowercased review, proximity
+rules are words that must occur in order within a few words of each
+other, and ``multiplier`` and ``bonus_terms`` encode the special rules for
+high-impact issues.
+"""
+import bisect
+import hashlib
+import json
+import re
+from itertools import chain
+
+import numpy as np
+
+from .rules import RULES
+from .search import tokenize
+
+GENERAL_THEME = "General Issues"
+
+# Only classify if we have a significant match
+MIN_THEME_WEIGHT = 2
+
+KEYWORD_WEIGHT = 1
+PATTERN_WEIGHT = 2  # More weight for complex patterns
+
+# Words a proximity rule may span when it does not set its own ``window``
+PROXIMITY_WINDOW = 8
+
+
+def _trie_pattern(words):
+    """Build a regex alternation shaped like a trie so each position is tried once"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Prefer the longer literal; the shorter one is recovered through implication
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+def _pattern_literals(pattern):
+    """Return the literals a ``a.*b.*c`` style pattern needs, or None if it is not that shape"""
+    pieces = pattern.split('.*')
+    if all(piece and re.escape(piece) == piece for piece in pieces):
+        return frozenset(pieces)
+    return None
+
+
+def proximity_terms(words):
+    """``(word, is_prefix)`` for each word of a proximity rule; ``pay*`` matches any word starting with ``pay``"""
+    return tuple((word[:-1], True) if word.endswith('*') else (word, False) for word in words)
+
+
+class WordPositions:
+    """Positions of every word of one review, tokenised once and shared by all its proximity rules"""
+
+    def __init__(self, text_lower):
+        self.positions = {}
+        for position, token in enumerate(tokenize(text_lower)):
+            self.positions.setdefault(token, []).append(position)
+        self._vocabulary = None
+
+    def of(self, word, prefix=False):
+        """Sorted positions of ``word``, or of every word starting with it"""
+        if not prefix:
+            return self.positions.get(word, [])
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.positions)
+        start = bisect.bisect_left(self._vocabulary, word)
+        end = bisect.bisect_left(self._vocabulary, word + '\uffff')
+        if end - start == 1:
+            return self.positions[self._vocabulary[start]]
+        return sorted(chain.from_iterable(self.positions[token] for token in self._vocabulary[start:end]))
+
+
+def match_within(positions, terms, window=PROXIMITY_WINDOW):
+    """Whether ``terms`` (from ``proximity_terms``) occur in order within ``window`` consecutive words.
+
+    Walks the positions of the rule's own words only, keeping for each
+    term the latest start of a partial match ending at it; there is no
+    backtracking, so the cost is linear in the number of occurrences
+    whatever the review's length or wording.
+    """
+    last = len(terms) - 1
+    # Later terms first at a shared position, so one word never advances a match by two steps
+    occurrences = sorted((position, -step) for step, term in enumerate(terms) for position in positions.of(*term))
+    starts = [-1] * len(terms)
+    for position, step in occurrences:
+        step = -step
+        start = position if step == 0 else starts[step - 1]
+        if start < 0:
+            continue
+        if step == last and position - start < window:
+            return True
+        starts[step] = start
+    return False
+
+
+class ThemeClassifier:
+    """Scores every rule category for a review in a single scan of its text.
+
+    All keywords and pattern literals are compiled into one trie-shaped
+    regex. One overlapping scan over the lowercased review yields the set
+    of literals it contains; keyword weights come straight from that set
+    and a pattern or proximity rule is only checked when all of its
+    literals are present. Proximity rules share one ``WordPositions`` per
+    review, built only when one of them is checked.
+
+    ``score_matrix`` scores many reviews at once: keyword and bonus
+    weights are gathered from literal × category weight tables for all
+    the literals found, and only triggered pattern and proximity rules
+    run per review.
+    """
+
+    def __init__(self, rules, theme_names, min_weight=MIN_THEME_WEIGHT, keyword_weight=KEYWORD_WEIGHT, pattern_weight=PATTERN_WEIGHT):
+        self.rules = rules
+        self.theme_names = theme_names
+        self.min_weight = min_weight
+        self.keyword_weight = keyword_weight
+        self.pattern_weight = pattern_weight
+        self.categories = list(self.rules)
+        # Changes whenever the rules, theme names or weights do, so derived data can be invalidated
+        self.version = hashlib.sha1(json.dumps([self.rules, self.theme_names, min_weight, keyword_weight, pattern_weight],
+                                               sort_keys=True).encode()).hexdigest()
+
+        # Everything is indexed by literal so scoring only touches the
+        # literals a review actually contains.
+        self._keyword_hits = {}
+        self._bonus_hits = {}
+        self._triggered_patterns = {}
+        self._unconditional_patterns = []
+        self._triggered_proximity = {}
+        self._multipliers = []
+        for index, (category, config) in enumerate(self.rules.items()):
+            for keyword in config.get('keywords', []):
+                self._keyword_hits.setdefault(keyword, []).append(index)
+            for term, bonus in config.get('bonus_terms', {}).items():
+                self._bonus_hits.setdefault(term, []).append((index, bonus))
+            for pattern in config.get('patterns', []):
+                required = _pattern_literals(pattern)
+                if required is None:
+                    self._unconditional_patterns.append((index, re.compile(pattern)))
+                else:
+                    # Anchor on the longest literal, the least likely to be present
+                    anchor = max(sorted(required), key=len)
+                    self._triggered_patterns.setdefault(anchor, []).append((index, required, re.compile(pattern)))
+            for rule in config.get('proximity', []):
+                terms = proximity_terms(rule['words'])
+                required = frozenset(word for word, _ in terms)
+                anchor = max(sorted(required), key=len)
+                self._triggered_proximity.setdefault(anchor, []).append((index, required, terms, rule.get('window', PROXIMITY_WINDOW)))
+            self._multipliers.append(config.get('multiplier', 1))
+
+        literals = set(self._keyword_hits) | set(self._bonus_hits)
+        for triggered in self._triggered_patterns.values():
+            for _, required, _ in triggered:
+                literals.update(required)
+        for triggered in self._triggered_proximity.values():
+            for _, required, _, _ in triggered:
+                literals.update(required)
+
+        # Longest literal wins at each start position, so every literal
+        # contained in a hit is implied present as well.
+        self._implied = {literal: frozenset(other for other in literals if other in literal) for literal in literals}
+        self._scanner = re.compile('(?=(' + _trie_pattern(literals) + '))') if literals else None
+
+        # Literal x category tables for scoring many reviews at once
+        self._literal_ids = {literal: position for position, literal in enumerate(sorted(literals))}
+        self._keyword_table = np.zeros((len(literals), len(self.categories)))
+        self._bonus_table = np.zeros((len(literals), len(self.categories)))
+        for keyword, indices in self._keyword_hits.items():
+            for index in indices:
+                self._keyword_table[self._literal_ids[keyword], index] += keyword_weight
+        for term, hits in self._bonus_hits.items():
+            for index, bonus in hits:
+                self._bonus_table[self._literal_ids[term], index] += bonus
+        # The theme of each category, then of reviews no category is significant for
+        self._theme_labels = np.array([theme_names.get(category, GENERAL_THEME) for category in self.categories] + [GENERAL_THEME], dtype=object)
+
+    @classmethod
+    def from_config(cls, themes):
+        """Compile the ``themes`` section of a rule file"""
+        return cls(themes['rules'], themes['names'], themes['min_weight'], themes['keyword_weight'], themes['pattern_weight'])
+
+    def terms(self, text_lower):
+        """Return the set of rule literals that occur in an already lowercased text"""
+        if self._scanner is None:
+            return frozenset()
+        found = set()
+        for hit in set(self._scanner.findall(text_lower)):
+            found.update(self._implied[hit])
+        return found
+
+    def _weights(self, text_lower):
+        found = self.terms(text_lower)
+        weights = [0] * len(self.categories)
+
+        # Keyword matching
+        for term in found:
+            for index in self._keyword_hits.get(term, ()):
+                weights[index] += self.keyword_weight
+
+        self._add_rule_weights(text_lower, found, weights)
+
+        # Special rules for high-impact issues
+        for index, multiplier in enumerate(self._multipliers):
+            if multiplier != 1 and weights[index] > 0:
+                weights[index] *= multiplier
+        for term in found:
+            for index, bonus in self._bonus_hits.get(term, ()):
+                weights[index] += bonus
+
+        return weights
+
+    def _add_rule_weights(self, text_lower, found, weights):
+        """Add the pattern and proximity weights, only checking rules whose literals are all present"""
+        for index, regex in self._unconditional_patterns:
+            if regex.search(text_lower):
+                weights[index] += self.pattern_weight
+        for term in found:
+            for index, required, regex in self._triggered_patterns.get(term, ()):
+                if required <= found and regex.search(text_lower):
+                    weights[index] += self.pattern_weight
+        positions = None
+        for term in found:
+            for index, required, terms, window in self._triggered_proximity.get(term, ()):
+                if required <= found:
+                    positions = WordPositions(text_lower) if positions is None else positions
+                    if match_within(positions, terms, window):
+                        weights[index] += self.pattern_weight
+
+    def _score_matrix(self, texts):
+        rows, literals = [], []
+        weights = np.zeros((len(texts), len(self.categories)))
+        literal_ids = self._literal_ids
+        for row, text in enumerate(texts):
+            if not isinstance(text, str) or not text:
+                continue
+            text_lower = text.lower()
+            found = self.terms(text_lower)
+            rows.extend([row] * len(found))
+            literals.extend(literal_ids[term] for term in found)
+            self._add_rule_weights(text_lower, found, weights[row])
+        rows, literals = np.array(rows, dtype=np.int64), np.array(literals, dtype=np.int64)
+        np.add.at(weights, rows, self._keyword_table[literals])
+        multipliers = np.array(self._multipliers, dtype=np.float64)
+        weights = np.where(weights > 0, weights * multipliers, weights)
+        np.add.at(weights, rows, self._bonus_table[literals])
+        return weights
+
+    def score_matrix(self, texts):
+        """``(len(texts), len(categories))`` float32 weights of every category for every review.
+
+        Row ``i`` equals ``score(texts[i])`` in ``categories`` order; empty
+        or missing texts score zero everywhere.
+        """
+        return self._score_matrix(list(texts)).astype(np.float32)
+
+    def themes_from_scores(self, scores):
+        """Theme of each row of a score matrix, as ``classify`` would pick it"""
+        if not len(self.categories):
+            return [GENERAL_THEME] * len(scores)
+        best = scores.argmax(axis=1)
+        top = scores[np.arange(len(scores)), best]
+        # Ties go to the first category, like the strict comparison in ``classify``
+        best[(top < self.min_weight) | (top <= 0)] = len(self.categories)
+        return self._theme_labels[best].tolist()
+
+    def score(self, text):
+        """Return the weight of every category for a review"""
+        return dict(zip(self.categories, self._weights(text.lower())))
+
+    def analyze(self, text):
+        """Return the keywords and patterns of every category annotated with its weight, as ``analyze_review_content`` always has"""
+        weights = self.score(text)
+        return {category: {'keywords': config.get('keywords', []), 'patterns': config.get('patterns', []), 'weight': weights[category]}
+                for category, config in self.rules.items()}
+
+    def classify(self, text):
+        """Classify a single review into the most appropriate theme"""
+        if not isinstance(text, str) or not text:
+            return GENERAL_THEME
+
+        # Find the category with highest weight
+        max_weight = 0
+        best_category = None
+        for category, weight in zip(self.categories, self._weights(text.lower())):
+            if weight > max_weight:
+                max_weight = weight
+                best_category = category
+
+        if max_weight < self.min_weight:
+            return GENERAL_THEME
+
+        return self.theme_names.get(best_category, GENERAL_THEME)
+
+    def classify_many(self, texts):
+        """Classify an iterable of reviews, returning a list of themes in the same order"""
+        return self.themes_from_scores(self._score_matrix(list(texts)))
+
+
+def current_classifier(rules=RULES):
+    """Classifier for the current theme rules, compiled once per version of them"""
+    return rules.compiled('themes', ThemeClassifier.from_config)
+
+
+def analyze_review_content(text):
+    """Expert system to analyze review content and extract specific issues"""
+    return current_classifier().analyze(text)
+
+
+def classify_review_theme(text):
+    """Classify a single review into the most appropriate theme"""
+    return current_classifier().classify(text)
@@ -0,0 +1,71 @@
+"""Headless batch job: enrich a review CSV and precompute everything the dashboard loads for it.
+
+Usage::
+
+    python -m tp_reviews "Trustpilot reviews extraction - Data.csv" --workers 16
+
+Artifacts land in the same store the dashboard reads, so a cron job can do
+the heavy work and the dashboard only loads the results. The artifacts are
+the ones ``warmup.warm_store`` precomputes at boot.
+"""
+import argparse
+import json
+import logging
+import os
+
+from .layout import layout_report
+from .pipeline import load_discoveries, load_pain_points
+from .store import DEFAULT_CACHE_DIR, ArtifactStore
+from .translation import TRANSLATORS, get_translator
+from .warmup import warm_store
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m tp_reviews', description="Precompute enriched reviews, pain points, discovered themes, theme scores and the aggregate cube for the dashboard.")
+    parser.add_argument('csv', help="Trustpilot review export to process")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="artifact store directory (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for scoring (default: serial)")
+    parser.add_argument('--translator', choices=sorted(TRANSLATORS), default=os.environ.get('TP_REVIEWS_TRANSLATOR') or None,
+                        help="translate non-English reviews with this backend instead of dropping them (default: $TP_REVIEWS_TRANSLATOR)")
+    parser.add_argument('--output', help="also write the enriched reviews to this .feather, .parquet or .csv file")
+    parser.add_argument('--summary', help="also write the pain point summary JSON to this file")
+    parser.add_argument('--unique-voices', action='store_true', help="count pain points by unique voices, collapsing near-duplicate reviews")
+    parser.add_argument('--memory-report', action='store_true', help="log bytes per row of the enriched frame before and after compaction")
+    return parser
+
+
+def write_frame(df, path):
+    """Write an enriched frame in the format implied by the file extension"""
+    if path.endswith('.parquet'):
+        df.to_parquet(path)
+    elif path.endswith('.csv'):
+        df.to_csv(path)
+    else:
+        df.reset_index().to_feather(path)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    logger = logging.getLogger('tp_reviews.cli')
+
+    store = ArtifactStore(args.cache_dir)
+    df = warm_store(args.csv, store, workers=args.workers, translator=get_translator(args.translator))
+    # Already stored by warm_store, except the unique-voices pain points
+    pain_points = load_pain_points(df, store=store, unique_voices=args.unique_voices)
+    discoveries = load_discoveries(df, store=store)
+    logger.info("%d reviews enriched, %d pain point themes, %d candidate clusters (artifact %s)", len(df), len(pain_points),
+                sum(len(bucket['clusters']) for bucket in discoveries), df.attrs['fingerprint'])
+
+    if args.memory_report:
+        report = layout_report(df)
+        logger.info("memory: %.0f bytes/row (%.1f MiB) compact vs %.0f bytes/row (%.1f MiB) in the original layout",
+                    report['bytes_per_row_after'], report['bytes_after'] / 2**20, report['bytes_per_row_before'], report['bytes_before'] / 2**20)
+    if args.output:
+        write_frame(df, args.output)
+        logger.info("wrote %s", args.output)
+    if args.summary:
+        with open(args.summary, 'w') as handle:
+            json.dump(pain_points, handle, indent=2)
+        logger.info("wrote %s", args.summary)
+    return 0
@@ -0,0 +1,110 @@
+"""Aggregate cube of review counts, sentiment sums and sentiment histograms for metrics under filtering"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ['reviewLanguage', 'reviewScore', 'sentiment_label', 'theme']
+
+# Sentiment scores lie in [-1, 1]; every cell counts its reviews in this many equal-width bins
+SENTIMENT_BINS = 20
+SENTIMENT_HISTOGRAM = [f'sentiment_bin_{bin}' for bin in range(SENTIMENT_BINS)]
+
+
+def sentiment_bins(sentiment):
+    """Histogram bin of each sentiment score (a float array), -1 where the score is missing.
+
+    ``SqlReviews.cube`` computes the same bins in SQL.
+    """
+    bins = np.clip(np.floor((sentiment + 1) * (SENTIMENT_BINS / 2)), 0, SENTIMENT_BINS - 1)
+    return np.where(np.isnan(bins), -1, bins).astype(np.int64)
+
+
+class ReviewCube:
+    """Review count, sentiment sum and sentiment histogram for every observed combination of the cube dimensions.
+
+    The cube has at most a few thousand cells however many reviews there
+    are, so filtering and re-aggregating it replaces a scan of the frame:
+    ``filter`` only narrows a boolean mask over the cells and roll-ups are
+    a weighted ``np.bincount``.
+    """
+
+    def __init__(self, cells, dimensions=CUBE_DIMENSIONS):
+        self.cells = cells.reset_index(drop=True)
+        self.dimensions = list(dimensions)
+        self._counts = self.cells['count'].to_numpy(dtype=np.int64)
+        self._sentiment_sums = self.cells['sentiment_sum'].to_numpy(dtype=np.float64)
+        self._histograms = self.cells[SENTIMENT_HISTOGRAM].to_numpy(dtype=np.int64)
+        self._codes, self._labels = {}, {}
+        for dimension in self.dimensions:
+            codes, labels = pd.factorize(self.cells[dimension], sort=True, use_na_sentinel=False)
+            self._codes[dimension], self._labels[dimension] = codes, pd.Index(labels, name=dimension)
+        self._mask = np.ones(len(self.cells), dtype=bool)
+
+    @classmethod
+    def from_frame(cls, df, dimensions=CUBE_DIMENSIONS):
+        """Aggregate an enriched frame; the one full scan the cube needs"""
+        sentiment = df['sentiment'].astype('float64')
+        grouped = sentiment.groupby([df[dimension] for dimension in dimensions], observed=True, dropna=False)
+        cells = pd.DataFrame({'count': grouped.size(), 'sentiment_sum': grouped.sum()})
+        # Cell number times the bin count plus the bin gives each review's slot in the cells' histograms
+        cell, bins = grouped.ngroup().to_numpy(), sentiment_bins(sentiment.to_numpy())
+        scored = bins >= 0
+        histograms = np.bincount(cell[scored] * SENTIMENT_BINS + bins[scored], minlength=len(cells) * SENTIMENT_BINS)
+        cells[SENTIMENT_HISTOGRAM] = histograms.reshape(len(cells), SENTIMENT_BINS)
+        cells = cells.reset_index()
+        # Plain values rather than categoricals, so cells round-trip through any artifact format
+        for dimension in dimensions:
+            if isinstance(cells[dimension].dtype, pd.CategoricalDtype):
+                cells[dimension] = cells[dimension].astype(object)
+        return cls(cells, dimensions)
+
+    def labels(self, dimension):
+        """Values of a dimension present in the whole (unfiltered) cube"""
+        return self._labels[dimension].dropna().tolist()
+
+    def filter(self, **criteria):
+        """Sub-cube of cells matching every non-empty criterion.
+
+        e.g. ``cube.filter(reviewScore=[1, 2], theme=['Platform Technical Problems and System Bugs'])``
+        """
+        mask = self._mask
+        for dimension, values in criteria.items():
+            if values:
+                # A nullable label index (reviewScore with blank ratings) answers isin with a BooleanArray
+                allowed = np.asarray(self._labels[dimension].isin(values), dtype=bool)
+                mask = mask & allowed[self._codes[dimension]]
+        cube = copy.copy(self)
+        cube._mask = mask
+        return cube
+
+    @property
+    def nbytes(self):
+        codes = sum(codes.nbytes for codes in self._codes.values())
+        return int(self.cells.memory_usage(deep=True).sum()) + codes + self._mask.nbytes
+
+    @property
+    def count(self):
+        return int(self._counts[self._mask].sum())
+
+    def value_counts(self, dimension, sort_index=False):
+        """Review counts per value of ``dimension``, like ``df[dimension].value_counts()``"""
+        totals = np.bincount(self._codes[dimension][self._mask], weights=self._counts[self._mask], minlength=len(self._labels[dimension]))
+        counts = pd.Series(totals.astype(np.int64), index=self._labels[dimension], name='count')
+        counts = counts[counts > 0]
+        return counts.sort_index() if sort_index else counts.sort_values(ascending=False, kind='stable')
+
+    def mean_score(self):
+        scores = self.value_counts('reviewScore')
+        # Reviews without a rating count for the other statistics but not the mean
+        scores = scores[scores.index.notna()]
+        return float((scores.index.to_numpy(dtype=np.float64) * scores.to_numpy()).sum() / scores.sum()) if len(scores) else float('nan')
+
+    def sentiment_histogram(self):
+        """Review counts per sentiment score bin, indexed by the bins' lower edges"""
+        edges = np.linspace(-1, 1, SENTIMENT_BINS + 1)[:-1].round(2)
+        return pd.Series(self._histograms[self._mask].sum(axis=0), index=pd.Index(edges, name='sentiment'), name='count')
+
+    def mean_sentiment(self):
+        count = self.count
+        return float(self._sentiment_sums[self._mask].sum() / count) if count else float('nan')
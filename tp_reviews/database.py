@@ -0,0 +1,249 @@
+"""Optional SQLite backend: enriched reviews in an embedded database, queried with SQL.
+
+With ``TP_REVIEWS_BACKEND=sqlite`` the dashboard keeps no review frame in
+memory. Filters, the aggregate cube, full-text search, sorting and paging
+run as SQL and only the rows of the current page come back into Python.
+Searches use an FTS5 index of the same tokens as ``search.ReviewIndex``
+and accept the same query syntax.
+"""
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from .browse import BROWSE_COLUMNS, DEFAULT_BROWSE_COLUMNS, TEXT_COLUMNS, truncate_text
+from .cube import CUBE_DIMENSIONS, SENTIMENT_BINS, SENTIMENT_HISTOGRAM, ReviewCube
+from .layout import NARROW_DTYPES, compact_reviews, english_text
+from .search import FACET_COLUMNS, parse_query, tokenize
+from .store import DEFAULT_CACHE_DIR
+
+BACKENDS = ('memory', 'sqlite')
+REVIEW_BACKEND = os.environ.get('TP_REVIEWS_BACKEND', 'memory')
+DATABASE_PATH = os.environ.get('TP_REVIEWS_DATABASE', os.path.join(DEFAULT_CACHE_DIR, 'reviews.sqlite'))
+
+REVIEW_COLUMNS = ['reviewScore', 'reviewLanguage', 'reviewTitle', 'reviewText', 'reviewText_en', 'sentiment', 'sentiment_label', 'theme', 'reviewUrl']
+WRITE_BATCH = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    source TEXT,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    dataset INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    label INTEGER NOT NULL,
+    reviewScore INTEGER,
+    reviewLanguage TEXT,
+    reviewTitle TEXT,
+    reviewText TEXT,
+    reviewText_en TEXT,
+    sentiment REAL,
+    sentiment_label TEXT,
+    theme TEXT,
+    reviewUrl TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_position ON reviews (dataset, position);
+CREATE INDEX IF NOT EXISTS reviews_label ON reviews (dataset, label);
+CREATE INDEX IF NOT EXISTS reviews_cube ON reviews (dataset, reviewLanguage, reviewScore, sentiment_label, theme, sentiment);
+CREATE INDEX IF NOT EXISTS reviews_score ON reviews (dataset, reviewScore);
+CREATE INDEX IF NOT EXISTS reviews_sentiment_label ON reviews (dataset, sentiment_label);
+CREATE INDEX IF NOT EXISTS reviews_theme ON reviews (dataset, theme);
+-- Contentless, holding the tokens of search.tokenize: the text itself lives in reviews
+CREATE VIRTUAL TABLE IF NOT EXISTS review_text USING fts5(tokens, content='', tokenize="unicode61 tokenchars ''''");
+"""
+
+
+def _match_expression(kind, value):
+    """FTS5 query for one parsed search clause"""
+    if kind == 'phrase':
+        return '"' + ' '.join(value) + '"'
+    return f'"{value}"' + (' *' if kind == 'prefix' else '')
+
+
+def _indexed_tokens(titles, texts):
+    """What ``ReviewIndex`` indexes for each review: the tokens of its title and English text"""
+    return [' '.join(tokenize(f"{title or ''}\n{text or ''}")) for title, text in zip(titles, texts)]
+
+
+def _sql_values(values):
+    """Column values as plain Python objects with None for missing ones"""
+    values = values.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+class ReviewDatabase:
+    """SQLite file of enriched review datasets, one per fingerprint.
+
+    Writing a new fingerprint for a source drops the older datasets written
+    from it but the latest, which sessions still showing that version
+    (see ``datasets.DatasetRefresher``) keep reading until the next write.
+    """
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self._created = False
+
+    def _connect(self):
+        if not self._created:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        if not self._created:
+            connection.executescript(SCHEMA)
+            self._created = True
+        return connection
+
+    def dataset(self, fingerprint):
+        """SQL view of a stored dataset, or None if that fingerprint was never written"""
+        with closing(self._connect()) as connection:
+            found = connection.execute("SELECT id, rows FROM datasets WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return None if found is None else SqlReviews(self, found[0], fingerprint, found[1])
+
+    def write(self, df, source=None):
+        """Store an enriched frame under ``df.attrs['fingerprint']`` and return its SQL view"""
+        fingerprint = df.attrs['fingerprint']
+        english = english_text(df)
+        with closing(self._connect()) as connection, connection:
+            try:
+                dataset = connection.execute("INSERT INTO datasets (fingerprint, source, rows) VALUES (?, ?, ?)",
+                                             (fingerprint, source and os.path.abspath(source), len(df))).lastrowid
+            except sqlite3.IntegrityError:
+                # Another process stored it first
+                return self.dataset(fingerprint)
+            for start in range(0, len(df), WRITE_BATCH):
+                batch = df.iloc[start:start + WRITE_BATCH]
+                columns = [_sql_values(batch[column]) if column in batch.columns else [None] * len(batch) for column in REVIEW_COLUMNS]
+                # Like the compact layout, only translations that differ from the original are kept
+                translated = english.iloc[start:start + WRITE_BATCH].where(english.iloc[start:start + WRITE_BATCH] != batch['reviewText'])
+                columns[REVIEW_COLUMNS.index('reviewText_en')] = _sql_values(translated)
+                rows = zip([dataset] * len(batch), range(start, start + len(batch)), batch.index.tolist(), *columns)
+                connection.executemany(f"INSERT INTO reviews (dataset, position, label, {', '.join(REVIEW_COLUMNS)}) "
+                                       f"VALUES ({', '.join('?' * (len(REVIEW_COLUMNS) + 3))})", rows)
+            self._index_text(connection, dataset)
+            if source is not None:
+                superseded = connection.execute("SELECT id FROM datasets WHERE source = ? AND id != ? ORDER BY id DESC LIMIT -1 OFFSET 1",
+                                                (os.path.abspath(source), dataset)).fetchall()
+                for (old,) in superseded:
+                    self._drop(connection, old)
+        return SqlReviews(self, dataset, fingerprint, len(df))
+
+    @staticmethod
+    def _text_batches(connection, dataset):
+        """(ids, indexed tokens) of a dataset's reviews, ``WRITE_BATCH`` at a time"""
+        cursor = connection.execute("SELECT id, reviewTitle, COALESCE(reviewText_en, reviewText) FROM reviews WHERE dataset = ? ORDER BY id",
+                                    (dataset,))
+        while batch := cursor.fetchmany(WRITE_BATCH):
+            ids, titles, texts = zip(*batch)
+            yield ids, _indexed_tokens(titles, texts)
+
+    def _index_text(self, connection, dataset):
+        for ids, tokens in self._text_batches(connection, dataset):
+            connection.executemany("INSERT INTO review_text (rowid, tokens) VALUES (?, ?)", zip(ids, tokens))
+
+    def _drop(self, connection, dataset):
+        # A contentless FTS table forgets rows through 'delete' commands carrying the indexed tokens
+        for ids, tokens in self._text_batches(connection, dataset):
+            connection.executemany("INSERT INTO review_text (review_text, rowid, tokens) VALUES ('delete', ?, ?)", zip(ids, tokens))
+        connection.execute("DELETE FROM reviews WHERE dataset = ?", (dataset,))
+        connection.execute("DELETE FROM datasets WHERE id = ?", (dataset,))
+
+    def query(self, sql, params=()):
+        """Result of a SELECT as a DataFrame"""
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+
+class SqlReviews:
+    """One stored dataset, answering the dashboard's questions with SQL.
+
+    Mirrors the in-memory path: ``cube`` is ``ReviewCube.from_frame``,
+    ``count`` is ``len(ReviewIndex.search(...))`` and ``page`` is
+    ``review_page`` over ``sort_positions``, including their tie-breaking
+    by file order.
+    """
+
+    def __init__(self, database, dataset, fingerprint, rows):
+        self.database = database
+        self.dataset = dataset
+        self.fingerprint = fingerprint
+        self.rows = rows
+
+    def _where(self, query, filters):
+        clauses, params = ["dataset = ?"], [self.dataset]
+        for column, values in filters.items():
+            if column not in FACET_COLUMNS:
+                raise ValueError(f"Unknown facet column: {column}")
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        alternatives = []
+        for group in parse_query(query or ''):
+            parts = []
+            for negate, kind, value in group:
+                parts.append(f"id {'NOT IN' if negate else 'IN'} (SELECT rowid FROM review_text WHERE review_text MATCH ?)")
+                params.append(_match_expression(kind, value))
+            alternatives.append('(' + ' AND '.join(parts) + ')')
+        if alternatives:
+            clauses.append('(' + ' OR '.join(alternatives) + ')')
+        return ' AND '.join(clauses), params
+
+    def cube(self, dimensions=CUBE_DIMENSIONS):
+        """The aggregate cube, grouped by the database"""
+        columns = ', '.join(dimensions)
+        # Same bins as cube.sentiment_bins: CAST truncates, which is the floor once clamped at bin 0
+        histogram = ', '.join(f"TOTAL(bin = {bin}) AS {name}" for bin, name in enumerate(SENTIMENT_HISTOGRAM))
+        cells = self.database.query(f"SELECT {columns}, COUNT(*) AS count, TOTAL(sentiment) AS sentiment_sum, {histogram} "
+                                    f"FROM (SELECT *, MIN(MAX(CAST((sentiment + 1) * {SENTIMENT_BINS / 2} AS INTEGER), 0), {SENTIMENT_BINS - 1}) AS bin "
+                                    f"FROM reviews WHERE dataset = ?) GROUP BY {columns}", (self.dataset,))
+        # A blank rating turns the whole column into floats; read the ratings back as integers
+        cells = cells.astype({column: dtype for column, dtype in NARROW_DTYPES.items() if column in dimensions})
+        return ReviewCube(cells, dimensions)
+
+    def count(self, query='', **filters):
+        """Number of reviews matching a search query and facet filters"""
+        where, params = self._where(query, filters)
+        return int(self.database.query(f"SELECT COUNT(*) AS matches FROM reviews WHERE {where}", params)['matches'].iloc[0])
+
+    def positions(self, query='', **filters):
+        """Sorted row positions of the matching reviews, like ``ReviewIndex.search``"""
+        where, params = self._where(query, filters)
+        return self.database.query(f"SELECT position FROM reviews WHERE {where} ORDER BY position", params)['position'].to_numpy()
+
+    def page(self, page, page_size, query='', sort_by=None, ascending=True, columns=None, **filters):
+        """Rows of one 1-based page of the matching reviews, indexed by their original label, text cut to previews"""
+        if sort_by is not None and sort_by not in BROWSE_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by}")
+        columns = [column for column in (columns or DEFAULT_BROWSE_COLUMNS) if column in REVIEW_COLUMNS]
+        selected = [f"COALESCE(reviewText_en, reviewText) AS reviewText_en" if column == 'reviewText_en' else column for column in columns]
+        order = 'position' if sort_by is None else f"{sort_by} IS NULL, {sort_by} {'ASC' if ascending else 'DESC'}, position"
+        where, params = self._where(query, filters)
+        rows = self.database.query(f"SELECT label, {', '.join(selected)} FROM reviews WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                                   [*params, page_size, (page - 1) * page_size])
+        rows = rows.set_index('label').rename_axis(None)
+        narrowed = {column: rows[column].astype(dtype) for column, dtype in NARROW_DTYPES.items() if column in rows.columns}
+        previews = {column: truncate_text(rows[column]) for column in TEXT_COLUMNS if column in rows.columns}
+        return rows.assign(**narrowed, **previews)
+
+    def reviews(self, labels):
+        """Full rows of the reviews with these original labels, reviewText_en filled in"""
+        if not len(labels):
+            return pd.DataFrame(columns=REVIEW_COLUMNS)
+        rows = self.database.query(f"SELECT label, {', '.join(REVIEW_COLUMNS)} FROM reviews WHERE dataset = ? AND label IN "
+                                   f"({', '.join('?' * len(labels))})", [self.dataset, *map(int, labels)])
+        rows['reviewText_en'] = rows['reviewText_en'].fillna(rows['reviewText'])
+        rows = rows.astype({column: dtype for column, dtype in NARROW_DTYPES.items() if column in rows.columns})
+        return rows.set_index('label').rename_axis(None).reindex(labels)
+
+    def frame(self):
+        """The whole dataset as an enriched frame in the compact layout, for building summaries"""
+        df = self.database.query(f"SELECT label, {', '.join(REVIEW_COLUMNS)} FROM reviews WHERE dataset = ? ORDER BY position", (self.dataset,))
+        df = compact_reviews(df.set_index('label').rename_axis(None))
+        df.attrs['fingerprint'] = self.fingerprint
+        return df
+
+
+REVIEW_DATABASE = ReviewDatabase()
@@ -0,0 +1,205 @@
+"""Registry of review datasets, a memory-bounded LRU cache of the loaded ones and their background refresh"""
+import glob
+import json
+import logging
+import os
+import pickle
+import queue
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .layout import frame_bytes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASETS = {'Outlier': 'Trustpilot reviews extraction - Data.csv'}
+# A JSON file mapping dataset names to CSV paths, or a directory of CSVs named after their company
+DATASETS_PATH = os.environ.get('TP_REVIEWS_DATASETS')
+DATASET_CACHE_BYTES = int(float(os.environ.get('TP_REVIEWS_DATASET_CACHE_MB', 1024)) * 2**20)
+
+
+def load_registry(path=DATASETS_PATH):
+    """Dataset name -> CSV path, from a registry file, a directory of CSVs or the bundled default"""
+    if not path:
+        return dict(DEFAULT_DATASETS)
+    if os.path.isdir(path):
+        paths = sorted(glob.glob(os.path.join(path, '*.csv')))
+        registry = {os.path.splitext(os.path.basename(csv_path))[0]: csv_path for csv_path in paths}
+    else:
+        with open(path) as handle:
+            entries = json.load(handle)
+        if not isinstance(entries, dict):
+            raise ValueError(f"{path} must map dataset names to CSV paths")
+        # Relative paths are relative to the registry file
+        base = os.path.dirname(path)
+        registry = {name: os.path.join(base, csv_path) for name, csv_path in entries.items()}
+    if not registry:
+        raise ValueError(f"No datasets registered in {path}")
+    return registry
+
+
+def dataset_version(path):
+    """Cheap cache key for a dataset file that changes whenever the file is replaced or edited"""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def artifact_bytes(value):
+    """Approximate memory held by a cached artifact"""
+    if isinstance(value, pd.DataFrame):
+        return int(frame_bytes(value))
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class DatasetCache:
+    """Loaded datasets and their derived artifacts under a memory budget.
+
+    Each dataset key holds named artifacts (the enriched frame, pain
+    points, cube, search index...) built on first use. When the artifacts
+    of all datasets together exceed ``max_bytes``, or there are more than
+    ``max_entries`` datasets, whole datasets are evicted least recently
+    used first; the dataset just used is always kept. Artifacts are built
+    outside the cache lock, so a slow load does not block other datasets,
+    and concurrent requests for the same artifact wait for one build.
+    """
+
+    def __init__(self, max_bytes=DATASET_CACHE_BYTES, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = self.misses = self.evictions = self.evicted_bytes = 0
+
+    def get(self, key, kind, build):
+        """Artifact ``kind`` of dataset ``key``, calling ``build()`` on a miss"""
+        with self._lock:
+            if kind in self._entries.get(key, {}):
+                return self._hit(key, kind)
+            building = self._building.setdefault((key, kind), threading.Lock())
+        with building:
+            with self._lock:
+                if kind in self._entries.get(key, {}):
+                    return self._hit(key, kind)
+                self.misses += 1
+            try:
+                value = build()
+            except BaseException:
+                with self._lock:
+                    self._building.pop((key, kind), None)
+                raise
+            nbytes = artifact_bytes(value)
+            # Store the artifact and retire its build lock together, so a
+            # request arriving in between cannot miss both and build it again
+            with self._lock:
+                self._entries.setdefault(key, {})[kind] = (value, nbytes)
+                self._entries.move_to_end(key)
+                self._building.pop((key, kind), None)
+                self._evict()
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _hit(self, key, kind):
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key][kind][0]
+
+    def _evict(self):
+        while len(self._entries) > 1 and (self._bytes() > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            key, artifacts = self._entries.popitem(last=False)
+            freed = sum(nbytes for _, nbytes in artifacts.values())
+            self.evictions += 1
+            self.evicted_bytes += freed
+            logger.info("evicted dataset %s (%.1f MiB, %d artifacts)", key, freed / 2**20, len(artifacts))
+
+    def _bytes(self):
+        return sum(nbytes for artifacts in self._entries.values() for _, nbytes in artifacts.values())
+
+    def stats(self):
+        """Occupancy and hit/miss/eviction counters since the cache was created"""
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'bytes': self._bytes(),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+            }
+
+
+class DatasetRefresher:
+    """The newest fully prepared version of each dataset, with newer ones prepared in the background.
+
+    ``key_for(path)`` is the dataset's current cache key and
+    ``prepare(path, key)`` builds the artifacts a page needs into
+    ``cache`` (a ``DatasetCache``). Versions are prepared one at a time, in
+    request order, by a single daemon thread. While a new version is being
+    prepared, ``serve`` keeps answering with the last prepared one, as long
+    as the cache still holds it; a dataset never prepared is built by the
+    caller, sharing the background build through the cache's locks.
+    """
+
+    def __init__(self, cache, prepare, key_for):
+        self.cache = cache
+        self.prepare = prepare
+        self.key_for = key_for
+        self._lock = threading.Lock()
+        self._ready = {}
+        self._pending = {}
+        self._queue = queue.Queue()
+        self.prepared = self.failures = 0
+        threading.Thread(target=self._work, name='tp-reviews-refresh', daemon=True).start()
+
+    def warm(self, paths):
+        """Start preparing every dataset, e.g. at process start"""
+        for path in paths:
+            self.serve(path)
+
+    def serve(self, path):
+        """``(key, refreshing)``: the version of ``path`` to show now and whether a newer one is being prepared"""
+        key = self.key_for(path)
+        with self._lock:
+            ready = self._ready.get(path)
+            if ready == key:
+                return key, False
+            if self._pending.get(path) != key:
+                self._pending[path] = key
+                self._queue.put((path, key))
+            if ready is not None and ready in self.cache:
+                return ready, True
+        return key, False
+
+    def _work(self):
+        while True:
+            path, key = self._queue.get()
+            try:
+                self.prepare(path, key)
+            except Exception:
+                logger.exception("failed to prepare %s", path)
+                with self._lock:
+                    self.failures += 1
+                    # The next request retries; until then the last prepared version is served
+                    if self._pending.get(path) == key:
+                        del self._pending[path]
+                continue
+            with self._lock:
+                self.prepared += 1
+                self._ready[path] = key
+                if self._pending.get(path) == key:
+                    del self._pending[path]
+            logger.info("prepared %s", path)
+
+    def stats(self):
+        """Datasets being prepared and versions prepared or failed since the process started"""
+        with self._lock:
+            return {'pending': len(self._pending), 'prepared': self.prepared, 'failures': self.failures}
@@ -0,0 +1,124 @@
+"""Near-duplicate review detection with MinHash signatures and locality-sensitive hashing.
+
+Each review is reduced to the set of its word shingles and summarised by
+``NUM_PERM`` MinHash values, whose agreement rate estimates the Jaccard
+similarity of two reviews. Signatures are cut into ``BANDS`` bands; reviews
+sharing any band land in the same bucket, and only those candidates are
+compared, so finding the groups costs roughly linear time instead of a
+comparison of every pair.
+"""
+import zlib
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .layout import english_text
+from .search import tokenize
+
+SHINGLE_WORDS = 3
+# Shorter reviews ("Great!", "Waste of time") are too generic to call copies
+MIN_WORDS = 6
+NUM_PERM = 64
+BANDS = 16
+# Estimated Jaccard similarity from which two reviews count as near-duplicates
+SIMILARITY = 0.7
+BATCH_ROWS = 10_000
+
+# Signature of a review too short to shingle
+EMPTY = np.iinfo(np.uint32).max
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(32)
+
+
+def _permutations(num_perm, seed):
+    """Multiply-shift hash functions ``(a * x + b) >> 32`` over 64-bit words, ``a`` odd"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    return a, rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+
+
+def _shingle_hashes(token_lists, size=SHINGLE_WORDS):
+    """Hashes of the overlapping word ``size``-grams of each token list, concatenated, with the count per list"""
+    lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.int64)
+    # Each distinct word is hashed once per batch; shingles combine the word hashes
+    codes, vocabulary = pd.factorize(np.fromiter(chain.from_iterable(token_lists), dtype=object, count=int(lengths.sum())))
+    words = np.array([zlib.crc32(token.encode()) for token in vocabulary], dtype=np.uint64)[codes]
+    counts = np.maximum(lengths - size + 1, 0)
+    position = np.arange(len(words)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    starts = np.flatnonzero(position < np.repeat(lengths - size + 1, lengths))
+    hashes = words[starts]
+    for offset in range(1, size):
+        hashes = hashes * _MIX + words[starts + offset]
+    return hashes, counts
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, batch_rows=BATCH_ROWS, seed=1):
+    """``(len(texts), num_perm)`` uint32 MinHash signatures; rows too short to judge are all ``EMPTY``"""
+    a, b = _permutations(num_perm, seed)
+    signatures = np.full((len(texts), num_perm), EMPTY, dtype=np.uint32)
+    for start in range(0, len(texts), batch_rows):
+        token_lists = [tokenize(text) for text in texts.iloc[start:start + batch_rows]]
+        rows = np.array([position for position, tokens in enumerate(token_lists) if len(tokens) >= MIN_WORDS], dtype=np.int64)
+        if not len(rows):
+            continue
+        hashes, counts = _shingle_hashes([token_lists[row] for row in rows])
+        offsets = np.cumsum(counts) - counts
+        # One permutation at a time keeps the temporary at one value per shingle
+        for column in range(num_perm):
+            permuted = (a[column] * hashes + b[column]) >> _SHIFT
+            signatures[start + rows, column] = np.minimum.reduceat(permuted, offsets)
+    return signatures
+
+
+def _band_keys(signatures, bands):
+    """One 64-bit key per row and band, mixing that band's signature values"""
+    rows_per_band = signatures.shape[1] // bands
+    keys = np.zeros((len(signatures), bands), dtype=np.uint64)
+    for offset in range(rows_per_band):
+        keys = keys * _MIX + signatures[:, offset::rows_per_band][:, :bands].astype(np.uint64)
+    return keys
+
+
+def near_duplicate_groups(signatures, bands=BANDS, similarity=SIMILARITY):
+    """Position of each row's group representative: its earliest near-duplicate, or itself.
+
+    Rows that collide in a band are compared with the band bucket's first
+    row only, so each bucket costs linear time; groups are then closed
+    transitively by propagating the smallest position along the matches.
+    """
+    rows = len(signatures)
+    groups = np.arange(rows)
+    present = np.flatnonzero((signatures != EMPTY).any(axis=1))
+    if len(present) < 2:
+        return groups
+    keys = _band_keys(signatures[present], bands)
+    edges = np.empty(0, dtype=np.int64)
+    for band in range(bands):
+        order = np.argsort(keys[:, band], kind='stable')
+        sorted_keys = keys[order, band]
+        repeats = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1]) + 1
+        if not len(repeats):
+            continue
+        # The first row of each run of equal keys is the candidate every other row is checked against
+        starts = np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]]))
+        heads = starts[np.searchsorted(starts, repeats, side='right') - 1]
+        first, other = present[order[heads]], present[order[repeats]]
+        similar = (signatures[first] == signatures[other]).mean(axis=1) >= similarity
+        # Bands mostly confirm the same pairs, so the edge list stays near one entry per duplicate
+        edges = np.union1d(edges, first[similar] * rows + other[similar])
+    first, other = np.divmod(edges, rows)
+    # Propagate the smallest position through each connected group
+    while True:
+        previous = groups.copy()
+        np.minimum.at(groups, other, groups[first])
+        np.minimum.at(groups, first, groups[other])
+        groups = groups[groups]
+        if np.array_equal(groups, previous):
+            return groups
+
+
+def find_duplicates(df, num_perm=NUM_PERM, bands=BANDS, similarity=SIMILARITY):
+    """``duplicate_of`` position for every review of an enriched frame; unique reviews point at themselves"""
+    signatures = minhash_signatures(english_text(df).fillna(''), num_perm)
+    return near_duplicate_groups(signatures, bands, similarity).astype(np.int32)
@@ -0,0 +1,134 @@
+"""Per-stage timing, row count, memory and cache instrumentation for one dashboard run"""
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb():
+    """Resident set size of this process in MiB, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as handle:
+            pages = int(handle.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def process_seconds():
+    """Seconds since this process started, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/stat') as handle:
+            # Fields after the parenthesised command name; the 20th is the start time in clock ticks since boot
+            started = int(handle.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as handle:
+            uptime = float(handle.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return uptime - started / os.sysconf('SC_CLK_TCK')
+
+
+# Whether any run of this process has painted yet: only the first one measures the cold start
+_process_painted = False
+
+
+def json_lines(records):
+    """Serialise recorded stages as newline-delimited JSON for log shippers"""
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def _delta(after, before):
+    if after is None or before is None:
+        return None
+    return round(after - before, 2)
+
+
+class RunRecorder:
+    """Collects one record per pipeline stage of a single script run.
+
+    Every record is also logged as a JSON line on the
+    ``tp_reviews.diagnostics`` logger so an APM agent can ingest them.
+    Cached functions call ``cache_miss`` from their body, which only runs
+    on a miss; stages entered with ``cached=True`` are otherwise hits.
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+        self.started = time.perf_counter()
+        self._started_rss = current_rss_mb()
+        self._misses = set()
+        self._last_event = None
+
+    @contextmanager
+    def stage(self, name, rows=None, cached=False):
+        """Time a block; set ``info['rows']`` inside it if the row count is only known later.
+
+        A block that raises is recorded too, with the exception's type in ``error``.
+        """
+        self._misses.discard(name)
+        start, start_rss = time.perf_counter(), current_rss_mb()
+        self._last_event = (start, start_rss)
+        info = {'rows': rows}
+        error = {}
+        try:
+            yield info
+        except BaseException as exception:
+            error = {'error': type(exception).__name__}
+            raise
+        finally:
+            cache = None
+            if cached:
+                cache = 'miss' if name in self._misses else 'hit'
+            self.record(name, time.perf_counter() - start, info['rows'], _delta(current_rss_mb(), start_rss), cache=cache, **error)
+
+    def cache_miss(self, name):
+        """Mark a cached function as recomputed during this run"""
+        self._misses.add(name)
+
+    def progress(self, stage, chunk_index, rows):
+        """Progress callback for load_reviews: each event closes the stage since the previous one"""
+        now, rss = time.perf_counter(), current_rss_mb()
+        start, start_rss = self._last_event or (self.started, self._started_rss)
+        self.record(stage, now - start, rows, _delta(rss, start_rss), chunk=chunk_index)
+        self._last_event = (now, rss)
+
+    def first_paint(self):
+        """Record when the run first showed its main content, once per run.
+
+        The first paint of the process also records ``process_seconds``,
+        the time since the process started, which includes the imports of
+        a cold start.
+        """
+        global _process_painted
+        if any(record['stage'] == 'first_paint' for record in self.records):
+            return None
+        cold, _process_painted = not _process_painted, True
+        since_start = process_seconds() if cold else None
+        return self.record('first_paint', time.perf_counter() - self.started,
+                           process_seconds=round(since_start, 2) if since_start is not None else None)
+
+    def record(self, stage, seconds, rows=None, memory_delta_mb=None, **extra):
+        record = {
+            'run_id': self.run_id,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'stage': stage,
+            'seconds': round(seconds, 4),
+            'rows': rows,
+            'memory_delta_mb': memory_delta_mb,
+            **extra
+        }
+        self.records.append(record)
+        logger.info(json.dumps(record))
+        return record
+
+    def finish(self):
+        """Record the whole run as a final 'rerun' stage"""
+        rss = current_rss_mb()
+        return self.record('rerun', time.perf_counter() - self.started, memory_delta_mb=_delta(rss, self._started_rss),
+                           rss_mb=round(rss, 1) if rss is not None else None)
@@ -0,0 +1,234 @@
+"""Data-driven theme discovery among the reviews the hardcoded rules explain least.
+
+Reviews become rows of a hashed, binary term-document matrix over their
+unigrams and bigrams, held as CSR arrays (``indptr``, ``indices``) and
+built ``BATCH_ROWS`` reviews at a time, so memory is bounded by the batch
+and the ``N_FEATURES`` hash space rather than by the vocabulary. One pass
+collects document frequencies for every bucket at once; n-grams far more
+common inside a bucket than outside it are its distinctive n-grams, and a
+mini-batch spherical k-means over those n-grams proposes candidate
+clusters.
+"""
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from .classifier import GENERAL_THEME
+from .layout import english_text
+from .search import tokenize
+
+N_FEATURES = 2 ** 18
+BATCH_ROWS = 10_000
+# Distinctive n-grams per bucket that become the clustering features
+CLUSTER_TERMS = 200
+MIN_REVIEWS = 3
+
+# Negations are kept: "not paid" says more than "paid"
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by can could
+did do does doing down during each even few for from further get got had has have having he her here hers him his how i if in
+into is it its itself just me more most my myself now of off on once only or other our ours out over own same she should so
+some such than that the their theirs them then there these they this those through to too under until up us very was we were
+what when where which while who whom why will with would you your yours im ive it's i'm i've don't they're you're
+""".split())
+
+
+def ngrams(text):
+    """Unigrams and bigrams of a text, skipping stop words and single characters"""
+    tokens = tokenize(text)
+    keep = [token not in STOP_WORDS and len(token) > 1 for token in tokens]
+    grams = [token for token, kept in zip(tokens, keep) if kept]
+    grams.extend(f"{first} {second}" for first, second, kept_first, kept_second in zip(tokens, tokens[1:], keep, keep[1:])
+                 if kept_first and kept_second)
+    return grams
+
+
+def feature_hash(gram, n_features=N_FEATURES):
+    """Column of an n-gram; stable across processes, unlike ``hash()``"""
+    return zlib.crc32(gram.encode()) % n_features
+
+
+def hashed_term_matrix(texts, n_features=N_FEATURES):
+    """Binary term-document matrix of ``texts`` as CSR ``(indptr, indices)``, columns sorted per row"""
+    indices, counts = [], []
+    for text in texts:
+        features = sorted({feature_hash(gram, n_features) for gram in ngrams(text)})
+        indices.extend(features)
+        counts.append(len(features))
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, np.array(indices, dtype=np.int32)
+
+
+def discovery_buckets(df):
+    """Boolean row masks of the reviews worth mining: unexplained complaints and all negative reviews"""
+    labels = df['sentiment_label'].to_numpy()
+    return {
+        GENERAL_THEME: (df['theme'].to_numpy() == GENERAL_THEME) & (labels != 'positive'),
+        'Negative reviews': labels == 'negative',
+    }
+
+
+def document_frequencies(texts, masks, n_features=N_FEATURES, batch_rows=BATCH_ROWS):
+    """Reviews containing each hashed n-gram of a text Series: overall, and inside each bucket of ``masks``"""
+    total = np.zeros(n_features, dtype=np.int64)
+    inside = {name: np.zeros(n_features, dtype=np.int64) for name in masks}
+    for start in range(0, len(texts), batch_rows):
+        indptr, indices = hashed_term_matrix(texts.iloc[start:start + batch_rows], n_features)
+        total += np.bincount(indices, minlength=n_features)
+        lengths = np.diff(indptr)
+        for name, mask in masks.items():
+            in_bucket = np.repeat(mask[start:start + batch_rows], lengths)
+            inside[name] += np.bincount(indices[in_bucket], minlength=n_features)
+    return total, inside
+
+
+def distinctive_features(inside, total, bucket_rows, total_rows, min_reviews=MIN_REVIEWS):
+    """Features over-represented in a bucket, most distinctive first, with their smoothed log-odds z-scores"""
+    outside, outside_rows = total - inside, total_rows - bucket_rows
+    log_odds = (np.log(inside + 0.5) - np.log(bucket_rows - inside + 0.5)
+                - np.log(outside + 0.5) + np.log(outside_rows - outside + 0.5))
+    variance = 1 / (inside + 0.5) + 1 / (bucket_rows - inside + 0.5) + 1 / (outside + 0.5) + 1 / (outside_rows - outside + 0.5)
+    z = log_odds / np.sqrt(variance)
+    candidates = np.flatnonzero((inside >= min_reviews) & (z > 0))
+    order = np.argsort(-z[candidates], kind='stable')
+    return candidates[order], z[candidates[order]]
+
+
+def _project(texts, columns, n_features):
+    """Rows of ``texts`` restricted to the chosen features as CSR over their column numbers, plus the n-grams seen per column"""
+    indices, counts, names = [], [], [Counter() for _ in range(columns.max() + 1)]
+    for text in texts:
+        found = {}
+        for gram in ngrams(text):
+            column = columns[feature_hash(gram, n_features)]
+            if column >= 0:
+                found[column] = gram
+                names[column][gram] += 1
+        indices.extend(sorted(found))
+        counts.append(len(found))
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, np.array(indices, dtype=np.int32), names
+
+
+def _dense_rows(indptr, indices, weights, start, stop):
+    """L2-normalised TF-IDF rows ``start:stop`` of a binary CSR matrix"""
+    rows = np.zeros((stop - start, len(weights)), dtype=np.float32)
+    lo, hi = indptr[start], indptr[stop]
+    rows[np.repeat(np.arange(stop - start), np.diff(indptr[start:stop + 1])), indices[lo:hi]] = weights[indices[lo:hi]]
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return np.divide(rows, norms, out=rows, where=norms > 0)
+
+
+def _initial_centroids(rows, k, rng):
+    """k-means++ seeding under cosine distance"""
+    centroids = [rows[rng.integers(len(rows))]]
+    distance = 1 - rows @ centroids[0]
+    while len(centroids) < k:
+        weights = np.clip(distance, 0, None)
+        if weights.sum() <= 0:
+            break
+        chosen = rows[rng.choice(len(rows), p=weights / weights.sum())]
+        centroids.append(chosen)
+        distance = np.minimum(distance, 1 - rows @ chosen)
+    return np.array(centroids)
+
+
+def minibatch_kmeans(indptr, indices, weights, k, batch_rows=BATCH_ROWS, epochs=5, seed=42):
+    """Spherical mini-batch k-means over a binary CSR matrix; returns (labels, similarities, centroids).
+
+    Rows without any feature are labelled -1. Only one batch is densified at
+    a time, so memory stays bounded by ``batch_rows`` x features.
+    """
+    rows = len(indptr) - 1
+    labels, similarity = np.full(rows, -1, dtype=np.int32), np.zeros(rows, dtype=np.float32)
+    batches = [(start, min(start + batch_rows, rows)) for start in range(0, rows, batch_rows)]
+    first = _dense_rows(indptr, indices, weights, *batches[0]) if batches else None
+    first = first[first.any(axis=1)] if first is not None else None
+    if first is None or not len(first):
+        return labels, similarity, np.zeros((0, len(weights)), dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    centroids = _initial_centroids(first, min(k, len(first)), rng)
+    seen = np.zeros(len(centroids))
+    for _ in range(epochs):
+        for start, stop in batches:
+            batch = _dense_rows(indptr, indices, weights, start, stop)
+            batch = batch[batch.any(axis=1)]
+            if not len(batch):
+                continue
+            assigned = (batch @ centroids.T).argmax(axis=1)
+            members = np.zeros((len(centroids), len(batch)), dtype=np.float32)
+            members[assigned, np.arange(len(batch))] = 1
+            sizes = members.sum(axis=1)
+            seen += sizes
+            # Each centre moves toward its batch mean with a step that shrinks as it absorbs more rows
+            step = np.divide(sizes, seen, out=np.zeros_like(sizes), where=seen > 0)[:, None]
+            means = np.divide(members @ batch, sizes[:, None], out=np.zeros_like(centroids), where=sizes[:, None] > 0)
+            centroids += step * (means - centroids)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+    for start, stop in batches:
+        batch = _dense_rows(indptr, indices, weights, start, stop)
+        scores = batch @ centroids.T
+        present = batch.any(axis=1)
+        labels[start:stop] = np.where(present, scores.argmax(axis=1), -1)
+        similarity[start:stop] = np.where(present, scores.max(axis=1), 0)
+    return labels, similarity, centroids
+
+
+def discover_themes(df, n_terms=20, n_clusters=8, n_features=N_FEATURES, batch_rows=BATCH_ROWS, seed=42):
+    """Distinctive n-grams and candidate clusters for each discovery bucket of an enriched frame"""
+    # Text stays in the frame's own (Arrow) storage; batches are materialised one at a time
+    texts = english_text(df).fillna('')
+    masks = discovery_buckets(df)
+    total, inside = document_frequencies(texts, masks, n_features, batch_rows)
+
+    report = []
+    for name, mask in masks.items():
+        bucket_rows = int(mask.sum())
+        features, z = distinctive_features(inside[name], total, bucket_rows, len(texts))
+        features, z = features[:CLUSTER_TERMS], z[:CLUSTER_TERMS]
+        entry = {'bucket': name, 'reviews': bucket_rows, 'ngrams': [], 'clusters': [], 'unclustered': bucket_rows}
+        report.append(entry)
+        if not len(features):
+            continue
+
+        columns = np.full(n_features, -1, dtype=np.int32)
+        columns[features] = np.arange(len(features))
+        positions = np.flatnonzero(mask)
+        indptr, indices, seen_grams = _project(texts.iloc[positions], columns, n_features)
+        # A hash bucket may hold several n-grams; it is named after the commonest one in this bucket
+        names = [grams.most_common(1)[0][0] if grams else '' for grams in seen_grams]
+
+        outside_share = (total[features] - inside[name][features] + 0.5) / (len(texts) - bucket_rows + 0.5)
+        for column, feature in enumerate(features[:n_terms]):
+            share = inside[name][feature] / bucket_rows
+            entry['ngrams'].append({
+                'ngram': names[column],
+                'reviews': int(inside[name][feature]),
+                'share': round(float(share), 4),
+                'lift': round(float(share / outside_share[column]), 2),
+                'z': round(float(z[column]), 2),
+            })
+
+        idf = (np.log(bucket_rows / inside[name][features]) + 1).astype(np.float32)
+        labels, similarity, centroids = minibatch_kmeans(indptr, indices, idf, n_clusters, batch_rows, seed=seed)
+        entry['unclustered'] = int((labels < 0).sum())
+        for cluster, centroid in enumerate(centroids):
+            members = np.flatnonzero(labels == cluster)
+            if not len(members):
+                continue
+            terms = [names[column] for column in np.argsort(-centroid, kind='stable')[:5] if centroid[column] > 0]
+            closest = members[np.argsort(-similarity[members], kind='stable')[:3]]
+            entry['clusters'].append({
+                'label': ' / '.join(terms[:3]),
+                'terms': terms,
+                'count': len(members),
+                'share': round(len(members) / bucket_rows, 4),
+                'quotes': texts.iloc[positions[closest]].tolist(),
+            })
+        entry['clusters'].sort(key=lambda cluster: cluster['count'], reverse=True)
+    return report
@@ -0,0 +1,230 @@
+"""Chunked CSV ingestion: filter, score and classify reviews a chunk at a time"""
+import logging
+
+import pandas as pd
+
+from .classifier import current_classifier
+from .layout import compact_reviews, concat_compact, english_text
+from .parallel import ParallelScorer
+from .sentiment import current_lexicon, label_sentiment, score_sentiment
+from .store import TRANSLATION_STORE
+from .translation import TRANSLATOR, translate_reviews
+
+logger = logging.getLogger(__name__)
+
+# Only these columns are read; declaring dtypes up front skips inference.
+# The score is nullable so one blank rating does not fail the whole load
+REVIEW_DTYPES = {
+    'reviewText': 'object',
+    'reviewTitle': 'object',
+    'reviewScore': 'Int64',
+    'reviewLanguage': 'object',
+    'reviewUrl': 'object'
+}
+
+# Columns enrich_reviews derives from the review text, in the order it adds them
+DERIVED_COLUMNS = ['reviewText_en', 'sentiment', 'sentiment_label', 'theme']
+
+# Columns derived by each rule set of ``store.scoring_versions``
+RULE_COLUMNS = {'sentiment': ['sentiment', 'sentiment_label'], 'theme': ['theme']}
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def log_progress(stage, chunk_index, rows):
+    """Default progress callback: one log line per stage per chunk"""
+    logger.info("chunk %d: %s (%d rows)", chunk_index, stage, rows)
+
+
+def untranslated(df):
+    """Row labels of reviews left untranslated because their translation batch failed"""
+    if 'reviewText_en' not in df.columns:
+        return []
+    return df.index[df['reviewText_en'].isna() & df['reviewText'].notna()].tolist()
+
+
+def _select_language(df, language, translator):
+    """Rows to enrich: all of them when translating, otherwise only ``language``"""
+    if translator is None:
+        return df[df['reviewLanguage'] == language]
+    return df
+
+
+def enrich_reviews(df, language='en', progress=None, chunk_index=0, scorer=None, translator=TRANSLATOR, translation_store=TRANSLATION_STORE,
+                   classifier=None, lexicon=None):
+    """Translate or filter to one language and add sentiment and theme columns.
+
+    Without a ``translator`` reviews in other languages are dropped; with
+    one, reviews whose translation failed keep a NaN reviewText_en and are
+    scored on their source text. With a running ``ParallelScorer`` the scoring and classification are sharded
+    across its worker processes. ``classifier`` and ``lexicon`` default to
+    the current rules.
+    """
+    progress = progress or log_progress
+    classifier, lexicon = classifier or current_classifier(), lexicon or current_lexicon()
+
+    df = _select_language(df, language, translator).copy()
+    progress('filtered', chunk_index, len(df))
+
+    if translator is None:
+        df['reviewText_en'] = df['reviewText']
+    else:
+        df['reviewText_en'] = translate_reviews(df['reviewText'], df['reviewLanguage'], translator, translation_store, target=language)
+        progress('translated', chunk_index, len(df))
+    text = english_text(df)
+    if scorer is None:
+        df['sentiment'] = score_sentiment(text, lexicon=lexicon)
+        df['sentiment_label'] = label_sentiment(df['sentiment'], lexicon)
+        progress('scored', chunk_index, len(df))
+
+        # Classify once at load so every view reuses the same theme column
+        df['theme'] = classifier.classify_many(text)
+    else:
+        sentiment, themes = scorer.score(text, classifier, lexicon)
+        df['sentiment'] = sentiment
+        df['sentiment_label'] = label_sentiment(df['sentiment'], lexicon)
+        progress('scored', chunk_index, len(df))
+        df['theme'] = themes
+    progress('classified', chunk_index, len(df))
+    return df
+
+
+def row_hashes(df):
+    """Hash of each review's source columns, so edited reviews can be told apart"""
+    # Cast back from the compact layout so stored and freshly read rows hash alike
+    return pd.util.hash_pandas_object(df[list(REVIEW_DTYPES)].astype(REVIEW_DTYPES), index=False)
+
+
+def _derived_lookup(previous, language='en', translator=None):
+    """Index previously derived columns by (reviewUrl, row hash).
+
+    With a ``translator``, reviews in other languages without a stored
+    translation are left out, so a failed translation is retried; those
+    the backend returned unchanged are served from the translation store.
+    """
+    if previous is None or previous.empty:
+        return None
+    if translator is not None:
+        missing = previous['reviewText_en'].isna() if 'reviewText_en' in previous.columns else True
+        previous = previous[~((previous['reviewLanguage'] != language) & missing)]
+    keys = pd.MultiIndex.from_arrays([previous['reviewUrl'], row_hashes(previous)])
+    derived = {column: previous[column] for column in DERIVED_COLUMNS if column != 'reviewText_en'}
+    lookup = pd.DataFrame({'reviewText_en': english_text(previous), **derived})[DERIVED_COLUMNS].set_axis(keys)
+    return lookup[~lookup.index.duplicated()]
+
+
+def _rescore(df, rescore, scorer, classifier, lexicon):
+    """Recompute the columns of already enriched rows whose rule set changed, keeping the others"""
+    if df.empty or not rescore:
+        return df
+    if scorer is not None:
+        sentiment, themes = scorer.score(df['reviewText_en'], classifier, lexicon)
+    else:
+        sentiment = score_sentiment(df['reviewText_en'], lexicon=lexicon) if 'sentiment' in rescore else None
+        themes = classifier.classify_many(df['reviewText_en']) if 'theme' in rescore else None
+    df = df.copy()
+    if 'sentiment' in rescore:
+        df['sentiment'] = sentiment
+        df['sentiment_label'] = label_sentiment(sentiment, lexicon)
+    if 'theme' in rescore:
+        df['theme'] = themes
+    return df
+
+
+def _merge_chunk(chunk, lookup, language, progress, chunk_index, scorer, translator, translation_store, classifier, lexicon, rescore=()):
+    """Reuse derived columns for known reviews and only enrich new or edited ones.
+
+    ``rescore`` names the rule sets (keys of ``RULE_COLUMNS``) changed since
+    ``lookup`` was derived; their columns are recomputed for known reviews
+    too, while the translation and the other columns are kept.
+    """
+    chunk = _select_language(chunk, language, translator)
+    keys = pd.MultiIndex.from_arrays([chunk['reviewUrl'], row_hashes(chunk)])
+    known = lookup.reindex(keys)
+    reused = known['theme'].notna().to_numpy()
+    progress('reused', chunk_index, int(reused.sum()))
+
+    kept = chunk[reused].assign(**{column: known[column].to_numpy()[reused] for column in DERIVED_COLUMNS})
+    if rescore:
+        kept = _rescore(kept, rescore, scorer, classifier, lexicon)
+        progress('rescored', chunk_index, len(kept))
+    fresh = enrich_reviews(chunk[~reused], language=language, progress=progress, chunk_index=chunk_index, scorer=scorer,
+                           translator=translator, translation_store=translation_store, classifier=classifier, lexicon=lexicon)
+    # Restore file order; the index is the row position in the CSV
+    return pd.concat([kept, fresh]).sort_index()
+
+
+def iter_enriched_chunks(path, chunksize=DEFAULT_CHUNKSIZE, language='en', progress=None, previous=None, scorer=None, translator=TRANSLATOR,
+                         translation_store=TRANSLATION_STORE, classifier=None, lexicon=None, rescore=()):
+    """Yield enriched chunks of a review CSV without loading the whole file.
+
+    With ``previous`` (an earlier enriched frame) only reviews whose
+    reviewUrl is new, or whose content changed, are scored and classified,
+    plus the columns of the rule sets named in ``rescore``.
+    """
+    progress = progress or log_progress
+    # Resolved once so every chunk is scored with the same rules, even if the rule file changes meanwhile
+    classifier, lexicon = classifier or current_classifier(), lexicon or current_lexicon()
+    lookup = _derived_lookup(previous, language, translator)
+    reader = pd.read_csv(path, usecols=list(REVIEW_DTYPES), dtype=REVIEW_DTYPES, chunksize=chunksize)
+    with reader:
+        for chunk_index, chunk in enumerate(reader):
+            progress('read', chunk_index, len(chunk))
+            if lookup is None:
+                yield enrich_reviews(chunk, language=language, progress=progress, chunk_index=chunk_index, scorer=scorer, translator=translator,
+                                     translation_store=translation_store, classifier=classifier, lexicon=lexicon)
+            else:
+                yield _merge_chunk(chunk, lookup, language, progress, chunk_index, scorer, translator, translation_store, classifier, lexicon, rescore)
+
+
+def load_reviews(path, chunksize=DEFAULT_CHUNKSIZE, language='en', progress=None, previous=None, workers=None, translator=TRANSLATOR,
+                 translation_store=TRANSLATION_STORE, classifier=None, lexicon=None, rescore=()):
+    """Read, filter and enrich a review CSV chunk by chunk.
+
+    Peak memory is one raw chunk plus the retained rows, instead of the
+    whole file including every non-English review. Passing the previous
+    enriched frame makes the refresh incremental: refresh cost scales with
+    the number of new or edited reviews, not the whole history. When rule
+    sets changed since ``previous`` was built, ``rescore`` names them and
+    only their columns are recomputed for the other reviews. With
+    ``workers`` > 1 scoring runs on a process pool shared by all chunks.
+    With a ``translator`` other languages are translated instead of dropped,
+    reusing any translation already in ``translation_store``; the row
+    labels of reviews whose translation failed are kept in
+    ``df.attrs['untranslated']``. The result is in the compact layout (see
+    ``layout.compact_reviews``).
+    """
+    progress = progress or log_progress
+    classifier, lexicon = classifier or current_classifier(), lexicon or current_lexicon()
+    options = dict(chunksize=chunksize, language=language, progress=progress, previous=previous, translator=translator,
+                   translation_store=translation_store, classifier=classifier, lexicon=lexicon, rescore=rescore)
+    if workers and workers > 1:
+        with ParallelScorer(workers, classifier, lexicon) as scorer:
+            chunks, failed = _collect_compact(iter_enriched_chunks(path, scorer=scorer, **options))
+    else:
+        chunks, failed = _collect_compact(iter_enriched_chunks(path, **options))
+    if chunks:
+        df = concat_compact(chunks)
+    else:
+        df = enrich_reviews(pd.DataFrame(columns=list(REVIEW_DTYPES)).astype(REVIEW_DTYPES), language=language, progress=progress, translator=translator,
+                            translation_store=translation_store, classifier=classifier, lexicon=lexicon)
+    df = compact_reviews(df)
+    df.attrs['untranslated'] = failed
+    progress('done', len(chunks), len(df))
+    return df
+
+
+def _collect_compact(chunks):
+    """Compact each enriched chunk as it arrives; also returns the labels of its failed translations"""
+    compacted, failed = [], []
+    for chunk in chunks:
+        # Counted before compacting, which also leaves unchanged translations NaN
+        failed.extend(untranslated(chunk))
+        compacted.append(compact_reviews(chunk))
+    return compacted, failed
+
+
+def count_reviews(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Number of reviews in a CSV, in every language"""
+    with pd.read_csv(path, usecols=['reviewLanguage'], dtype=REVIEW_DTYPES, chunksize=chunksize) as reader:
+        return sum(len(chunk) for chunk in reader)
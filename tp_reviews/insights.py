@@ -0,0 +1,221 @@
+"""Actionable insights and summary copy for each pain point theme"""
+
+
+def get_actionable_insights(theme_name, keywords, cluster_reviews):
+    """Generate detailed, specific actionable insights with problem-solution pairs"""
+    
+    insights = {
+        "Users Accusing Platform of Being a Scam/Fraud": {
+            "marketing": [
+                {
+                    "problem": "Users don't trust the platform due to lack of transparency",
+                    "solution": "Launch 'Trust Verification Program' - Create a public dashboard showing real-time payment data, user testimonials, and third-party verification badges. Partner with Trustpilot, BBB, and other trust organizations to display verified status.",
+                    "implementation": "Week 1: Design trust dashboard. Week 2: Integrate payment verification APIs. Week 3: Partner with trust organizations. Week 4: Launch campaign with case studies.",
+                    "expected_impact": "Reduce scam accusations by 60% within 3 months"
+                },
+                {
+                    "problem": "No proof of legitimate payments to users",
+                    "solution": "Create 'Payment Proof Gallery' - Develop a public showcase of real payment screenshots, video testimonials from long-term contributors, and payment verification certificates.",
+                    "implementation": "Week 1: Collect payment proofs from top contributors. Week 2: Create video testimonials. Week 3: Design gallery interface. Week 4: Launch with social media campaign.",
+                    "expected_impact": "Increase user confidence by 75%"
+                },
+                {
+                    "problem": "Lack of clear communication about platform legitimacy",
+                    "solution": "Implement 'Legitimacy Assurance' email sequence - Send new users a 5-email series explaining platform history, security measures, and success stories.",
+                    "implementation": "Week 1: Write email content. Week 2: Set up automation. Week 3: A/B test messaging. Week 4: Launch to all new users.",
+                    "expected_impact": "Reduce new user churn by 40%"
+                }
+            ],
+            "product": [
+                {
+                    "problem": "No real-time verification system for payments",
+                    "solution": "Build 'Payment Verification Engine' - Create automated system that verifies and displays payment confirmations in real-time with blockchain-like transparency.",
+                    "implementation": "Sprint 1: Design verification architecture. Sprint 2: Build payment tracking system. Sprint 3: Add real-time notifications. Sprint 4: Launch with dashboard.",
+                    "expected_impact": "Eliminate payment disputes by 90%"
+                },
+                {
+                    "problem": "Users can't verify platform authenticity",
+                    "solution": "Develop 'Trust Score System' - Implement a reputation scoring mechanism that shows user trust levels, verification status, and platform reliability metrics.",
+                    "implementation": "Sprint 1: Design scoring algorithm. Sprint 2: Build verification system. Sprint 3: Create user dashboard. Sprint 4: Launch with gamification.",
+                    "expected_impact": "Increase user retention by 50%"
+                }
+            ]
+        },
+        "Account Suspended Before Payment - Users Not Getting Paid": {
+            "marketing": [
+                {
+                    "problem": "Users feel cheated when suspended before payment",
+                    "solution": "Launch 'Payment Protection Guarantee' - Create a program that guarantees payment for completed work even if account is suspended, with clear appeal process.",
+                    "implementation": "Week 1: Design guarantee program. Week 2: Create appeal process. Week 3: Build payment protection system. Week 4: Launch with insurance partnership.",
+                    "expected_impact": "Reduce payment complaints by 80%"
+                },
+                {
+                    "problem": "No transparency in suspension reasons",
+                    "solution": "Implement 'Suspension Transparency' - Create detailed explanations for account suspensions with specific steps to resolve issues and appeal process.",
+                    "implementation": "Week 1: Design transparency system. Week 2: Create appeal workflow. Week 3: Build notification system. Week 4: Launch with support training.",
+                    "expected_impact": "Improve user satisfaction by 65%"
+                }
+            ],
+            "product": [
+                {
+                    "problem": "Automated suspensions without human review",
+                    "solution": "Build 'Human Review System' - Implement mandatory human review for all account suspensions with 24-hour response time and clear escalation process.",
+                    "implementation": "Sprint 1: Design review workflow. Sprint 2: Build review dashboard. Sprint 3: Add escalation system. Sprint 4: Launch with quality metrics.",
+                    "expected_impact": "Reduce wrongful suspensions by 95%"
+                },
+                {
+                    "problem": "No payment protection for suspended accounts",
+                    "solution": "Create 'Payment Escrow System' - Hold payments in escrow for 7 days after work completion, ensuring users get paid even if suspended.",
+                    "implementation": "Sprint 1: Design escrow system. Sprint 2: Build payment protection. Sprint 3: Add dispute resolution. Sprint 4: Launch with insurance.",
+                    "expected_impact": "Eliminate unpaid work issues by 100%"
+                }
+            ]
+        },
+        "Payment Delays or Missing Payments After Work Completed": {
+            "marketing": [
+                {
+                    "problem": "Users don't know when payments will arrive",
+                    "solution": "Launch 'Payment Timeline Promise' - Create guaranteed payment schedules with real-time tracking and milestone notifications.",
+                    "implementation": "Week 1: Design timeline system. Week 2: Build tracking interface. Week 3: Create notification system. Week 4: Launch with guarantees.",
+                    "expected_impact": "Reduce payment anxiety by 70%"
+                },
+                {
+                    "problem": "No communication about payment delays",
+                    "solution": "Implement 'Payment Status Updates' - Send proactive notifications about payment status, delays, and resolution steps.",
+                    "implementation": "Week 1: Design notification system. Week 2: Build status tracking. Week 3: Create communication templates. Week 4: Launch with automation.",
+                    "expected_impact": "Improve payment satisfaction by 85%"
+                }
+            ],
+            "product": [
+                {
+                    "problem": "Manual payment processing causing delays",
+                    "solution": "Build 'Automated Payment Engine' - Create system that processes payments automatically within 24 hours of work completion.",
+                    "implementation": "Sprint 1: Design automation system. Sprint 2: Build payment processing. Sprint 3: Add verification checks. Sprint 4: Launch with monitoring.",
+                    "expected_impact": "Reduce payment delays by 90%"
+                },
+                {
+                    "problem": "No payment tracking for users",
+                    "solution": "Develop 'Payment Dashboard' - Create real-time payment tracking with status updates, milestone notifications, and dispute resolution.",
+                    "implementation": "Sprint 1: Design dashboard. Sprint 2: Build tracking system. Sprint 3: Add notifications. Sprint 4: Launch with mobile app.",
+                    "expected_impact": "Increase payment transparency by 100%"
+                }
+            ]
+        },
+        "Poor Customer Support - Slow Response or No Help": {
+            "marketing": [
+                {
+                    "problem": "Users can't get help when needed",
+                    "solution": "Launch '24/7 Support Guarantee' - Implement live chat support with 2-hour response time guarantee and dedicated support team.",
+                    "implementation": "Week 1: Hire support team. Week 2: Set up live chat. Week 3: Create response time monitoring. Week 4: Launch with guarantees.",
+                    "expected_impact": "Improve support satisfaction by 80%"
+                },
+                {
+                    "problem": "No self-help resources available",
+                    "solution": "Create 'Support Knowledge Base' - Build comprehensive FAQ, video tutorials, and troubleshooting guides for common issues.",
+                    "implementation": "Week 1: Research common issues. Week 2: Create content. Week 3: Build knowledge base. Week 4: Launch with search optimization.",
+                    "expected_impact": "Reduce support tickets by 60%"
+                }
+            ],
+            "product": [
+                {
+                    "problem": "Manual ticket routing causing delays",
+                    "solution": "Build 'Smart Support System' - Implement AI-powered ticket routing with automatic categorization and priority assignment.",
+                    "implementation": "Sprint 1: Design AI system. Sprint 2: Build routing logic. Sprint 3: Add categorization. Sprint 4: Launch with monitoring.",
+                    "expected_impact": "Reduce response time by 75%"
+                },
+                {
+                    "problem": "No support tracking for users",
+                    "solution": "Develop 'Support Dashboard' - Create real-time ticket tracking with status updates, estimated resolution times, and escalation options.",
+                    "implementation": "Sprint 1: Design dashboard. Sprint 2: Build tracking system. Sprint 3: Add notifications. Sprint 4: Launch with mobile access.",
+                    "expected_impact": "Improve support transparency by 90%"
+                }
+            ]
+        },
+        "No Work Available - Empty Queues and Project Instability": {
+            "marketing": [
+                {
+                    "problem": "Users can't find consistent work",
+                    "solution": "Launch 'Work Availability Program' - Create guaranteed minimum work hours and project availability notifications with priority access.",
+                    "implementation": "Week 1: Design availability program. Week 2: Build notification system. Week 3: Create priority access. Week 4: Launch with guarantees.",
+                    "expected_impact": "Increase user retention by 70%"
+                },
+                {
+                    "problem": "No transparency about work availability",
+                    "solution": "Implement 'Work Queue Transparency' - Show real-time work availability, upcoming projects, and waitlist management.",
+                    "implementation": "Week 1: Design transparency system. Week 2: Build queue dashboard. Week 3: Add notifications. Week 4: Launch with predictions.",
+                    "expected_impact": "Improve user satisfaction by 65%"
+                }
+            ],
+            "product": [
+                {
+                    "problem": "Manual work assignment causing delays",
+                    "solution": "Build 'Smart Work Assignment' - Create AI-powered system that matches users to available work based on skills and availability.",
+                    "implementation": "Sprint 1: Design matching algorithm. Sprint 2: Build assignment system. Sprint 3: Add skill matching. Sprint 4: Launch with optimization.",
+                    "expected_impact": "Increase work efficiency by 80%"
+                },
+                {
+                    "problem": "No work forecasting for users",
+                    "solution": "Develop 'Work Forecasting Dashboard' - Create predictive analytics showing upcoming work availability and skill demand.",
+                    "implementation": "Sprint 1: Design forecasting model. Sprint 2: Build prediction system. Sprint 3: Add dashboard. Sprint 4: Launch with alerts.",
+                    "expected_impact": "Improve user planning by 90%"
+                }
+            ]
+        }
+    }
+    
+    return insights.get(theme_name, {
+        "marketing": [
+            {
+                "problem": "Generic issue without specific solution",
+                "solution": "Create targeted campaign addressing specific user concerns with clear value proposition and measurable outcomes.",
+                "implementation": "Week 1: Research issue. Week 2: Design solution. Week 3: Build campaign. Week 4: Launch and monitor.",
+                "expected_impact": "Improve user satisfaction by 50%"
+            }
+        ],
+        "product": [
+            {
+                "problem": "Generic technical issue",
+                "solution": "Implement specific technical solution with clear requirements, timeline, and success metrics.",
+                "implementation": "Sprint 1: Design solution. Sprint 2: Build feature. Sprint 3: Test and refine. Sprint 4: Launch with monitoring.",
+                "expected_impact": "Resolve technical issues by 80%"
+            }
+        ]
+    })
+
+
+def get_theme_summary(theme_name):
+    """Generate a concise summary paragraph for each pain point theme"""
+    
+    summaries = {
+        "Users Accusing Platform of Being a Scam/Fraud": 
+            "Users are expressing deep distrust in the platform's legitimacy, often citing lack of transparency in payments, unclear verification processes, and feeling deceived by the platform's operations. This creates a critical trust crisis that directly impacts user retention and platform credibility.",
+        
+        "Account Suspended Before Payment - Users Not Getting Paid": 
+            "Users are experiencing account suspensions immediately after completing work but before receiving payment, leaving them feeling cheated and frustrated. This creates a significant barrier to user trust and platform reliability.",
+        
+        "Payment Delays or Missing Payments After Work Completed": 
+            "Users are facing inconsistent and delayed payment processing after completing their work, with unclear timelines and poor communication about payment status. This undermines user confidence in the platform's payment reliability.",
+        
+        "Accounts Suspended/Blocked Without Clear Explanation": 
+            "Users are being suspended or blocked from the platform without receiving clear explanations or having access to a proper appeal process. This creates frustration and a sense of unfair treatment.",
+        
+        "Poor Customer Support - Slow Response or No Help": 
+            "Users are struggling to get timely and effective support when facing issues, with long response times, unhelpful responses, or complete lack of assistance. This leaves users feeling abandoned and frustrated.",
+        
+        "No Work Available - Empty Queues and Project Instability": 
+            "Users are experiencing inconsistent work availability with empty project queues and unstable project assignments, making it difficult to maintain consistent income and engagement with the platform.",
+        
+        "Excessive Unpaid Training and Assessment Requirements": 
+            "Users are required to complete extensive unpaid training and assessments before accessing work opportunities, creating a barrier to entry and frustration about time investment without immediate returns.",
+        
+        "Platform Technical Problems and System Bugs": 
+            "Users are encountering frequent technical issues, system bugs, and platform instability that hinder their ability to complete work efficiently and reliably.",
+        
+        "Concerns About Personal Data Collection and Privacy": 
+            "Users are worried about how their personal data is being collected, stored, and used by the platform, with concerns about privacy protection and data security.",
+        
+        "General Issues": 
+            "Users are experiencing various platform-related issues that impact their overall experience and satisfaction with the service."
+    }
+    
+    return summaries.get(theme_name, "Users are experiencing issues that impact their platform experience and satisfaction.")
@@ -0,0 +1,102 @@
+"""Compact in-memory layout of the enriched reviews frame"""
+import sys
+
+import pandas as pd
+
+# Low-cardinality labels are stored as categoricals: one byte per row plus one copy of each label
+CATEGORICAL_COLUMNS = ['reviewLanguage', 'sentiment_label', 'theme']
+NARROW_DTYPES = {'reviewScore': 'Int8', 'sentiment': 'float32'}
+# Arrow-backed strings keep each column's UTF-8 in one buffer instead of a Python object per cell
+TEXT_COLUMNS = ['reviewText', 'reviewTitle', 'reviewUrl', 'reviewText_en']
+TEXT_DTYPE = 'string[pyarrow]'
+LEGACY_DTYPES = {'reviewScore': 'Int64', 'sentiment': 'float64'}
+
+
+def english_text(df):
+    """English text of each review: its translation where it has one, else the original"""
+    if 'reviewText_en' not in df.columns:
+        return df['reviewText']
+    return df['reviewText_en'].fillna(df['reviewText'])
+
+
+def compact_reviews(df):
+    """Convert an enriched frame to the compact layout in place and return it.
+
+    Labels become categoricals, numbers narrow types and text Arrow strings.
+    reviewText_en keeps only translations that differ from the original
+    text and is dropped when there are none, so English-only frames do not
+    carry a second reference to every review; read it through
+    ``english_text``. Already compact frames are left as they are.
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column, dtype in NARROW_DTYPES.items():
+        if column in df.columns and df[column].dtype != dtype:
+            df[column] = df[column].astype(dtype)
+    if 'reviewText_en' in df.columns:
+        translated = df['reviewText_en'].notna() & df['reviewText_en'].ne(df['reviewText'])
+        if translated.any():
+            df['reviewText_en'] = df['reviewText_en'].where(translated)
+        else:
+            del df['reviewText_en']
+    for column in TEXT_COLUMNS:
+        if column in df.columns and df[column].dtype != TEXT_DTYPE:
+            df[column] = df[column].astype(TEXT_DTYPE)
+    return df
+
+
+def concat_compact(frames):
+    """Concatenate compact frames, e.g. the chunks of one load, keeping their categoricals.
+
+    Each categorical column is first given the union of the frames'
+    categories: pd.concat falls back to object columns when they differ.
+    """
+    frames = list(frames)
+    for column in CATEGORICAL_COLUMNS:
+        present = [frame for frame in frames if column in frame.columns]
+        categories = pd.Index(sorted(set().union(*(frame[column].cat.categories for frame in present)))) if present else None
+        for frame in present:
+            if not frame[column].cat.categories.equals(categories):
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames)
+
+
+def legacy_layout(df):
+    """A compact frame in the original layout: object text and labels, 64-bit numbers and a full reviewText_en"""
+    columns = {column: df[column].astype(object) for column in CATEGORICAL_COLUMNS + TEXT_COLUMNS if column in df.columns}
+    columns.update({column: df[column].astype(dtype) for column, dtype in LEGACY_DTYPES.items() if column in df.columns})
+    columns['reviewText_en'] = columns['reviewText']
+    if 'reviewText_en' in df.columns:
+        columns['reviewText_en'] = columns['reviewText_en'].where(df['reviewText_en'].isna(), df['reviewText_en'].astype(object))
+    return df.assign(**columns)
+
+
+def frame_bytes(df):
+    """Bytes held by a frame, counting each Python object once even when several cells share it"""
+    seen = set()
+    total = df.index.memory_usage(deep=True)
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object:
+            total += values.memory_usage(index=False, deep=True)
+            continue
+        total += values.memory_usage(index=False, deep=False)
+        for value in values.to_numpy():
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def layout_report(df):
+    """Bytes per row of a compact frame and of the same data in the original layout"""
+    rows = max(len(df), 1)
+    before, after = frame_bytes(legacy_layout(df)), frame_bytes(df)
+    return {
+        'rows': len(df),
+        'bytes_before': int(before),
+        'bytes_after': int(after),
+        'bytes_per_row_before': round(before / rows, 1),
+        'bytes_per_row_after': round(after / rows, 1),
+    }
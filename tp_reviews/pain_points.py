@@ -0,0 +1,77 @@
+"""Pain point extraction: group non-positive reviews by theme"""
+import numpy as np
+import pandas as pd
+
+from .classifier import current_classifier
+from .insights import get_actionable_insights
+from .layout import english_text
+
+# Removed old clustering-based theme detection - replaced with expert system
+
+
+def extract_pain_points(df, n_clusters=5, duplicate_of=None, unique_voices=False):
+    """Extract pain points using expert system classification instead of clustering.
+
+    ``duplicate_of`` (from ``find_duplicates``) maps each review to the first
+    review of its near-duplicate group. Each theme then reports how many of
+    its reviews are copies and how many distinct voices it has; with
+    ``unique_voices`` the theme is counted, ranked and quoted by those
+    distinct voices instead of by raw rows.
+    """
+    # Work on row positions of the non-positive reviews rather than a copy of them
+    positions = np.flatnonzero((df['sentiment_label'] != 'positive').to_numpy())
+    
+    if len(positions) == 0:
+        return []
+    
+    texts = english_text(df)
+    # Classify each review into themes, unless the loader already did
+    if 'theme' in df.columns:
+        themes = df['theme'].iloc[positions]
+    else:
+        themes = pd.Series(current_classifier().classify_many(texts.iloc[positions]))
+    
+    # Group by themes and create summaries
+    theme_groups = themes.groupby(themes.to_numpy()).indices
+    
+    top_themes = []
+    for theme_name, members in theme_groups.items():
+        rows = positions[members]
+        # Near-duplicates within the theme collapse onto their earliest review
+        voices = rows if duplicate_of is None else np.sort(rows[np.unique(duplicate_of[rows], return_index=True)[1]])
+        if unique_voices:
+            rows = voices
+        group = texts.iloc[rows]
+        if len(group) < 2:  # Skip themes with only 1 review
+            continue
+            
+        # Get sample quotes
+        quotes = group.sample(min(3, len(group)), random_state=42).tolist()
+        
+        # Create impact assessment
+        impact = ("This pain point may discourage high quality contributors, "
+                   "leading to lower retention and engagement, which could impact our next quarter goal of focusing on high quality contributors.")
+        
+        # Get actionable insights
+        actionable_insights = get_actionable_insights(theme_name, [], group)
+        
+        duplicates = len(members) - len(voices)
+        if unique_voices:
+            summary = f"{len(group)} unique users affected" + (f" ({len(members)} reviews)" if duplicates else "")
+        else:
+            summary = f"{len(group)} users affected" + (f" ({duplicates} near-duplicate review{'s' if duplicates > 1 else ''})" if duplicates else "")
+        
+        top_themes.append({
+            'theme': theme_name,
+            'summary': summary,
+            'count': len(group),
+            'unique_count': len(voices),
+            'duplicates': duplicates,
+            'quotes': quotes,
+            'impact': impact,
+            'keywords': [],
+            'actionable_insights': actionable_insights
+        })
+    
+    # Sort by count and return top themes (all of them when n_clusters is None)
+    return sorted(top_themes, key=lambda x: x['count'], reverse=True)[:n_clusters]
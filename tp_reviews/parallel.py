@@ -0,0 +1,84 @@
+"""Process-pool backend for scoring and classifying large review sets"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .classifier import current_classifier
+from .sentiment import current_lexicon, score_sentiment
+
+# Several shards per worker keep cores busy when shards finish unevenly
+SHARDS_PER_WORKER = 4
+
+# (classifier, lexicon) of this worker process, set once by the pool initializer
+_worker_rules = None
+
+
+def _load_rules(classifier, lexicon):
+    """Pool initializer: keep the rules the parent resolved for every shard this worker scores"""
+    global _worker_rules
+    _worker_rules = classifier, lexicon
+
+
+def _score_shard(texts):
+    """Worker entry point: sentiment scores and themes for one shard of texts"""
+    classifier, lexicon = _worker_rules
+    texts = pd.Series(texts, dtype='object')
+    return score_sentiment(texts, lexicon=lexicon).to_numpy(), classifier.classify_many(texts)
+
+
+class ParallelScorer:
+    """Shards review texts across worker processes and reassembles them in order.
+
+    Workers run the same pure functions as the serial path, so results are
+    identical to ``score_sentiment`` / ``ThemeClassifier.classify_many``.
+    Use as a context manager so the pool is started once and reused for
+    every chunk of an ingestion run. ``classifier`` and ``lexicon``
+    (default: the current rules) are resolved when the pool starts and
+    sent to each worker once; tasks only carry their texts.
+    """
+
+    def __init__(self, workers=None, classifier=None, lexicon=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.classifier, self.lexicon = classifier, lexicon
+        self._executor = None
+
+    def __enter__(self):
+        self.classifier, self.lexicon = self.classifier or current_classifier(), self.lexicon or current_lexicon()
+        # spawn keeps workers clear of locks held by threads in the parent
+        # (the Streamlit server runs several)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_load_rules, initargs=(self.classifier, self.lexicon))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown()
+        self._executor = None
+
+    def score(self, texts, classifier=None, lexicon=None):
+        """Return (sentiment Series, list of themes) for a Series of review texts.
+
+        Workers score with the rules the pool was started with, so workers
+        never read a newer rule file than the parent resolved; passing a
+        ``classifier`` or ``lexicon`` of another version is an error.
+        """
+        if self._executor is None:
+            raise RuntimeError("ParallelScorer must be used as a context manager")
+        for given, started in ((classifier, self.classifier), (lexicon, self.lexicon)):
+            if given is not None and given.version != started.version:
+                raise ValueError("ParallelScorer workers were started with other rules; start a new pool for these")
+        if texts.empty:
+            return score_sentiment(texts, lexicon=self.lexicon), []
+
+        n_shards = min(len(texts), self.workers * SHARDS_PER_WORKER)
+        values = texts.to_numpy(dtype=object)
+        shards = [shard.tolist() for shard in np.array_split(values, n_shards)]
+
+        scores, themes = [], []
+        # map yields results in submission order, so rows come back aligned
+        for shard_scores, shard_themes in self._executor.map(_score_shard, shards):
+            scores.append(shard_scores)
+            themes.extend(shard_themes)
+        return pd.Series(np.concatenate(scores), index=texts.index, name='sentiment'), themes
@@ -0,0 +1,138 @@
+"""Load enriched reviews and the summaries derived from them through the artifact store"""
+import logging
+
+import pandas as pd
+
+from .classifier import current_classifier
+from .cube import ReviewCube
+from .database import REVIEW_DATABASE, SqlReviews
+from .dedup import find_duplicates
+from .discovery import discover_themes
+from .ingest import load_reviews, log_progress
+from .layout import compact_reviews, english_text
+from .pain_points import extract_pain_points
+from .sentiment import current_lexicon
+from .store import ARTIFACT_STORE, enrichment_key, partial_key, scoring_versions
+from .theme_matrix import ThemeMatrix
+from .translation import TRANSLATOR
+
+logger = logging.getLogger(__name__)
+
+
+def load_enriched(path, store=ARTIFACT_STORE, workers=None, progress=None, translator=TRANSLATOR):
+    """Return the enriched frame for a review CSV, scoring only what the store lacks.
+
+    The artifact key is kept in ``df.attrs['fingerprint']`` so caches
+    derived from the frame can be keyed on it. ``progress`` also receives
+    'fingerprinted' and, on a store hit, 'artifact_loaded' events.
+
+    A frame some of whose translations failed is stored under its own key
+    (``store.partial_key``), so the next load misses the full key and
+    retries them, reusing everything else.
+    """
+    progress = progress or log_progress
+    # The rules are resolved once, so the key and the columns agree even if the rule file changes mid-load
+    classifier, lexicon = current_classifier(), current_lexicon()
+    # Reuse the enriched frame from disk when this CSV was already scored
+    # with the current classifier and lexicon; otherwise only score the
+    # reviews that changed since the last artifact built from this file,
+    # and only rerun the rule sets that changed since then
+    key = enrichment_key(path, classifier, lexicon, translator)
+    progress('fingerprinted', 0, 0)
+    df = store.load(key)
+    if df is not None:
+        # Artifacts written before the compact layout are converted on load
+        df = compact_reviews(df)
+        progress('artifact_loaded', 0, len(df))
+    else:
+        versions = scoring_versions(classifier, lexicon, translator)
+        previous, rescore = store.load_latest(path, versions=versions)
+        df = load_reviews(path, progress=progress, previous=previous, workers=workers, translator=translator,
+                          translation_store=store.translations, classifier=classifier, lexicon=lexicon, rescore=rescore)
+        untranslated = df.attrs.pop('untranslated', None)
+        if untranslated:
+            logger.warning("%d reviews of %s could not be translated; they are retried on the next load", len(untranslated), path)
+            key = partial_key(key, untranslated)
+        store.save(key, df, source=path, versions=versions)
+    df.attrs['fingerprint'] = key
+    return df
+
+
+def _fingerprint(reviews):
+    return reviews.fingerprint if isinstance(reviews, SqlReviews) else reviews.attrs['fingerprint']
+
+
+def _frame(reviews):
+    """The enriched frame itself, or a ``SqlReviews`` dataset read back from the database"""
+    return reviews.frame() if isinstance(reviews, SqlReviews) else reviews
+
+
+def load_database(path, database=REVIEW_DATABASE, store=ARTIFACT_STORE, workers=None, progress=None, translator=TRANSLATOR):
+    """SQL view (``database.SqlReviews``) of a review CSV's enriched reviews.
+
+    The reviews are only enriched and written to the database when their
+    fingerprint is not stored yet; otherwise nothing is read into memory.
+    """
+    reviews = database.dataset(enrichment_key(path, translator=translator))
+    if reviews is None:
+        df = load_enriched(path, store, workers=workers, progress=progress, translator=translator)
+        reviews = database.write(df, source=path)
+    return reviews
+
+
+def load_duplicates(df, store=ARTIFACT_STORE):
+    """``duplicate_of`` position of every review of an enriched frame, found once per fingerprint"""
+    key = _fingerprint(df)
+    stored = store.load(key, 'duplicates')
+    if stored is None:
+        duplicate_of = find_duplicates(_frame(df))
+        store.save(key, pd.DataFrame({'duplicate_of': duplicate_of}), 'duplicates')
+        return duplicate_of
+    return stored['duplicate_of'].to_numpy()
+
+
+def load_pain_points(df, store=ARTIFACT_STORE, unique_voices=False):
+    """All pain point themes of an enriched frame, precomputed once per fingerprint and counting mode.
+
+    Like the other summaries, ``df`` may be a ``SqlReviews`` dataset, which
+    is only read back into memory when the summary is not stored yet.
+    """
+    key, kind = _fingerprint(df), 'pain_points_unique' if unique_voices else 'pain_points'
+    pain_points = store.load_json(key, kind)
+    if pain_points is None:
+        df = _frame(df)
+        pain_points = extract_pain_points(df, n_clusters=None, duplicate_of=load_duplicates(df, store), unique_voices=unique_voices)
+        store.save_json(key, pain_points, kind)
+    return pain_points
+
+
+def load_discoveries(df, store=ARTIFACT_STORE):
+    """Distinctive n-grams and candidate clusters of an enriched frame, mined once per fingerprint"""
+    key = _fingerprint(df)
+    discoveries = store.load_json(key, 'discoveries')
+    if discoveries is None:
+        discoveries = discover_themes(_frame(df))
+        store.save_json(key, discoveries, 'discoveries')
+    return discoveries
+
+
+def load_theme_matrix(df, store=ARTIFACT_STORE, classifier=None):
+    """Review × category theme weights of an enriched frame, scored once per fingerprint"""
+    classifier = classifier or current_classifier()
+    key = _fingerprint(df)
+    scores = store.load(key, 'theme_scores')
+    if scores is None:
+        scores = pd.DataFrame(classifier.score_matrix(english_text(_frame(df))), columns=classifier.categories)
+        store.save(key, scores, 'theme_scores')
+    return ThemeMatrix.from_scores(scores, classifier)
+
+
+def load_cube(df, store=ARTIFACT_STORE):
+    """Aggregate cube of an enriched frame, built once per fingerprint"""
+    key = df.attrs['fingerprint']
+    cells = store.load(key, 'cube')
+    if cells is None:
+        cube = ReviewCube.from_frame(df)
+        store.save(key, cube.cells, 'cube')
+        return cube
+    return ReviewCube(cells)
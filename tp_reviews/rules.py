@@ -0,0 +1,105 @@
+"""Theme rules and sentiment lexicon read from a versioned JSON file and reloaded when it changes.
+
+The file has a ``version`` plus one section per rule set: ``themes`` for
+the classifier and ``sentiment`` for the lexicon. Each section is compiled
+once per content hash through ``RuleWatcher.compiled``, so editing one
+section leaves the other's compiled form, version and derived columns
+untouched.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+RULES_PATH = os.environ.get('TP_REVIEWS_RULES', DEFAULT_RULES_PATH)
+
+REQUIRED_KEYS = {
+    'themes': ['rules', 'names', 'min_weight', 'keyword_weight', 'pattern_weight'],
+    'sentiment': ['positive_words', 'negative_words', 'positive_threshold', 'negative_threshold', 'scale'],
+}
+
+
+def section_hash(section):
+    """Content hash of a configuration section, independent of key order and formatting"""
+    return hashlib.sha1(json.dumps(section, sort_keys=True).encode()).hexdigest()
+
+
+def read_rules(path):
+    """Parse a rule file, raising ValueError when it lacks a required key"""
+    with open(path) as handle:
+        config = json.load(handle)
+    if not isinstance(config, dict) or 'version' not in config:
+        raise ValueError(f"{path} must be an object with a 'version'")
+    for section, keys in REQUIRED_KEYS.items():
+        missing = [key for key in keys if key not in config.get(section, {})]
+        if missing:
+            raise ValueError(f"{path}: '{section}' is missing {', '.join(missing)}")
+    return config
+
+
+class RuleWatcher:
+    """The rule file's current contents and the objects compiled from them.
+
+    Every access compares the file's mtime and size with the last read,
+    so an edited file is picked up by the next caller without a restart.
+    A file that no longer parses is logged and the last good rules are
+    kept. Compiled objects are cached by (section, content hash): saving
+    the file unchanged, or reverting an edit, compiles nothing.
+    """
+
+    def __init__(self, path=RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._config = None
+        self._hashes = {}
+        self._compiled = {}
+
+    def config(self):
+        """Current configuration, re-read whenever the file changed"""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            if self._config is None:
+                raise
+            signature = self._signature
+        with self._lock:
+            if signature != self._signature:
+                self._signature = signature
+                self._reload()
+            return self._config
+
+    def _reload(self):
+        try:
+            config = read_rules(self.path)
+        except (OSError, ValueError) as exc:
+            if self._config is None:
+                raise
+            logger.error("keeping rules version %s: %s", self._config['version'], exc)
+            return
+        if self._config is not None:
+            logger.info("reloaded rules version %s from %s", config['version'], self.path)
+        self._config = config
+        self._hashes = {section: section_hash(config[section]) for section in REQUIRED_KEYS}
+
+    @property
+    def version(self):
+        """The ``version`` declared by the current rule file"""
+        return self.config()['version']
+
+    def compiled(self, section, compile):
+        """``compile(config[section])`` for the current rules, built once per content hash"""
+        self.config()
+        with self._lock:
+            key = (section, self._hashes[section])
+            if key not in self._compiled:
+                self._compiled[key] = compile(self._config[section])
+            return self._compiled[key]
+
+
+RULES = RuleWatcher()
@@ -0,0 +1,221 @@
+"""Inverted index over review text for keyword search with facet filters.
+
+Query syntax: whitespace-separated terms must all match, ``OR`` separates
+alternatives, ``-term`` (or ``NOT term``) excludes, ``"quoted words"``
+match as a phrase and ``pay*`` matches any word starting with ``pay``::
+
+    refund "not paid" -survey OR scam
+"""
+import bisect
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .layout import english_text
+
+FACET_COLUMNS = ['reviewLanguage', 'reviewScore', 'sentiment_label', 'theme']
+
+# Rows tokenised per batch while building, bounding the temporary token lists
+INDEX_CHUNK_ROWS = 100_000
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+_QUERY_PART = re.compile(r'(-?)"([^"]*)"|(\S+)')
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _plain(value):
+    """NumPy scalars as the Python values a UI widget hands back"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def parse_query(query):
+    """Split a query into OR-groups of ``(negate, kind, value)`` clauses.
+
+    ``kind`` is 'term', 'prefix' or 'phrase'; a phrase's value is its list of tokens.
+    """
+    groups, clauses, negate_next = [], [], False
+    for match in _QUERY_PART.finditer(query):
+        quoted_negate, phrase, word = match.groups()
+        if word == 'OR':
+            groups.append(clauses)
+            clauses = []
+            continue
+        if word == 'NOT':
+            negate_next = True
+            continue
+        if phrase is not None:
+            negate, tokens = negate_next or bool(quoted_negate), tokenize(phrase)
+            if len(tokens) == 1:
+                clauses.append((negate, 'term', tokens[0]))
+            elif tokens:
+                clauses.append((negate, 'phrase', tokens))
+        else:
+            negate = negate_next or (word.startswith('-') and len(word) > 1)
+            prefix = word.endswith('*')
+            tokens = tokenize(word)
+            if tokens:
+                # Punctuation splits a bare word into several tokens; they must all match
+                for token in tokens[:-1]:
+                    clauses.append((negate, 'term', token))
+                clauses.append((negate, 'prefix' if prefix else 'term', tokens[-1]))
+        negate_next = False
+    groups.append(clauses)
+    return [group for group in groups if group]
+
+
+class _FrameText:
+    """Title and English text of an enriched frame's reviews, joined for the rows asked for instead of copied"""
+
+    def __init__(self, df):
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    def __getitem__(self, positions):
+        rows = self.df.iloc[positions]
+        return (rows['reviewTitle'].fillna('') + '\n' + english_text(rows).fillna('')).to_numpy(dtype=object)
+
+
+class ReviewIndex:
+    """Term and facet postings for one enriched frame.
+
+    Reviews are indexed in segments of ``INDEX_CHUNK_ROWS`` rows. Each
+    segment holds its terms' 64-bit hashes sorted, with offsets into one
+    int32 array of row positions, so a lookup is a binary search and a
+    query costs a few array intersections instead of a scan over every
+    review. Adjacent word pairs are indexed as terms too: a two-word phrase
+    is a single lookup, and longer phrases only re-check the rows holding
+    all their pairs.
+
+    Terms are keyed by the builtin ``hash()``, which is salted per process
+    (PYTHONHASHSEED), so an index is only valid in the process that built
+    it and refuses to be pickled; persisting one would need a stable hash.
+    """
+
+    def __init__(self, texts, facets=None):
+        # An index built by from_frame reads phrase re-checks from the frame rather than keeping its own copy
+        self.texts = texts if isinstance(texts, _FrameText) else np.asarray(texts, dtype=object)
+        self.rows = len(self.texts)
+        words = set()
+        self.segments = [self._segment(start, self.texts[start:start + INDEX_CHUNK_ROWS], words)
+                         for start in range(0, self.rows, INDEX_CHUNK_ROWS)]
+        self.vocabulary = sorted(words)
+        self.facets = {
+            column: {_plain(value): np.asarray(positions, dtype=np.int32) for value, positions in pd.Series(values).groupby(values).indices.items()}
+            for column, values in (facets or {}).items()
+        }
+
+    @classmethod
+    def from_frame(cls, df, facet_columns=FACET_COLUMNS):
+        """Index an enriched frame's title, English text and facet columns by row position"""
+        facets = {column: df[column].to_numpy() for column in facet_columns if column in df.columns}
+        return cls(_FrameText(df), facets)
+
+    @staticmethod
+    def _segment(start, texts, words):
+        """(sorted term hashes, offsets, row positions) for one batch of rows"""
+        keys, counts = [], []
+        for text in texts:
+            tokens = tokenize(text)
+            terms = set(tokens)
+            words.update(terms)
+            terms.update(map(' '.join, zip(tokens, tokens[1:])))
+            keys.extend(map(hash, terms))
+            counts.append(len(terms))
+        keys = np.array(keys, dtype=np.int64)
+        rows = np.repeat(np.arange(start, start + len(counts), dtype=np.int32), counts)
+        # A stable sort by hash keeps each term's rows in ascending order
+        order = np.argsort(keys, kind='stable')
+        keys, rows = keys[order], rows[order]
+        unique, first = np.unique(keys, return_index=True)
+        return unique, np.append(first, len(keys)), rows
+
+    def __reduce__(self):
+        raise TypeError("ReviewIndex keys terms with the per-process hash() and cannot leave the process that built it")
+
+    @property
+    def nbytes(self):
+        """Memory held by the postings, vocabulary and indexed texts (not counting a frame the texts are read from)"""
+        postings = sum(array.nbytes for segment in self.segments for array in segment)
+        postings += sum(positions.nbytes for values in self.facets.values() for positions in values.values())
+        strings = sum(map(sys.getsizeof, self.vocabulary)) + sys.getsizeof(self.vocabulary)
+        if isinstance(self.texts, np.ndarray):
+            strings += sum(map(sys.getsizeof, self.texts)) + self.texts.nbytes
+        return postings + strings
+
+    def facet_values(self, column):
+        return sorted(self.facets.get(column, {}))
+
+    def search(self, query='', **filters):
+        """Sorted row positions matching ``query`` and every facet filter.
+
+        Filters map a facet column to the accepted values, e.g.
+        ``search('refund', reviewScore=[1, 2], sentiment_label=['negative'])``;
+        an empty or missing filter accepts everything.
+        """
+        groups = parse_query(query or '')
+        hits = None
+        if groups:
+            hits = self._union([self._match_group(group) for group in groups])
+        for column, values in filters.items():
+            if not values:
+                continue
+            postings = self.facets[column]
+            allowed = self._union([postings[value] for value in values if value in postings])
+            hits = allowed if hits is None else np.intersect1d(hits, allowed, assume_unique=True)
+        return np.arange(self.rows, dtype=np.int32) if hits is None else hits
+
+    def postings(self, terms):
+        """Sorted row positions containing any of ``terms`` (words or 'word word' pairs)"""
+        hashes = np.array([hash(term) for term in terms], dtype=np.int64)
+        parts = []
+        for keys, offsets, rows in self.segments:
+            if not len(keys):
+                # A segment of reviews without a single word
+                continue
+            found = np.searchsorted(keys, hashes).clip(max=len(keys) - 1)
+            for position in found[keys[found] == hashes]:
+                parts.append(rows[offsets[position]:offsets[position + 1]])
+        if len(hashes) == 1:
+            return np.concatenate(parts) if parts else _EMPTY
+        return self._union(parts)
+
+    def _match_group(self, clauses):
+        include = [clause for clause in clauses if not clause[0]]
+        exclude = [clause for clause in clauses if clause[0]]
+        # Intersect the rarest postings first so later intersections stay small
+        candidates = sorted((self._clause_postings(kind, value) for _, kind, value in include), key=len)
+        hits = np.arange(self.rows, dtype=np.int32) if not candidates else candidates[0]
+        for postings in candidates[1:]:
+            hits = np.intersect1d(hits, postings, assume_unique=True)
+        for _, kind, value in exclude:
+            hits = np.setdiff1d(hits, self._clause_postings(kind, value), assume_unique=True)
+        return hits
+
+    def _clause_postings(self, kind, value):
+        if kind == 'term':
+            return self.postings([value])
+        if kind == 'prefix':
+            start = bisect.bisect_left(self.vocabulary, value)
+            end = bisect.bisect_left(self.vocabulary, value + '\uffff')
+            return self.postings(self.vocabulary[start:end]) if end > start else _EMPTY
+        candidates = self._match_group([(False, 'term', pair) for pair in map(' '.join, zip(value, value[1:]))])
+        if len(value) == 2:
+            return candidates
+        pattern = re.compile(r'\b' + r'\W+'.join(map(re.escape, value)) + r'\b', re.IGNORECASE)
+        return candidates[[pattern.search(text) is not None for text in self.texts[candidates]]] if len(candidates) else _EMPTY
+
+    @staticmethod
+    def _union(postings):
+        if not postings:
+            return _EMPTY
+        if len(postings) == 1:
+            return postings[0]
+        return np.unique(np.concatenate(postings))
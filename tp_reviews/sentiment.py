@@ -0,0 +1,444 @@
+"""Keyword sentiment scoring for single reviews and whole Series at once.
+
+The word lists, thresholds and scale live in the ``sentiment`` section of
+the rule file (see ``rules``).
+
+``score_sentiment`` finds every lexicon word in one pass over the UTF-8
+bytes of the whole Series (``_ByteScanner``) instead of testing each word
+against each review in Python.
+"""
+import hashlib
+import json
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .rules import RULES
+
+# Reviews scanned per block; small enough for the scratch arrays to stay in cache
+SCAN_ROWS = 4_000
+
+_HASH_BITS = 20
+_HASH_MULTIPLIER = np.uint32(2654435761)
+# Setting bit 5 of every byte lowercases ASCII letters and never turns anything else into one
+_FOLD = np.uint32(0x20202020)
+
+# Byte-wise constants for arithmetic on eight bytes at once
+_BYTES_1 = np.uint64(0x0101010101010101)
+_BYTES_HIGH = np.uint64(0x8080808080808080)
+_BYTES_LOW7 = np.uint64(0x7F7F7F7F7F7F7F7F)
+
+_WORD_BYTES = np.zeros(256, dtype=bool)
+_WORD_BYTES[[ord(char) for char in '0123456789_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ']] = True
+# Non-ASCII whitespace for str.split(), and the two characters whose lowercase is ASCII (İ -> i̇, Kelvin sign -> k)
+_WIDE_SPACE, _LOWERS_TO_ASCII = 1, 2
+_CHARACTER_KINDS = np.zeros(0x10000, dtype=np.uint8)
+_CHARACTER_KINDS[[code for code in range(0x80, 0x10000) if chr(code).isspace()]] = _WIDE_SPACE
+_CHARACTER_KINDS[[0x130, 0x212A]] = _LOWERS_TO_ASCII
+
+
+def _word_boundary_regex(words):
+    return re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b')
+
+
+def _hash(windows, scratch=None, out=None):
+    """Table slot of each folded window"""
+    scratch = np.multiply(windows, _HASH_MULTIPLIER, out=scratch)
+    return np.right_shift(scratch, np.uint32(32 - _HASH_BITS), out=out, casting='unsafe')
+
+
+def _byte_sums(blocks):
+    """Sum of the eight bytes of each block, for blocks of 0/1 bytes"""
+    # Multiplying by 0x0101... adds up all eight bytes in the top one
+    return (blocks * _BYTES_1) >> np.uint64(56)
+
+
+def _ascii_lower(blocks):
+    """Lowercase the ASCII letters of 8-byte blocks"""
+    low7 = blocks & _BYTES_LOW7
+    upper = (low7 + _BYTES_1 * np.uint64(0x80 - ord('A'))) & ~(low7 + _BYTES_1 * np.uint64(0x80 - ord('Z') - 1)) & ~blocks & _BYTES_HIGH
+    return blocks | (upper >> np.uint64(2))
+
+
+def _overlapping_blocks(data, size):
+    """The eight bytes starting at each of the first ``size`` offsets, as one integer each"""
+    return np.ndarray(size, dtype='<u8', buffer=data, strides=(1,))
+
+
+class _ByteScanner:
+    """Locates ASCII words in a buffer of UTF-8 text, all words at once.
+
+    Every 4-byte window at an even offset is case-folded and looked up in
+    a hash table of the windows a word can produce there: its first four
+    bytes when it starts on the window, its next four when it starts one
+    byte before, or (for short words) the byte before it and its first
+    three. Only the windows found in the table are checked byte by byte.
+    """
+
+    def __init__(self, words):
+        self.words = [word.encode('ascii') for word in words]
+        self.lengths = np.array([len(word) for word in self.words])
+        # Each word as two 8-byte blocks, with masks covering its length
+        padded = [word.ljust(16, b'\0')[:16] for word in self.words]
+        self.blocks = np.array([[int.from_bytes(word[:8], 'little'), int.from_bytes(word[8:], 'little')] for word in padded], dtype=np.uint64)
+        self.masks = np.array([[(1 << 8 * min(length, 8)) - 1, (1 << 8 * min(max(length - 8, 0), 8)) - 1]
+                               for length in self.lengths], dtype=np.uint64)
+
+        # Every folded window a word can produce, with the word and its start relative to the window
+        any_byte = sorted({byte | 0x20 for byte in range(256)})
+        keys, entries = [], []
+        for index, word in enumerate(self.words):
+            folded = bytes(byte | 0x20 for byte in word)
+            head = [folded[:4]] if len(word) >= 4 else [folded + bytes([byte]) for byte in any_byte]
+            tail = [folded[1:5]] if len(word) >= 5 else [bytes([byte]) + folded[:3] for byte in any_byte]
+            for windows, shift in ((head, 0), (tail, 1 if len(word) < 5 else -1)):
+                keys += [int.from_bytes(window, 'little') for window in windows]
+                entries += [(index, shift)] * len(windows)
+        keys = np.array(keys, dtype=np.uint32)
+        slots = _hash(keys)
+        order = np.argsort(slots, kind='stable')
+        self.entry_keys = keys[order]
+        self.entry_words, self.entry_shifts = np.array(entries, dtype=np.int64)[order].T
+        # The entries of slot h are entries[slot_starts[h]:slot_starts[h + 1]]
+        self.slot_starts = np.searchsorted(slots[order], np.arange((1 << _HASH_BITS) + 1)).astype(np.int32)
+        self.table = self.slot_starts[1:] > self.slot_starts[:-1]
+
+    def __reduce__(self):
+        # The table is rebuilt from the words in a few milliseconds, far
+        # cheaper than shipping its 5 MB to every worker process
+        return type(self), ([word.decode('ascii') for word in self.words],)
+
+    @staticmethod
+    def accepts(words):
+        """Whether the scanner handles ``words``: ASCII word characters, three or more of them"""
+        return all(len(word) >= 3 and word.isascii() and _WORD_BYTES[list(word.encode())].all() for word in words)
+
+    def _candidates(self, data, size):
+        """Start offsets, folded contents and table slots of the windows found in the table"""
+        count = (size + 3) // 4
+        folded = np.bitwise_or(data[:4 * count + 4].view('<u4'), _FOLD).view(np.uint8)
+        scratch, slots, hits = np.empty(count, dtype=np.uint32), np.empty(count, dtype=np.intp), np.empty(count, dtype=bool)
+        positions, found, found_slots = [], [], []
+        for start in (0, 2):
+            windows = folded[start:start + 4 * count].view('<u4')
+            _hash(windows, scratch, slots)
+            np.take(self.table, slots, out=hits)
+            candidates = np.flatnonzero(hits)
+            positions.append(candidates * 4 + start)
+            found.append(windows[candidates])
+            found_slots.append(slots[candidates])
+        return np.concatenate(positions), np.concatenate(found), np.concatenate(found_slots)
+
+    def matches(self, data, size, offsets, word_boundary=False):
+        """Distinct (row, word index) pairs of the words found in each row.
+
+        ``data`` holds the rows' UTF-8 bytes at ``offsets`` followed by at
+        least sixteen bytes of padding; ``size`` is where the rows end.
+        """
+        positions, keys, slots = self._candidates(data, size)
+        # Pair each candidate with the first entry of its slot, and with the
+        # others of the few slots holding more; keep those with its exact key
+        entry = self.slot_starts[slots]
+        shared = np.flatnonzero(self.slot_starts[slots + 1] - entry > 1)
+        if len(shared):
+            more = self.slot_starts[slots[shared] + 1] - entry[shared] - 1
+            entry = np.concatenate([entry, np.arange(more.sum()) + np.repeat(entry[shared] + 1 - np.cumsum(more) + more, more)])
+            positions = np.concatenate([positions, np.repeat(positions[shared], more)])
+            keys = np.concatenate([keys, np.repeat(keys[shared], more)])
+        same = self.entry_keys[entry] == keys
+        entry, positions = entry[same], positions[same]
+        word = self.entry_words[entry]
+        starts = positions + self.entry_shifts[entry]
+        ends = starts + self.lengths[word]
+        inside = (starts >= 0) & (ends <= size)
+        word, starts, ends = word[inside], starts[inside], ends[inside]
+
+        text = _overlapping_blocks(data, size)
+        ok = ((_ascii_lower(text[starts]) ^ self.blocks[word, 0]) & self.masks[word, 0]) == 0
+        long = self.lengths[word] > 8
+        ok[long] &= ((_ascii_lower(text[starts[long] + 8]) ^ self.blocks[word[long], 1]) & self.masks[word[long], 1]) == 0
+        word, starts, ends = word[ok], starts[ok], ends[ok]
+
+        row = np.searchsorted(offsets, starts, side='right') - 1
+        ok = ends <= offsets[row + 1]
+        if word_boundary:
+            ok[ok] = _at_word_boundaries(data, starts[ok], ends[ok], offsets[row[ok]], offsets[row[ok] + 1])
+        pairs = np.unique(row[ok] * len(self.words) + word[ok])
+        return pairs // len(self.words), pairs % len(self.words)
+
+
+def _is_word_char(data, position):
+    """Whether the character starting at byte ``position`` is a regex word character"""
+    lead = int(data[position])
+    length = 1 if lead < 0xC0 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    char = bytes(data[position:position + length]).decode('utf-8', errors='replace')[:1]
+    return char.isalnum() or char == '_'
+
+
+def _at_word_boundaries(data, starts, ends, row_starts, row_ends):
+    """Which matches have no word character right before or right after them"""
+    before = np.zeros(len(starts), dtype=bool)
+    has_before = starts > row_starts
+    previous = data[starts[has_before] - 1]
+    before[has_before] = _WORD_BYTES[previous]
+    # A non-ASCII character before the match: step back to its lead byte and decode it
+    for i in np.flatnonzero(has_before)[previous >= 0x80]:
+        lead = starts[i] - 1
+        while data[lead] & 0xC0 == 0x80 and lead > row_starts[i]:
+            lead -= 1
+        before[i] = _is_word_char(data, lead)
+
+    after = np.zeros(len(starts), dtype=bool)
+    has_after = ends < row_ends
+    following = data[ends[has_after]]
+    after[has_after] = _WORD_BYTES[following]
+    for i in np.flatnonzero(has_after)[following >= 0x80]:
+        after[i] = _is_word_char(data, ends[i])
+    return ~(before | after)
+
+
+def _utf8_block(texts):
+    """Offsets and UTF-8 bytes of the texts, None if they cannot be encoded.
+
+    The bytes are followed by sixteen spaces, so 8-byte blocks can be read
+    from any offset up to the end of the last text.
+    """
+    try:
+        try:
+            array = pa.array(texts.tolist() + [' ' * 16], type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = pa.array(texts.fillna('').astype(str).tolist() + [' ' * 16], type=pa.string())
+    except (pa.ArrowException, UnicodeEncodeError):
+        return None
+    if isinstance(array, pa.ChunkedArray):
+        return None
+    _, offsets, data = array.buffers()
+    return np.frombuffer(offsets, dtype=np.int32, count=len(array)).astype(np.int64), np.frombuffer(data, dtype=np.uint8)
+
+
+def _arrow_strings(texts):
+    """The texts as one large_string Arrow array with nulls as '', None unless they are stored in Arrow"""
+    if getattr(texts.dtype, 'storage', None) != 'pyarrow':
+        return None
+    array = pa.array(texts.array)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        return None
+    return pc.fill_null(array, '').cast(pa.large_string())
+
+
+def _arrow_block(array):
+    """Offsets and UTF-8 bytes of a slice of ``_arrow_strings``, read in place like ``_utf8_block``"""
+    _, offsets, data = array.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64, count=len(array) + 1, offset=8 * array.offset)
+    start, size = int(offsets[0]), int(offsets[-1] - offsets[0])
+    data = np.frombuffer(data, dtype=np.uint8)[start:] if data is not None else np.zeros(0, dtype=np.uint8)
+    if len(data) < size + 16:
+        data = np.concatenate([data[:size], np.full(16, ord(' '), dtype=np.uint8)])
+    return offsets - start, data
+
+
+def _rare_bytes(data, size):
+    """Positions of the control bytes below 28 and of the non-ASCII lead bytes"""
+    # Wrapping around, b - 28 is 166 or more exactly when b < 28 or b >= 0xC2
+    return np.flatnonzero(data[:size] - np.uint8(28) >= 166)
+
+
+def _non_ascii(data, leads):
+    """Non-ASCII whitespace (start and length) and characters lowercasing to ASCII (start)"""
+    first, second, third = (data[leads + i].astype(np.int64) for i in range(3))
+    code = np.where(first < 0xE0, ((first & 0x1F) << 6) | (second & 0x3F),
+                    ((first & 0x0F) << 12) | ((second & 0x3F) << 6) | (third & 0x3F))
+    # None of the four-byte characters matter here
+    kinds = np.where(first < 0xF0, _CHARACTER_KINDS[code & 0xFFFF], 0)
+    wide = kinds == _WIDE_SPACE
+    return leads[wide], np.where(first[wide] < 0xE0, 2, 3), leads[kinds == _LOWERS_TO_ASCII]
+
+
+def _word_counts(data, size, offsets, controls, wide_spaces, wide_lengths):
+    """``len(text.split())`` of every row"""
+    # space[i + 1] tells whether byte i is whitespace
+    space = np.empty(size + 1, dtype=bool)
+    space[0] = True
+    np.less_equal(data[:size], 32, out=space[1:])
+    # Bytes below 28 other than \t\n\v\f\r are control characters, not whitespace
+    space[1 + controls[(data[controls] < 9) | (data[controls] > 13)]] = False
+    for extra in range(3):
+        space[1 + wide_spaces[wide_lengths > extra] + extra] = True
+
+    # Words start on a non-space byte after a space byte, or on a row's first byte
+    word_starts = np.zeros((size // 8 + 1) * 8, dtype=bool)
+    np.greater(space[:-1], space[1:], out=word_starts[:size])
+    starts, ends = offsets[:-1], offsets[1:]
+    nonempty = starts < ends
+    word_starts[starts[nonempty]] = ~space[1 + starts[nonempty]]
+
+    # Sum them per 8-byte block, then per row: whole blocks from the row's
+    # first block up to the next row's, corrected for the bytes of those two
+    # blocks that belong to the rows around it
+    blocks = word_starts.view(np.uint64)
+    per_block = _byte_sums(blocks)
+    first_block = starts >> 3
+    whole = np.add.reduceat(per_block, first_block)
+    whole[:-1][first_block[1:] == first_block[:-1]] = 0
+
+    def before(positions):
+        within = (positions & 7).astype(np.uint64) * np.uint64(8)
+        return _byte_sums(blocks[positions >> 3] & ((np.uint64(1) << within) - np.uint64(1)))
+
+    counts = whole.astype(np.int64) - before(starts)
+    counts[:-1] += before(ends[:-1])
+    return counts
+
+
+def _scan_counts(texts, lexicon, word_boundary):
+    """Positive hits, negative hits and word counts per row, plus rows to score one by one.
+
+    None if the texts cannot be encoded as UTF-8.
+    """
+    scanner = lexicon.scanner
+    positive_weight = np.array([lexicon.positive_words.count(word.decode()) for word in scanner.words])
+    negative_weight = np.array([lexicon.negative_words.count(word.decode()) for word in scanner.words])
+    if word_boundary:
+        positive_weight, negative_weight = np.minimum(positive_weight, 1), np.minimum(negative_weight, 1)
+
+    positive, negative = np.zeros(len(texts), dtype=np.int64), np.zeros(len(texts), dtype=np.int64)
+    words = np.zeros(len(texts), dtype=np.int64)
+    one_by_one = [np.zeros(0, dtype=np.int64)]
+    arrow = _arrow_strings(texts)
+    for first in range(0, len(texts), SCAN_ROWS):
+        if arrow is not None:
+            block = _arrow_block(arrow.slice(first, SCAN_ROWS))
+        else:
+            block = _utf8_block(texts.iloc[first:first + SCAN_ROWS])
+        if block is None:
+            return None
+        offsets, data = block
+        last, size = first + len(offsets) - 1, int(offsets[-1])
+        rare = _rare_bytes(data, size)
+        wide_spaces, wide_lengths, special = _non_ascii(data, rare[data[rare] >= 0xC2])
+        words[first:last] = _word_counts(data, size, offsets, rare[data[rare] < 28], wide_spaces, wide_lengths)
+        rows, found = scanner.matches(data, size, offsets, word_boundary)
+        positive[first:last] = np.bincount(rows, weights=positive_weight[found], minlength=last - first)
+        negative[first:last] = np.bincount(rows, weights=negative_weight[found], minlength=last - first)
+        one_by_one.append(np.unique(np.searchsorted(offsets, special, side='right') - 1) + first)
+    return positive, negative, words, np.concatenate(one_by_one)
+
+
+def _loop_counts(texts, lexicon, word_boundary):
+    """Positive hits, negative hits and word counts per row, lowercasing each text in Python"""
+    lowered = texts.fillna('').astype(str).str.lower().tolist()
+    total_words = np.fromiter((len(text.split()) for text in lowered), dtype=np.int64, count=len(lowered))
+    positive_count = _lexicon_hits(lowered, lexicon.positive_words, lexicon.positive_re, word_boundary)
+    negative_count = _lexicon_hits(lowered, lexicon.negative_words, lexicon.negative_re, word_boundary)
+    return positive_count, negative_count, total_words
+
+
+class Lexicon:
+    """Sentiment word lists and scoring constants, with their whole-word regexes compiled once.
+
+    Scores beyond ``positive_threshold`` / ``negative_threshold`` are
+    labelled positive / negative.
+    """
+
+    def __init__(self, positive_words, negative_words, positive_threshold=0.1, negative_threshold=-0.1, scale=10):
+        self.positive_words = tuple(positive_words)
+        self.negative_words = tuple(negative_words)
+        self.positive_threshold = positive_threshold
+        self.negative_threshold = negative_threshold
+        self.scale = scale
+        # Changes whenever the lexicon or scoring constants do
+        self.version = hashlib.sha1(json.dumps(
+            [self.positive_words, self.negative_words, positive_threshold, negative_threshold, scale]
+        ).encode()).hexdigest()
+        self.positive_re = _word_boundary_regex(self.positive_words)
+        self.negative_re = _word_boundary_regex(self.negative_words)
+        words = list(dict.fromkeys(self.positive_words + self.negative_words))
+        self.scanner = _ByteScanner(words) if _ByteScanner.accepts(words) else None
+
+    @classmethod
+    def from_config(cls, sentiment):
+        """Compile the ``sentiment`` section of a rule file"""
+        return cls(sentiment['positive_words'], sentiment['negative_words'], sentiment['positive_threshold'],
+                   sentiment['negative_threshold'], sentiment['scale'])
+
+
+def current_lexicon(rules=RULES):
+    """Lexicon for the current sentiment rules, compiled once per version of them"""
+    return rules.compiled('sentiment', Lexicon.from_config)
+
+
+def simple_sentiment_analysis(text, word_boundary=False, lexicon=None):
+    """Simple sentiment analysis using keyword matching"""
+    lexicon = lexicon or current_lexicon()
+    text = str(text).lower()
+
+    # Count positive and negative words
+    if word_boundary:
+        positive_count = len(set(lexicon.positive_re.findall(text)))
+        negative_count = len(set(lexicon.negative_re.findall(text)))
+    else:
+        positive_count = sum(1 for word in lexicon.positive_words if word in text)
+        negative_count = sum(1 for word in lexicon.negative_words if word in text)
+
+    # Calculate sentiment score (-1 to 1)
+    total_words = len(text.split())
+    if total_words == 0:
+        return 0
+
+    sentiment_score = (positive_count - negative_count) / max(total_words, 1)
+
+    # Normalize to -1 to 1 range
+    return max(-1, min(1, sentiment_score * lexicon.scale))
+
+
+def _lexicon_hits(lowered, words, boundary_re, word_boundary):
+    """Number of distinct lexicon words found in each lowercased text"""
+    if word_boundary:
+        findall = boundary_re.findall
+        hits = (len(set(findall(text))) for text in lowered)
+    else:
+        hits = (sum(word in text for word in words) for text in lowered)
+    return np.fromiter(hits, dtype=np.int64, count=len(lowered))
+
+
+def score_sentiment(texts, word_boundary=False, lexicon=None):
+    """Score a whole Series of reviews at once.
+
+    Gives the same result as ``simple_sentiment_analysis`` row by row.
+    Lexicons of plain ASCII words (the default) are matched by scanning the
+    UTF-8 bytes of all reviews together (read in place from Arrow string
+    columns); other lexicons lowercase each text once and test the words in
+    Python. ``word_boundary`` only counts
+    whole-word matches instead of substrings.
+    """
+    lexicon = lexicon or current_lexicon()
+    counts = _scan_counts(texts, lexicon, word_boundary) if lexicon.scanner is not None else None
+    if counts is None:
+        positive_count, negative_count, total_words = _loop_counts(texts, lexicon, word_boundary)
+        one_by_one = []
+    else:
+        positive_count, negative_count, total_words, one_by_one = counts
+
+    scores = (positive_count - negative_count) / np.maximum(total_words, 1) * lexicon.scale
+    scores = np.where(total_words == 0, 0.0, np.clip(scores, -1, 1))
+    # Rows with characters that lowercase to ASCII letters are scored by the scalar function
+    for row in one_by_one:
+        value = texts.iloc[row]
+        scores[row] = simple_sentiment_analysis('' if pd.isna(value) else value, word_boundary, lexicon)
+    return pd.Series(scores, index=texts.index, name='sentiment')
+
+
+def label_sentiment(scores, lexicon=None):
+    """Label sentiment scores as positive, negative or neutral"""
+    lexicon = lexicon or current_lexicon()
+    labels = np.select(
+        [scores > lexicon.positive_threshold, scores < lexicon.negative_threshold],
+        ['positive', 'negative'],
+        default='neutral'
+    )
+    return pd.Series(labels, index=scores.index, name='sentiment_label')
@@ -0,0 +1,255 @@
+"""On-disk artifact store for enriched review frames"""
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing, contextmanager
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .classifier import current_classifier
+from .sentiment import current_lexicon
+from .translation import TRANSLATOR
+
+DEFAULT_CACHE_DIR = os.environ.get('TP_REVIEWS_CACHE_DIR', os.path.join('.cache', 'tp_reviews'))
+
+# Format version of each artifact derived from an enriched frame. The key
+# of a derived artifact is the frame's fingerprint, which only covers the
+# CSV and the rules; bump an entry when the code building that artifact
+# changes what it stores, so copies written by older code are rebuilt.
+ARTIFACT_FORMATS = {
+    'cube': 2,
+    'discoveries': 1,
+    'duplicates': 1,
+    'pain_points': 1,
+    'pain_points_unique': 1,
+    'theme_scores': 1,
+}
+
+# Earlier keys of each source the manifest remembers, so artifacts a session
+# still showing an older version derives from them can be swept
+SUPERSEDED_KEYS = 16
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scoring_versions(classifier=None, lexicon=None, translator=TRANSLATOR):
+    """Version of each rule set that derives columns from review text (default: the current rules)"""
+    return {
+        'theme': (classifier or current_classifier()).version,
+        'sentiment': (lexicon or current_lexicon()).version,
+        # Translation decides which rows are kept, so the backend is versioned too
+        'translation': translator.name if translator is not None else None,
+    }
+
+
+def combined_version(versions):
+    """One hash over the versions returned by ``scoring_versions``"""
+    parts = [versions['theme'], versions['sentiment']] + ([versions['translation']] if versions['translation'] is not None else [])
+    return hashlib.sha1(':'.join(parts).encode()).hexdigest()
+
+
+def scoring_version(classifier=None, lexicon=None, translator=TRANSLATOR):
+    """Combined version of everything that derives columns from review text"""
+    return combined_version(scoring_versions(classifier, lexicon, translator))
+
+
+def enrichment_key(path, classifier=None, lexicon=None, translator=TRANSLATOR):
+    """Cache key for the enriched frame of a CSV: its content plus the scoring versions"""
+    parts = [file_digest(path), scoring_version(classifier, lexicon, translator)]
+    return hashlib.sha1(':'.join(parts).encode()).hexdigest()
+
+
+def partial_key(key, untranslated):
+    """Key of an enriched frame some of whose translations failed, distinct from ``key`` and per set of failed rows"""
+    return hashlib.sha1(f"{key}:untranslated:{','.join(map(str, untranslated))}".encode()).hexdigest()
+
+
+class ArtifactStore:
+    """Directory of Feather files keyed by content hash.
+
+    Files are written uncompressed so they can be memory-mapped on load;
+    a cold start then only costs reading the file rather than rescoring
+    every review. A small manifest remembers the latest artifact built
+    from each source file, and the rule versions it was scored with, so a
+    changed CSV or rule file can be refreshed incrementally and the
+    superseded artifacts removed. Translations live alongside, in
+    ``translations``.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.translations = TranslationStore(os.path.join(directory, 'translations.sqlite'))
+
+    def path_for(self, key, kind='enriched', extension='feather'):
+        if kind in ARTIFACT_FORMATS:
+            kind = f"{kind}-v{ARTIFACT_FORMATS[kind]}"
+        return os.path.join(self.directory, f"{kind}-{key}.{extension}")
+
+    def load(self, key, kind='enriched', columns=None):
+        """Return the stored frame for a key, or None if it has not been saved"""
+        path = self.path_for(key, kind)
+        if not os.path.exists(path):
+            return None
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    def save(self, key, df, kind='enriched', source=None, versions=None):
+        """Persist a frame atomically so readers never see a partial file.
+
+        When ``source`` is given the artifact is recorded as the latest one
+        built from that file, replacing the previous one. ``versions``
+        defaults to the current ``scoring_versions()``. Artifacts derived
+        from a superseded key are not written; None is returned instead.
+        """
+        if source is None and self._superseded(key):
+            return None
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        self._write_atomic(self.path_for(key, kind), lambda tmp_path: feather.write_feather(table, tmp_path, compression='uncompressed'))
+        if source is not None:
+            self._record_latest(source, key, kind, versions or scoring_versions())
+        return self.path_for(key, kind)
+
+    def load_json(self, key, kind):
+        """Return a stored JSON artifact (e.g. a pain point summary), or None"""
+        path = self.path_for(key, kind, 'json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as handle:
+            return json.load(handle)
+
+    def save_json(self, key, data, kind):
+        """Persist a JSON-serialisable artifact derived from the frame stored under ``key``, unless that key is superseded"""
+        if self._superseded(key):
+            return None
+        self._write_atomic(self.path_for(key, kind, 'json'), lambda tmp_path: _write_json(tmp_path, data))
+        return self.path_for(key, kind, 'json')
+
+    def load_latest(self, source, kind='enriched', versions=None):
+        """Return ``(frame, changed)``: the last frame built from ``source`` and the rule sets changed since.
+
+        ``changed`` names the entries of ``versions`` (default: the current
+        ``scoring_versions()``) the frame was built with a different version
+        of, so only the columns they derive need recomputing. A frame from
+        another translation backend kept different rows and is not returned.
+        """
+        versions = versions or scoring_versions()
+        entry = self._read_manifest().get(f"{kind}:{os.path.abspath(source)}")
+        if entry is None:
+            return None, set()
+        if 'versions' not in entry:
+            # Recorded before per-rule versions: reusable only as a whole
+            if entry['scoring_version'] != combined_version(versions):
+                return None, set()
+            return self.load(entry['key'], kind), set()
+        if entry['versions']['translation'] != versions['translation']:
+            return None, set()
+        return self.load(entry['key'], kind), {name for name, version in versions.items() if entry['versions'][name] != version}
+
+    def _record_latest(self, source, key, kind, versions):
+        name = f"{kind}:{os.path.abspath(source)}"
+        with self._manifest_lock():
+            manifest = self._read_manifest()
+            previous = manifest.get(name, {})
+            superseded = [previous['key']] if previous.get('key', key) != key else []
+            superseded += [old for old in previous.get('superseded', []) if old != key and old not in superseded]
+            manifest[name] = {'key': key, 'scoring_version': combined_version(versions), 'versions': versions,
+                              'superseded': superseded[:SUPERSEDED_KEYS]}
+            self._write_atomic(self.manifest_path, lambda tmp_path: _write_json(tmp_path, manifest))
+            # Drop everything still stored under this source's earlier keys, including artifacts
+            # derived from them after they were replaced, unless another source points at them
+            latest = {entry['key'] for entry in manifest.values()}
+            for old in superseded:
+                if old not in latest:
+                    for path in glob.glob(os.path.join(self.directory, f"*-{old}.*")):
+                        os.remove(path)
+
+    def _superseded(self, key):
+        """Whether ``key`` was replaced as the latest artifact of its source and is no longer any source's latest"""
+        manifest = self._read_manifest()
+        return (any(key in entry.get('superseded', ()) for entry in manifest.values())
+                and all(entry['key'] != key for entry in manifest.values()))
+
+    @contextmanager
+    def _manifest_lock(self):
+        """Exclusive lock on the manifest across threads and processes, for a read-modify-write"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{self.manifest_path}.lock", 'a') as handle:
+            # Released when the file is closed
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as handle:
+            return json.load(handle)
+
+    def _write_atomic(self, path, write):
+        os.makedirs(self.directory, exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(handle)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class TranslationStore:
+    """SQLite table of translations keyed by ``translation.translation_key``.
+
+    Keys hash the backend, both languages and the source text, so a review
+    is only ever sent to a translation backend once; reruns, restarts and
+    re-exports of the same text are served from here.
+    """
+
+    # SQLite caps the number of ? placeholders in one statement
+    LOOKUP_BATCH = 500
+
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        return connection
+
+    def get_many(self, keys):
+        """Return ``{key: translation}`` for the keys already stored"""
+        found = {}
+        with closing(self._connect()) as connection:
+            for start in range(0, len(keys), self.LOOKUP_BATCH):
+                batch = keys[start:start + self.LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                found.update(connection.execute(f"SELECT key, text FROM translations WHERE key IN ({placeholders})", batch))
+        return found
+
+    def put_many(self, translations):
+        """Store ``{key: translation}`` pairs, replacing existing ones"""
+        if not translations:
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO translations (key, text) VALUES (?, ?)", translations.items())
+
+
+def _write_json(path, data):
+    with open(path, 'w') as handle:
+        json.dump(data, handle, indent=2)
+
+
+ARTIFACT_STORE = ArtifactStore()
+TRANSLATION_STORE = ARTIFACT_STORE.translations
@@ -0,0 +1,61 @@
+"""Multi-label themes: every review's weight for every rule category, and what derives from it.
+
+``ThemeClassifier.classify`` keeps only the strongest category of a
+review. The score matrix keeps all of them, so a review about an account
+suspended before payment counts for both themes. Reviews belong to every
+category they score at least ``min_weight`` for, and counts, overlaps and
+the co-occurrence table are reductions of that boolean membership matrix,
+for any selection of rows.
+"""
+import numpy as np
+import pandas as pd
+
+
+class ThemeMatrix:
+    """Review × category weights from ``ThemeClassifier.score_matrix``, rows in frame order"""
+
+    def __init__(self, scores, themes, min_weight):
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.themes = list(themes)
+        self.min_weight = min_weight
+        self.membership = (self.scores >= min_weight) & (self.scores > 0)
+
+    @classmethod
+    def from_scores(cls, scores, classifier):
+        """Matrix of a stored scores frame (one column per rule category) for the classifier that scored it"""
+        return cls(scores[classifier.categories].to_numpy(), [classifier.theme_names.get(category, category) for category in classifier.categories],
+                   classifier.min_weight)
+
+    @property
+    def rows(self):
+        return len(self.scores)
+
+    @property
+    def nbytes(self):
+        return self.scores.nbytes + self.membership.nbytes
+
+    def select(self, positions):
+        """Matrix of the reviews at these row positions"""
+        matrix = ThemeMatrix.__new__(ThemeMatrix)
+        matrix.scores, matrix.themes, matrix.min_weight = self.scores[positions], self.themes, self.min_weight
+        matrix.membership = self.membership[positions]
+        return matrix
+
+    def primary_counts(self):
+        """Reviews whose strongest theme each theme is, like counting ``classify``'s labels"""
+        significant = self.membership.any(axis=1)
+        best = self.scores[significant].argmax(axis=1)
+        return pd.Series(np.bincount(best, minlength=len(self.themes)), index=self.themes, name='reviews')
+
+    def counts(self):
+        """Reviews each theme applies to, a review counting for every theme it raises"""
+        return pd.Series(self.membership.sum(axis=0), index=self.themes, name='reviews')
+
+    def labels_per_review(self):
+        """Number of reviews by how many themes they raise"""
+        return pd.Series(np.bincount(self.membership.sum(axis=1), minlength=len(self.themes) + 1), name='reviews').rename_axis('themes')
+
+    def cooccurrence(self):
+        """Theme × theme review counts; the diagonal is ``counts()``"""
+        membership = self.membership.astype(np.int32)
+        return pd.DataFrame(membership.T @ membership, index=self.themes, columns=self.themes)
@@ -0,0 +1,130 @@
+"""Pluggable, batched translation of non-English reviews.
+
+Backends implement ``async translate_batch(texts, source, target)`` and
+carry a ``name`` that becomes part of the scoring version and of every
+translation store key. Pick one with ``TP_REVIEWS_TRANSLATOR``; when unset,
+reviews in other languages are dropped as before.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+CONCURRENCY = 4
+
+
+class PassthroughTranslator:
+    """Offline stand-in that returns texts unchanged, for tests and air-gapped runs"""
+
+    name = 'passthrough'
+
+    async def translate_batch(self, texts, source, target):
+        return list(texts)
+
+
+class GoogleTranslator:
+    """googletrans backend; needs the optional ``googletrans`` package and network access"""
+
+    name = 'googletrans'
+
+    def __init__(self):
+        try:
+            from googletrans import Translator
+        except ImportError as exc:
+            raise ImportError("The googletrans translator needs `pip install googletrans==4.0.0rc1`") from exc
+        self._translator = Translator()
+
+    async def translate_batch(self, texts, source, target):
+        if asyncio.iscoroutinefunction(self._translator.translate):
+            results = await self._translator.translate(list(texts), src=source, dest=target)
+        else:
+            # Older releases are synchronous; keep them off the event loop
+            results = await asyncio.to_thread(self._translator.translate, list(texts), src=source, dest=target)
+        return [result.text for result in results]
+
+
+TRANSLATORS = {
+    PassthroughTranslator.name: PassthroughTranslator,
+    GoogleTranslator.name: GoogleTranslator,
+}
+
+
+def get_translator(name):
+    """Instantiate a registered backend by name; a falsy name means no translation"""
+    if not name:
+        return None
+    if name not in TRANSLATORS:
+        raise ValueError(f"Unknown translator {name!r}; expected one of {sorted(TRANSLATORS)}")
+    return TRANSLATORS[name]()
+
+
+def translation_key(translator_name, source, target, text):
+    """Content hash identifying one translation in the translation store"""
+    return hashlib.sha1(f"{translator_name}\0{source}\0{target}\0{text}".encode()).hexdigest()
+
+
+async def _translate_missing(missing, translator, target, batch_size, concurrency):
+    """Translate ``(key, text, source)`` items in per-language batches, ``concurrency`` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    by_language = {}
+    for key, text, source in missing:
+        by_language.setdefault(source, []).append((key, text))
+
+    async def run(source, batch):
+        async with semaphore:
+            try:
+                translated = await translator.translate_batch([text for _, text in batch], source, target)
+            except Exception:
+                # Failed batches are left untranslated and retried on the next load
+                logger.warning("translating %d %s reviews with %s failed", len(batch), source, translator.name, exc_info=True)
+                return {}
+        return {key: text for (key, _), text in zip(batch, translated)}
+
+    batches = [
+        run(source, items[start:start + batch_size])
+        for source, items in by_language.items()
+        for start in range(0, len(items), batch_size)
+    ]
+    translations = {}
+    for result in await asyncio.gather(*batches):
+        translations.update(result)
+    return translations
+
+
+def translate_reviews(texts, languages, translator, store=None, target='en', batch_size=BATCH_SIZE, concurrency=CONCURRENCY):
+    """``texts`` translated into ``target``, aligned to the input index.
+
+    Texts already in ``target`` are kept as is. Identical (text, language)
+    pairs are translated once, and with a ``TranslationStore`` each one is
+    only ever sent to the backend once across runs and restarts. Texts
+    whose batch failed are NaN, so callers can tell them from translations.
+    """
+    result = texts.copy()
+    todo = texts.notna() & (texts != '') & languages.notna() & (languages != target)
+    if not todo.any():
+        return result
+
+    pairs = pd.MultiIndex.from_arrays([texts[todo], languages[todo]]).unique()
+    keys = [translation_key(translator.name, source, target, text) for text, source in pairs]
+    translations = store.get_many(keys) if store is not None else {}
+    missing = [(key, text, source) for key, (text, source) in zip(keys, pairs) if key not in translations]
+    if missing:
+        fresh = asyncio.run(_translate_missing(missing, translator, target, batch_size, concurrency))
+        if store is not None:
+            store.put_many(fresh)
+        translations.update(fresh)
+        logger.info("translated %d of %d unique reviews with %s (%d from the translation store)",
+                    len(fresh), len(pairs), translator.name, len(pairs) - len(missing))
+
+    lookup = pd.Series([translations.get(key) for key in keys], index=pairs, dtype='object')
+    translated = lookup.reindex(pd.MultiIndex.from_arrays([texts[todo], languages[todo]])).to_numpy()
+    result[todo] = translated
+    return result
+
+
+TRANSLATOR = get_translator(os.environ.get('TP_REVIEWS_TRANSLATOR'))
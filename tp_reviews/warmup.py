@@ -0,0 +1,65 @@
+"""Warm-up: precompute every registered dataset alongside the dashboard.
+
+Usage::
+
+    python -m tp_reviews.warmup & exec streamlit run dashboard.py
+
+precomputes the artifacts of every registered dataset in a background
+process while the dashboard binds its port and starts serving, so a
+large export does not hold up boot (platforms kill apps that do not
+bind within their startup limit) and visitors after a deploy or a
+restart load the artifacts from the store instead of scoring reviews.
+Later changes are picked up in the dashboard by
+``datasets.DatasetRefresher``.
+"""
+import argparse
+import logging
+
+from .database import REVIEW_BACKEND
+from .datasets import DATASETS_PATH, load_registry
+from .pipeline import load_cube, load_database, load_discoveries, load_enriched, load_pain_points, load_theme_matrix
+from .store import DEFAULT_CACHE_DIR, ArtifactStore
+from .translation import TRANSLATOR
+
+
+def warm_store(path, store, workers=None, translator=TRANSLATOR):
+    """Precompute the artifacts the dashboard loads for one review CSV; the batch job (``cli``) runs the same stages"""
+    df = load_enriched(path, store, workers=workers, translator=translator)
+    load_pain_points(df, store)
+    load_cube(df, store)
+    load_discoveries(df, store)
+    load_theme_matrix(df, store)
+    if REVIEW_BACKEND == 'sqlite':
+        load_database(path, store=store, translator=translator)
+    return df
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m tp_reviews.warmup', description="Precompute the artifacts of every registered dataset for the dashboard.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="artifact store directory (default: %(default)s)")
+    parser.add_argument('--datasets', default=DATASETS_PATH, help="dataset registry file or directory of CSVs (default: $TP_REVIEWS_DATASETS)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for scoring (default: serial)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    logger = logging.getLogger('tp_reviews.warmup')
+
+    store = ArtifactStore(args.cache_dir)
+    failed = 0
+    for name, path in load_registry(args.datasets).items():
+        try:
+            df = warm_store(path, store, workers=args.workers)
+        except Exception:
+            # One broken dataset should not keep the others, or the dashboard, cold
+            logger.exception("failed to warm %s", name)
+            failed += 1
+            continue
+        logger.info("warmed %s: %d reviews (artifact %s)", name, len(df), df.attrs['fingerprint'])
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())